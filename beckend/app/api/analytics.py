@@ -0,0 +1,96 @@
+from fastapi import APIRouter, HTTPException
+from typing import Dict, Any
+import asyncio
+import logging
+from app.services.analytics_service import analytics_service
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# 분석 가능한 최대 기간 (일)
+MAX_ANALYTICS_DAYS = 365
+
+async def _get_report(days: int, resolution: str) -> Dict[str, Any]:
+    if not 1 <= days <= MAX_ANALYTICS_DAYS:
+        raise HTTPException(status_code=400, detail=f"days는 1~{MAX_ANALYTICS_DAYS} 사이여야 합니다.")
+    try:
+        # 계산이 이벤트 루프를 막지 않도록 스레드에서 실행
+        return await asyncio.to_thread(analytics_service.get_report, days, resolution)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _meta(report: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: report[key] for key in ('start', 'end', 'days', 'resolution', 'session_count', 'compute_ms')}
+
+@router.get("/analytics/fleet")
+async def get_fleet_analytics(days: int = 30, resolution: str = "auto") -> Dict[str, Any]:
+    """전체 세션 성과 지표와 지표(indicator)별 요약"""
+    try:
+        report = await _get_report(days, resolution)
+        return {
+            "success": True,
+            **_meta(report),
+            "fleet": report['fleet'],
+            "indicators": report['indicators']
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"성과 분석 조회 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"성과 분석 조회 중 오류 발생: {str(e)}")
+
+@router.get("/analytics/indicators/{indicator}")
+async def get_indicator_analytics(indicator: str, days: int = 30, resolution: str = "auto") -> Dict[str, Any]:
+    """지표별 성과 지표"""
+    try:
+        report = await _get_report(days, resolution)
+        if indicator not in report['indicators']:
+            raise HTTPException(status_code=404, detail="해당 지표의 세션을 찾을 수 없습니다.")
+        return {
+            "success": True,
+            **_meta(report),
+            "indicator": indicator,
+            "metrics": report['indicators'][indicator]
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"지표 성과 분석 조회 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"성과 분석 조회 중 오류 발생: {str(e)}")
+
+@router.get("/analytics/sessions/{session_id}")
+async def get_session_analytics(session_id: str, days: int = 30, resolution: str = "auto") -> Dict[str, Any]:
+    """세션별 성과 지표"""
+    try:
+        report = await _get_report(days, resolution)
+        if session_id not in report['sessions']:
+            raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
+        return {
+            "success": True,
+            **_meta(report),
+            "session_id": session_id,
+            "metrics": report['sessions'][session_id]
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"세션 성과 분석 조회 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"성과 분석 조회 중 오류 발생: {str(e)}")
+
+@router.get("/analytics/execution")
+async def get_execution_analytics(days: int = 7) -> Dict[str, Any]:
+    """체결 품질: 슬리피지(bps)와 체결까지 걸린 시간(ms) 분포 (심볼/거래소 타입/주문 종류/팬아웃 순서별)"""
+    try:
+        if not 1 <= days <= MAX_ANALYTICS_DAYS:
+            raise HTTPException(status_code=400, detail=f"days는 1~{MAX_ANALYTICS_DAYS} 사이여야 합니다.")
+        report = await asyncio.to_thread(analytics_service.get_execution_report, days)
+        return {"success": True, **report}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"체결 품질 분석 조회 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"체결 품질 분석 조회 중 오류 발생: {str(e)}")
@@ -0,0 +1,79 @@
+from fastapi import APIRouter, HTTPException, Request
+from typing import Dict, Any, List
+import json
+import time
+import asyncio
+import logging
+from app.services.backtest_service import run_sweep
+from app.services.candle_service import get_candles
+from app.services.ledger_service import ledger_service
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# 백테스트 최대 기간 (일)
+MAX_BACKTEST_DAYS = 366
+
+def _number_list(data: Dict[str, Any], field: str, default: List[float]) -> List[float]:
+    values = data.get(field, default)
+    if not isinstance(values, list) or not values or not all(isinstance(x, (int, float)) for x in values):
+        raise HTTPException(status_code=400, detail=f"{field}는 숫자 목록이어야 합니다.")
+    return values
+
+@router.post("/backtest")
+async def run_backtest(request: Request) -> Dict[str, Any]:
+    """저장된 웹훅 신호를 과거 캔들에 재생해 레버리지/익절/손절 조합을 평가하고 순위를 반환합니다.
+    
+    요청 예: {"indicator": "PREMIUM", "symbol": "XRP-USDT", "days": 30,
+             "leverage": [1, 5, 10], "take_profit": [1, 2, 3], "stop_loss": [0.5, 1, 2]}
+    """
+    try:
+        body = await request.body()
+        data = json.loads(body.decode('utf-8'))
+        
+        indicator = data.get('indicator')
+        symbol = data.get('symbol')
+        if not indicator or not symbol:
+            raise HTTPException(status_code=400, detail="indicator와 symbol이 필요합니다.")
+        
+        end = float(data.get('end') or time.time())
+        start = float(data.get('start') or end - float(data.get('days', 30)) * 86400)
+        if not 0 < end - start <= MAX_BACKTEST_DAYS * 86400:
+            raise HTTPException(status_code=400, detail=f"기간은 0~{MAX_BACKTEST_DAYS}일 사이여야 합니다.")
+        
+        leverages = _number_list(data, 'leverage', [5])
+        take_profits = _number_list(data, 'take_profit', [1.0])
+        stop_losses = _number_list(data, 'stop_loss', [0.5])
+        
+        signals = ledger_service.get_signal_series(indicator, symbol, start, end)
+        if not signals:
+            raise HTTPException(status_code=404, detail="해당 기간에 저장된 신호가 없습니다.")
+        
+        try:
+            candles = await get_candles(symbol, data.get('interval', '1m'), start, end)
+            # 조합 평가는 CPU 작업이므로 이벤트 루프 밖에서 실행
+            result = await asyncio.to_thread(
+                run_sweep, candles, signals, leverages, take_profits, stop_losses,
+                float(data.get('investment', 100)), data.get('fee_rate'),
+                data.get('sort_by', 'total_pnl'), int(data.get('top', 20))
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        logger.info(f"백테스트 완료: {indicator} {symbol} 신호 {len(signals)}개, "
+                    f"조합 {result['config_count']}개, {result['elapsed_ms']}ms")
+        return {
+            "success": True,
+            "indicator": indicator,
+            "symbol": symbol,
+            "start": start,
+            "end": end,
+            "signal_count": len(signals),
+            **result
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"백테스트 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"백테스트 중 오류 발생: {str(e)}")
@@ -0,0 +1,89 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Dict, Any, Optional
+import time
+import asyncio
+import logging
+from app.core.security import require_admin
+from app.services.candle_store import candle_store
+from app.services.candle_service import INTERVAL_SECONDS, get_candles, update_candles
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# 한 번에 반환하는 최대 캔들 수
+MAX_CANDLES_PER_REQUEST = 5000
+
+def _check_interval(interval: str) -> None:
+    if interval not in INTERVAL_SECONDS:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 캔들 간격입니다: {interval}")
+
+@router.get("/candles/{symbol}")
+async def read_candles(symbol: str, interval: str = "1m", start: Optional[float] = None,
+                       end: Optional[float] = None, update: bool = False) -> Dict[str, Any]:
+    """저장된 캔들 구간 조회 (update=true면 빠진 구간을 먼저 채움)"""
+    _check_interval(interval)
+    end = time.time() if end is None else end
+    start = end - INTERVAL_SECONDS[interval] * MAX_CANDLES_PER_REQUEST if start is None else start
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start는 end보다 이전이어야 합니다.")
+    
+    try:
+        if update:
+            candles = await get_candles(symbol, interval, start, end)
+        else:
+            candles = await asyncio.to_thread(candle_store.read, symbol, interval, start, end)
+        count = min(len(candles['ts']), MAX_CANDLES_PER_REQUEST)
+        # 매핑된 파일을 실제로 읽는 변환도 스레드에서 실행
+        columns = await asyncio.to_thread(
+            lambda: {name: values[:count].tolist() for name, values in candles.items()}
+        )
+        return {
+            "success": True,
+            "symbol": symbol,
+            "interval": interval,
+            "count": count,
+            "truncated": len(candles['ts']) > count,
+            "candles": columns
+        }
+        
+    except Exception as e:
+        logger.error(f"캔들 조회 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"캔들 조회 중 오류 발생: {str(e)}")
+
+@router.get("/candles/{symbol}/status")
+async def get_candle_status(symbol: str, interval: str = "1m") -> Dict[str, Any]:
+    """저장 구간, 캔들 수, 빠진 구간 수"""
+    _check_interval(interval)
+    bounds = await asyncio.to_thread(candle_store.bounds, symbol, interval)
+    if bounds is None:
+        return {"success": True, "symbol": symbol, "interval": interval, "stored": False}
+    gaps = await asyncio.to_thread(candle_store.find_gaps, symbol, interval, INTERVAL_SECONDS[interval])
+    return {
+        "success": True,
+        "symbol": symbol,
+        "interval": interval,
+        "stored": True,
+        "first_ts": bounds[0],
+        "last_ts": bounds[1],
+        "count": bounds[2],
+        "gap_count": len(gaps)
+    }
+
+@router.post("/candles/{symbol}/update", dependencies=[Depends(require_admin)])
+async def refresh_candles(symbol: str, interval: str = "1m", start: Optional[float] = None) -> Dict[str, Any]:
+    """빠진 구간을 BingX에서 받아 채움 (start를 주면 그 시점부터 백필)"""
+    _check_interval(interval)
+    try:
+        written = await update_candles(symbol, interval, start=start)
+        return {
+            "success": True,
+            "symbol": symbol,
+            "interval": interval,
+            "written": written
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"캔들 갱신 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"캔들 갱신 중 오류 발생: {str(e)}")
@@ -0,0 +1,104 @@
+from fastapi import APIRouter, HTTPException
+from typing import Dict, Any, Optional
+import time
+import logging
+from app.services.equity_snapshot_service import equity_snapshot_service
+from app.services.sqlite_session_service import sqlite_session_service
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# 한 번에 반환하는 최대 포인트 수
+MAX_SERIES_POINTS = 5000
+
+def _with_pnl(points, initial_balance: Optional[float]):
+    """포인트별 손익/수익률 추가 (초기자산 기준)"""
+    for point in points:
+        if initial_balance:
+            point['pnl'] = round(point['close'] - initial_balance, 8)
+            point['pnl_rate'] = round(point['pnl'] / initial_balance * 100, 4)
+        else:
+            point['pnl'] = 0.0
+            point['pnl_rate'] = 0.0
+    return points
+
+@router.get("/dashboard/equity/{session_id}")
+async def get_equity_series(session_id: str, start: Optional[float] = None, end: Optional[float] = None,
+                            resolution: str = "auto", max_points: int = 1000) -> Dict[str, Any]:
+    """자산/손익 시계열 구간 조회 (해상도 자동 선택 및 다운샘플)"""
+    try:
+        session_data = sqlite_session_service.get_session(session_id)
+        if not session_data:
+            raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
+        
+        end = time.time() if end is None else end
+        start = end - 86400 if start is None else start
+        if start >= end:
+            raise HTTPException(status_code=400, detail="start는 end보다 이전이어야 합니다.")
+        max_points = max(1, min(max_points, MAX_SERIES_POINTS))
+        
+        try:
+            used_resolution, points = equity_snapshot_service.query_range(
+                session_id, start, end, resolution=resolution, max_points=max_points
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return {
+            "success": True,
+            "session_id": session_id,
+            "resolution": used_resolution,
+            "start": start,
+            "end": end,
+            "points": _with_pnl(points, session_data.get('initial_balance'))
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"자산 시계열 조회 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"자산 시계열 조회 중 오류 발생: {str(e)}")
+
+@router.get("/dashboard/data/{session_id}")
+async def get_dashboard_data(session_id: str, days: int = 30, max_points: int = 1000) -> Dict[str, Any]:
+    """대시보드용 수익률 요약 및 자산 변화 데이터"""
+    try:
+        session_data = sqlite_session_service.get_session(session_id)
+        if not session_data:
+            raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
+        
+        end = time.time()
+        start = end - max(days, 1) * 86400
+        resolution, points = equity_snapshot_service.query_range(
+            session_id, start, end, max_points=max(1, min(max_points, MAX_SERIES_POINTS))
+        )
+        
+        initial_balance = session_data.get('initial_balance')
+        latest = equity_snapshot_service.get_latest_snapshot(session_id)
+        current_equity = latest['equity'] if latest else None
+        profit = None
+        profit_rate = None
+        if initial_balance and current_equity is not None:
+            profit = round(current_equity - initial_balance, 8)
+            profit_rate = round(profit / initial_balance * 100, 4)
+        
+        return {
+            "success": True,
+            "session_id": session_id,
+            "summary": {
+                "initial_balance": initial_balance,
+                "current_equity": current_equity,
+                "unrealized_pnl": latest['unrealized_pnl'] if latest else None,
+                "profit": profit,
+                "profit_rate": profit_rate,
+                "updated_at": latest['ts'] if latest else None
+            },
+            "resolution": resolution,
+            "points": _with_pnl(points, initial_balance)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"대시보드 데이터 조회 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"대시보드 데이터 조회 중 오류 발생: {str(e)}")
@@ -0,0 +1,129 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response
+from typing import Dict, Any, Optional
+import time
+import asyncio
+import logging
+from app.core.security import require_admin
+from app.core.sqlite_database import query_stats
+from app.core.tracing import latency_tracer
+from app.services.loop_monitor import loop_lag_monitor
+from app.services.profiler_service import profiler_service, ProfilerBusyError
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+# wait=true 샘플링에서 샘플링 시간 외에 결과를 기다리는 여유 (초)
+PROFILE_WAIT_MARGIN_SECONDS = 5.0
+
+@router.get("/diagnostics/db")
+async def get_db_diagnostics() -> Dict[str, Any]:
+    """SQLite 쿼리 형태별 지연시간/행 수/잠금 대기 통계"""
+    return {
+        "success": True,
+        "data": query_stats.snapshot()
+    }
+
+@router.post("/diagnostics/db/reset")
+async def reset_db_diagnostics() -> Dict[str, Any]:
+    """SQLite 쿼리 통계 초기화"""
+    query_stats.reset()
+    logger.info("SQLite 쿼리 통계 초기화")
+    return {
+        "success": True,
+        "message": "쿼리 통계가 초기화되었습니다."
+    }
+
+@router.get("/diagnostics/latency")
+async def get_latency_diagnostics() -> Dict[str, Any]:
+    """웹훅~주문 응답 단계별 지연시간 (단계 -> 거래소 구분 -> 심볼)"""
+    return {
+        "success": True,
+        "data": latency_tracer.snapshot()
+    }
+
+@router.post("/diagnostics/latency/reset")
+async def reset_latency_diagnostics() -> Dict[str, Any]:
+    """단계별 지연시간 통계 초기화"""
+    latency_tracer.reset()
+    logger.info("단계별 지연시간 통계 초기화")
+    return {
+        "success": True,
+        "message": "지연시간 통계가 초기화되었습니다."
+    }
+
+@router.get("/diagnostics/loop")
+async def get_loop_diagnostics() -> Dict[str, Any]:
+    """이벤트 루프 지연 백분위와 루프를 막은 코드 위치/스택"""
+    return {
+        "success": True,
+        "data": loop_lag_monitor.stats()
+    }
+
+@router.get("/diagnostics/profile")
+async def get_profile_status() -> Dict[str, Any]:
+    """진행 중인 프로파일링과 내려받을 수 있는 결과 목록"""
+    return {
+        "success": True,
+        "data": profiler_service.status()
+    }
+
+@router.post("/diagnostics/profile/requests")
+async def profile_requests(count: int = 10) -> Dict[str, Any]:
+    """다음 count개 웹훅 요청을 cProfile로 프로파일링 (결과: pstats, text)"""
+    try:
+        return {
+            "success": True,
+            "data": profiler_service.start_requests(count)
+        }
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post("/diagnostics/profile/sample")
+async def profile_sample(seconds: float = 10.0, interval_ms: Optional[float] = None, wait: bool = False):
+    """seconds초 동안 이벤트 루프 스택 샘플링 (결과: collapsed). wait=true면 끝날 때까지 기다려 결과 파일 반환"""
+    try:
+        status = profiler_service.start_sampling(
+            seconds, interval_ms if interval_ms is not None else get_settings().profile_sample_interval_ms
+        )
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not wait:
+        return {
+            "success": True,
+            "data": status
+        }
+    profile_id = status['active']['id']
+    # 샘플링 시간 + 여유 안에 결과가 없거나 샘플링 스레드가 결과 없이 끝났으면 오류
+    deadline = time.monotonic() + status['active']['params']['seconds'] + PROFILE_WAIT_MARGIN_SECONDS
+    while profiler_service.get_artifact(profile_id) is None:
+        active = profiler_service.status()['active']
+        if time.monotonic() > deadline or active is None or active['id'] != profile_id:
+            if profiler_service.get_artifact(profile_id) is not None:
+                break
+            raise HTTPException(status_code=500, detail="샘플링 결과를 만들지 못했습니다.")
+        await asyncio.sleep(0.1)
+    return await download_profile(profile_id)
+
+@router.post("/diagnostics/profile/cancel")
+async def cancel_profile() -> Dict[str, Any]:
+    """진행 중인 프로파일링을 지금까지의 결과로 종료"""
+    profiler_service.cancel()
+    return {
+        "success": True,
+        "data": profiler_service.status()
+    }
+
+@router.get("/diagnostics/profile/{profile_id}")
+async def download_profile(profile_id: str, format: Optional[str] = None) -> Response:
+    """프로파일링 결과 파일 (format: pstats, text, collapsed. 생략하면 모드별 기본 형식)"""
+    artifact = profiler_service.get_artifact(profile_id, format)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="프로파일링 결과가 없습니다.")
+    content, media_type, filename = artifact
+    return Response(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Dict, Any, Optional
+import logging
+from app.core.security import require_admin
+from app.services.ledger_service import ledger_service
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+@router.get("/signals", dependencies=[Depends(require_admin)])
+async def list_signals(limit: int = 100, before: Optional[float] = None) -> Dict[str, Any]:
+    """웹훅 신호 기록 조회 (관리자 전용, before: 이 시각 이전 신호, 페이지 이동용)"""
+    signals = ledger_service.get_signals(limit=max(1, limit), before=before)
+    return {
+        "success": True,
+        "signals": signals,
+        "count": len(signals)
+    }
+
+@router.get("/signals/{signal_id}", dependencies=[Depends(require_admin)])
+async def get_signal(signal_id: str) -> Dict[str, Any]:
+    """신호 하나와 세션별 주문/체결 내역 조회 (관리자 전용)"""
+    signal = ledger_service.get_signal(signal_id)
+    if not signal:
+        raise HTTPException(status_code=404, detail="신호를 찾을 수 없습니다.")
+    return {
+        "success": True,
+        "signal": signal
+    }
+
+@router.get("/trades", dependencies=[Depends(require_admin)])
+async def list_trades(session_id: Optional[str] = None, symbol: Optional[str] = None,
+                      limit: int = 100, before: Optional[float] = None) -> Dict[str, Any]:
+    """세션/심볼별 주문 기록 조회 (관리자 전용)"""
+    trades = ledger_service.get_trades(session_id=session_id, symbol=symbol, limit=max(1, limit), before=before)
+    return {
+        "success": True,
+        "trades": trades,
+        "count": len(trades)
+    }
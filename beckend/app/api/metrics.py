@@ -0,0 +1,58 @@
+import hmac
+import logging
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.core.config import get_settings
+from app.core.metrics import registry, cache_requests
+from app.core.sqlite_database import query_stats
+from app.core.tracing import latency_tracer
+from app.services.balance_service import balance_service
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+settings = get_settings()
+
+# Prometheus 텍스트 형식 버전
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _collect_db():
+    histograms = query_stats.histograms()
+    yield ("db_query_latency_ms", "histogram", "SQLite query latency by query shape (ms)",
+           [({'query': shape}, histogram) for shape, histogram, _, _ in histograms])
+    yield ("db_busy_retries_total", "counter", "SQLITE_BUSY retries by query shape",
+           [({'query': shape}, retries) for shape, _, retries, _ in histograms])
+    yield ("db_lock_wait_ms_total", "counter", "Time spent waiting on SQLite locks by query shape (ms)",
+           [({'query': shape}, round(wait_ms, 3)) for shape, _, _, wait_ms in histograms])
+
+
+def _collect_stages():
+    yield ("webhook_stage_latency_ms", "histogram", "Webhook-to-order stage latency (ms)",
+           [({'stage': stage, 'exchange_type': exchange_type, 'symbol': symbol}, histogram)
+            for (stage, exchange_type, symbol), histogram in latency_tracer.histograms()])
+
+
+def _collect_caches():
+    totals = {}
+    for labels, value in cache_requests.samples():
+        hits, lookups = totals.get(labels['cache'], (0, 0))
+        totals[labels['cache']] = (hits + (value if labels['result'] == 'hit' else 0), lookups + value)
+    yield ("cache_hit_ratio", "gauge", "Cache hit ratio since process start",
+           [({'cache': cache}, round(hits / lookups, 6)) for cache, (hits, lookups) in sorted(totals.items()) if lookups])
+    yield ("balance_inflight_requests", "gauge", "Balance lookups currently waiting on the exchange",
+           [({}, balance_service.stats()['inflight'])])
+
+
+for _collector in (_collect_db, _collect_stages, _collect_caches):
+    registry.register_collector(_collector)
+
+
+@router.get("/metrics")
+async def get_metrics(request: Request) -> PlainTextResponse:
+    """Prometheus 수집용 지표 (텍스트 형식)"""
+    if settings.metrics_token:
+        provided = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(provided.encode('utf-8'), f"Bearer {settings.metrics_token}".encode('utf-8')):
+            raise HTTPException(status_code=401, detail="지표 토큰이 올바르지 않습니다.")
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import time
+import asyncio
 import requests
 import hmac
 import os
@@ -10,6 +12,13 @@ from hashlib import sha256
 from dotenv import load_dotenv
 from app.models.user_session import session_manager
 from app.services.sqlite_session_service import sqlite_session_service
+from app.services.balance_service import balance_service
+from app.services.account_stream import account_stream_hub
+from app.services.equity_snapshot_service import equity_snapshot_service
+from app.core.config import get_settings
+
+# SSE 연결 유지용 주석 전송 간격 (초)
+STREAM_KEEPALIVE_SECONDS = 15
 
 # .env 파일 로드
 load_dotenv()
@@ -94,13 +103,19 @@ async def get_balance_info(session_id: str) -> dict:
         
         print(f"자산 조회 API 호출: exchange_type={exchange_type}, session_id={session_id}")
         
-        # 계정 정보 조회
-        account_result = get_account_info(api_key, secret_key, exchange_type)
+        # 폴러가 최근에 기록한 스냅샷이 있으면 거래소 호출 없이 사용
         current_balance = investment  # 기본값
-        
-        if account_result.get('code') == 0:
-            account_data = account_result.get('data', {})
-            current_balance = float(account_data.get('totalWalletBalance', investment))
+        snapshot = equity_snapshot_service.get_latest_snapshot(session_id)
+        max_snapshot_age = get_settings().equity_poll_interval_seconds * 2
+        if snapshot and time.time() - snapshot['ts'] <= max_snapshot_age:
+            current_balance = snapshot['total_balance']
+        else:
+            # 계정 정보 조회 (잔고 캐시 공유)
+            try:
+                account_data = await balance_service.get_account_data(api_key, secret_key, exchange_type)
+                current_balance = float(account_data.get('totalWalletBalance', investment))
+            except HTTPException as e:
+                print(f"계정 정보 조회 실패: {e.detail}")
         
         # 초기자산 조회 (세션 시작시점의 잔고)
         initial_balance = session_data.get('initial_balance')
@@ -152,41 +167,71 @@ async def get_account_balance(session_id: str) -> dict:
         print(f"🔑 API 키 확인 완료: {session_id}")
         print(f"🏦 거래소 타입: {exchange_type}")
         
-        # 계정 정보 조회
-        print(f"📡 BingX API 호출 시작...")
-        account_result = get_account_info(api_key, secret_key, exchange_type)
-        print(f"📡 BingX API 응답: {account_result}")
-        
-        if account_result.get('code') == 0:
-            account_data = account_result.get('data', {})
-            total_balance = float(account_data.get('totalWalletBalance', 0))
-            available_balance = float(account_data.get('availableBalance', 0))
-            frozen_balance = float(account_data.get('frozenBalance', 0))
-            
-            print(f"💰 계좌 잔고 정보:")
-            print(f"   - 총 잔고: {total_balance}")
-            print(f"   - 사용 가능 잔고: {available_balance}")
-            print(f"   - 동결 잔고: {frozen_balance}")
-            print(f"   - 통화: {'VST' if exchange_type == 'demo' else 'USDT'}")
-            
-            result = {
-                "success": True,
-                "session_id": session_id,
-                "exchange_type": exchange_type,
-                "balance": {
-                    "total_balance": total_balance,
-                    "available_balance": available_balance,
-                    "frozen_balance": frozen_balance,
-                    "currency": "VST" if exchange_type == "demo" else "USDT"
-                }
+        # 계정 정보 조회 (TTL 캐시 + 동시 요청 병합)
+        try:
+            account_data = await balance_service.get_account_data(api_key, secret_key, exchange_type)
+        except HTTPException as e:
+            print(f"❌ 계좌 조회 실패: {e.detail}")
+            raise HTTPException(status_code=500, detail=f"계좌 조회 실패: {e.detail}")
+        
+        total_balance = float(account_data.get('totalWalletBalance', 0))
+        available_balance = float(account_data.get('availableBalance', 0))
+        frozen_balance = float(account_data.get('frozenBalance', 0))
+        
+        print(f"💰 계좌 잔고 정보:")
+        print(f"   - 총 잔고: {total_balance}")
+        print(f"   - 사용 가능 잔고: {available_balance}")
+        print(f"   - 동결 잔고: {frozen_balance}")
+        print(f"   - 통화: {'USDT' if exchange_type == 'live' else 'VST'}")
+        
+        result = {
+            "success": True,
+            "session_id": session_id,
+            "exchange_type": exchange_type,
+            "balance": {
+                "total_balance": total_balance,
+                "available_balance": available_balance,
+                "frozen_balance": frozen_balance,
+                "currency": "USDT" if exchange_type == "live" else "VST"
             }
-            
-            print(f"✅ 계좌 잔고 조회 완료: {result}")
-            return result
-        else:
-            print(f"❌ 계좌 조회 실패: {account_result}")
-            raise HTTPException(status_code=500, detail=f"계좌 조회 실패: {account_result.get('msg', '알 수 없는 오류')}")
+        }
+        
+        print(f"✅ 계좌 잔고 조회 완료: {result}")
+        return result
         
     except Exception as e:
         print(f"❌ 계좌 잔고 조회 중 오류: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"계좌 잔고 조회 중 오류: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"계좌 잔고 조회 중 오류: {str(e)}")
+
+@router.get("/stream/{session_id}")
+async def stream_account_updates(session_id: str, request: Request):
+    """잔고/포지션/미실현손익 변경을 Server-Sent Events로 푸시 (폴링 대체)"""
+    session_data = sqlite_session_service.get_session(session_id)
+    if not session_data:
+        raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
+    
+    api_key = session_data.get('api_key')
+    secret_key = session_data.get('secret_key')
+    exchange_type = session_data.get('exchange_type', 'demo')
+    if not api_key or not secret_key:
+        raise HTTPException(status_code=400, detail="API 키가 설정되지 않았습니다.")
+    
+    async def event_stream():
+        queue = account_stream_hub.subscribe(api_key, secret_key, exchange_type)
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                payload = json.dumps({"session_id": session_id, **event}, ensure_ascii=False)
+                yield f"event: {event['type']}\ndata: {payload}\n\n"
+        finally:
+            account_stream_hub.unsubscribe(api_key, exchange_type, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException, Request
-from typing import Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, List, Optional
 import json
 import logging
+from app.core.security import require_admin
 from app.models.user_session import session_manager
 from app.services.sqlite_session_service import sqlite_session_service
 from datetime import datetime
@@ -9,6 +11,10 @@ from datetime import datetime
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# 세션 목록 한 페이지의 기본/최대 크기
+DEFAULT_SESSION_PAGE_SIZE = 100
+MAX_SESSION_PAGE_SIZE = 1000
+
 @router.post("/create-or-update-session")
 async def create_or_update_session(request: Request) -> Dict[str, Any]:
     """API 키 기준으로 세션을 생성하거나 업데이트합니다."""
@@ -285,29 +291,134 @@ async def delete_session(session_id: str) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=f"세션 삭제 중 오류 발생: {str(e)}")
 
 @router.get("/sessions")
-async def list_sessions() -> Dict[str, Any]:
-    """모든 활성 세션을 조회합니다."""
+async def list_sessions(request: Request, limit: Optional[int] = None, cursor: Optional[str] = None,
+                        active_only: bool = True, format: str = "json", include_all: bool = Query(False, alias="all"),
+                        with_total: bool = False):
+    """세션 목록을 조회합니다. (기본은 활성 세션 DEFAULT_SESSION_PAGE_SIZE개씩 키셋 페이지네이션)
+    
+    next_cursor로 다음 페이지를 요청합니다. limit=0 또는 all=true면 예전처럼 커서 이후 전체를 반환합니다.
+    with_total=true면 전체 세션 수(total_count)도 계산합니다 (COUNT(*)라 필요할 때만 요청).
+    format=ndjson: 관리자용 전체 스트리밍 내보내기
+    """
     try:
-        # SQLite에서 모든 활성 세션 조회
-        active_sessions = sqlite_session_service.get_active_sessions()
-        
-        sessions = []
-        for session in active_sessions:
-            sessions.append({
-                "session_id": session['session_id'],
-                "exchange_type": session['exchange_type'],
-                "indicator": session['indicator'],
-                "is_auto_trading_enabled": session['is_auto_trading_enabled'],
-                "current_symbol": session['current_symbol'],
-                "last_activity": session['last_activity']
-            })
+        if format == "ndjson":
+            await require_admin(request)
+            
+            def export_lines():
+                for session in sqlite_session_service.iter_sessions(active_only=active_only):
+                    yield json.dumps(session, ensure_ascii=False) + "\n"
+            
+            return StreamingResponse(export_lines(), media_type="application/x-ndjson")
+        
+        if format != "json":
+            raise HTTPException(status_code=400, detail="format은 json 또는 ndjson이어야 합니다.")
+        
+        if include_all or limit == 0:
+            limit = None
+        elif limit is None:
+            limit = DEFAULT_SESSION_PAGE_SIZE
+        else:
+            limit = max(1, min(limit, MAX_SESSION_PAGE_SIZE))
+        try:
+            sessions, next_cursor = sqlite_session_service.list_sessions_page(
+                limit=limit, cursor=cursor, active_only=active_only
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         return {
             "success": True,
             "sessions": sessions,
-            "total_count": len(sessions)
+            "total_count": sqlite_session_service.count_sessions(active_only=active_only) if with_total else None,
+            "count": len(sessions),
+            "limit": limit,
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"세션 목록 조회 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"세션 목록 조회 중 오류 발생: {str(e)}")
+
+def _run_bulk_update(updates: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    """일괄 업데이트 대상(session_ids 또는 indicator)을 검증하고 한 트랜잭션으로 실행"""
+    session_ids: Optional[List[str]] = data.get('session_ids')
+    indicator: Optional[str] = data.get('indicator')
+    
+    if (session_ids is None) == (indicator is None):
+        raise HTTPException(status_code=400, detail="session_ids 또는 indicator 중 하나만 지정해주세요.")
+    if session_ids is not None and (not isinstance(session_ids, list) or not all(isinstance(x, str) for x in session_ids)):
+        raise HTTPException(status_code=400, detail="session_ids는 문자열 목록이어야 합니다.")
+    
+    try:
+        results = sqlite_session_service.bulk_update_sessions(updates, session_ids=session_ids, indicator=indicator)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    updated_count = sum(1 for result in results if result['status'] == 'updated')
+    return {
+        "success": True,
+        "message": f"{updated_count}개 세션이 업데이트되었습니다.",
+        "updated_count": updated_count,
+        "results": results
+    }
+
+@router.post("/sessions/bulk/auto-trading", dependencies=[Depends(require_admin)])
+async def bulk_toggle_auto_trading(request: Request) -> Dict[str, Any]:
+    """여러 세션(또는 지표 전체)의 자동매매를 한 번에 켜거나 끕니다."""
+    try:
+        body = await request.body()
+        data = json.loads(body.decode('utf-8'))
+        
+        enabled = data.get('enabled')
+        if not isinstance(enabled, bool):
+            raise HTTPException(status_code=400, detail="enabled 값(true/false)이 필요합니다.")
+        
+        result = _run_bulk_update({'is_auto_trading_enabled': enabled}, data)
+        logger.info(f"자동매매 일괄 {'활성화' if enabled else '비활성화'}: {result['updated_count']}개 세션")
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"자동매매 일괄 변경 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"자동매매 일괄 변경 중 오류 발생: {str(e)}")
+
+@router.post("/sessions/bulk/risk-settings", dependencies=[Depends(require_admin)])
+async def bulk_update_risk_settings(request: Request) -> Dict[str, Any]:
+    """여러 세션(또는 지표 전체)의 투자금/레버리지/익절/손절 설정을 한 번에 변경합니다."""
+    try:
+        body = await request.body()
+        data = json.loads(body.decode('utf-8'))
+        
+        updates: Dict[str, Any] = {}
+        try:
+            if data.get('investment') is not None:
+                updates['investment'] = float(data['investment'])
+                if updates['investment'] <= 0:
+                    raise ValueError("investment는 0보다 커야 합니다.")
+            if data.get('leverage') is not None:
+                updates['leverage'] = int(data['leverage'])
+                if updates['leverage'] < 1:
+                    raise ValueError("leverage는 1 이상이어야 합니다.")
+            for field in ('take_profit', 'stop_loss'):
+                if data.get(field) is not None:
+                    updates[field] = float(data[field])
+                    if updates[field] < 0:
+                        raise ValueError(f"{field}는 0 이상이어야 합니다.")
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"잘못된 설정 값: {str(e)}")
+        
+        if not updates:
+            raise HTTPException(status_code=400, detail="변경할 설정(investment, leverage, take_profit, stop_loss)이 없습니다.")
+        
+        result = _run_bulk_update(updates, data)
+        logger.info(f"리스크 설정 일괄 변경: {result['updated_count']}개 세션, {updates}")
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"리스크 설정 일괄 변경 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"리스크 설정 일괄 변경 중 오류 발생: {str(e)}")
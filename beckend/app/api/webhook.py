@@ -1,22 +1,45 @@
 import json
+import time
+import uuid
+import asyncio
 import logging
 import os
-from typing import Any
+from datetime import datetime
+from typing import Any, Optional
 from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import JSONResponse
 from app.services.bingx import BingXClient
 from app.services.trading import TradingService
 
 from app.services.sqlite_session_service import sqlite_session_service
+from app.services.coordination_service import coordination_service
+from app.services.shard_dispatcher import shard_dispatcher
+from app.services.account_stream import account_stream_hub
+from app.services.ledger_service import ledger_service, extract_order
+from app.services.equity_snapshot_service import equity_snapshot_service
+from app.services.candle_store import candle_store
+from app.services.plan_client import PlanClient, positions_from_snapshot
+from app.services.traffic_recorder import traffic_recorder
+from app.services.traffic_replay import replay_exchange
+from app.services.profiler_service import profiler_service
+from app.core import tracing
+from app.core.config import get_settings
+from app.core.tracing import Trace, latency_tracer, ALL_EXCHANGES
+from app.core.metrics import registry, DEFAULT_COUNT_BUCKETS
 
 
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
+# 로깅 설정 (세션별 로그와 전체 페이로드 로그는 카테고리를 나눠 레벨/샘플링을 따로 적용,
+# 주문 실행 기록은 감사용이라 샘플링하지 않는 trade 카테고리)
 logger = logging.getLogger(__name__)
+session_logger = logging.getLogger(f"{__name__}.session")
+trade_logger = logging.getLogger(f"{__name__}.trade")
+payload_logger = logging.getLogger(f"{__name__}.payload")
 
 router = APIRouter()
 
+settings = get_settings()
+
 # 전역 변수 (기본값)
 bingx_client = BingXClient()
 trading_service = TradingService()
@@ -28,33 +51,126 @@ session_trading_symbols = {}
 # 전역 사용자 설정 (기본값)
 user_settings = {}
 
+# 웹훅 지표
+webhook_signals = registry.counter(
+    "webhook_signals_total", "Webhook signals by outcome (received, duplicate, stale, processed, failed)", ("outcome",)
+)
+webhook_ingest_delay = registry.histogram(
+    "webhook_ingest_delay_ms", "Delay from the alert time in the payload to webhook receipt (ms)"
+)
+webhook_sessions_skipped = registry.counter(
+    "webhook_sessions_skipped_total",
+    "Sessions skipped for a signal by reason (account_busy, latency_budget_exceeded, price_drift)", ("reason",)
+)
+webhook_fanout = registry.histogram(
+    "webhook_sessions_per_signal", "Sessions a signal was fanned out to", buckets=DEFAULT_COUNT_BUCKETS
+)
+fill_queries = registry.counter(
+    "order_fill_queries_total", "Follow-up order queries for fills missing from the order response by result "
+    "(filled, pending, failed)", ("result",)
+)
+
+# 진행 중인 체결가 조회 작업 (완료 전에 가비지 컬렉션되지 않도록 보관)
+_fill_query_tasks: set = set()
+
 async def calculate_order_quantity(investment_amount: float, leverage: int, current_price: float) -> float:
     """투자금액과 레버리지를 기반으로 주문 수량 계산"""
     return (investment_amount * leverage) / current_price
 
-async def execute_trade_for_session(session_id: str, symbol: str, action: str, user_settings: dict) -> dict:
-    """세션별 매매 실행"""
-    try:
-        # 세션별 BingXClient 인스턴스 생성
+async def execute_trade_for_session(session_id: str, symbol: str, action: str, user_settings: dict,
+                                    client: Optional[BingXClient] = None,
+                                    signal: Optional[dict] = None,
+                                    fanout_position: Optional[int] = None) -> dict:
+    """세션별 매매 실행 (client가 주어지면 해당 계정 클라이언트 재사용)
+    
+    signal: 신호 컨텍스트 {'signal_id', 'received_at'}. 주어지면 실행된 주문을 원장에 기록하고
+    단계별 소요 시간(거래소 호출, 반대 포지션 종료 등)을 결과의 trace에 담습니다.
+    fanout_position: 이 신호에서 이 세션이 실행된 순서 (0부터, 원장에 기록)
+    """
+    # 세션별 BingXClient 인스턴스 생성
+    session_bingx_client = client
+    if session_bingx_client is None:
         session_bingx_client = BingXClient()
         session_bingx_client.set_credentials(
             api_key=user_settings['apiKey'],
             secret_key=user_settings['secretKey'],
             exchange_type=user_settings.get('exchangeType', 'demo')
         )
-        
-        # 세션별 TradingService 인스턴스 생성
-        session_trading_service = TradingService()
-        
+    
+    # 세션별 TradingService 인스턴스 생성 (세션 계정으로 주문)
+    session_trading_service = TradingService(session_bingx_client, record_orders=True)
+    
+    if signal is None:
+        result = await _execute_session_trade(
+            session_id, symbol, action, user_settings, session_bingx_client, session_trading_service
+        )
+    else:
+        trace = Trace(signal['received_at'], user_settings.get('exchangeType', 'demo'), symbol)
+        with tracing.activate(trace), trace.span('execute'):
+            result = await _execute_session_trade(
+                session_id, symbol, action, user_settings, session_bingx_client, session_trading_service,
+                signal=signal
+            )
+        result = {**result, 'trace': trace.to_dict()}
+    
+    # 주문/체결 내역을 원장에 기록 (배치 기록 스레드로 넘기고 바로 반환)
+    if signal is not None:
+        unfilled = ledger_service.record_session_orders(
+            signal, session_id, symbol, action,
+            user_settings.get('exchangeType', 'demo'), session_trading_service.orders, result,
+            fanout_position=fanout_position
+        )
+        # 응답에 체결가가 없던 주문은 다음 세션 처리를 늦추지 않도록 백그라운드에서 조회
+        if unfilled and not session_bingx_client.dry_run and settings.ledger_fill_query_attempts > 0:
+            task = asyncio.create_task(_query_fills(session_bingx_client, symbol, signal['signal_id'], unfilled))
+            _fill_query_tasks.add(task)
+            task.add_done_callback(_fill_query_tasks.discard)
+    return result
+
+async def _query_fills(client: BingXClient, symbol: str, signal_id: str, order_ids: list) -> None:
+    """주문 응답에 체결가가 없던 주문을 조회해 원장의 체결가/체결 시각 보완 (대기 시간은 조회마다 2배)"""
+    delay = settings.ledger_fill_query_delay_seconds
+    for _ in range(settings.ledger_fill_query_attempts):
+        await asyncio.sleep(replay_exchange.scaled(delay) if replay_exchange.enabled else delay)
+        pending = []
+        for order_id in order_ids:
+            try:
+                _, fill_price, filled_at = extract_order(await client.get_order(symbol, order_id))
+            except Exception as e:
+                session_logger.warning(f"⚠️ 주문 {order_id} 체결 조회 실패: {str(e)}")
+                fill_price = filled_at = None
+            if fill_price is None:
+                pending.append(order_id)
+                continue
+            fill_queries.inc(result='filled')
+            ledger_service.record_fill(signal_id, order_id, fill_price, filled_at or time.time())
+        order_ids = pending
+        if not order_ids:
+            return
+        fill_queries.inc(len(order_ids), result='pending')
+        delay *= 2
+    fill_queries.inc(len(order_ids), result='failed')
+    logger.warning(f"⚠️ 체결가를 확인하지 못한 주문 {len(order_ids)}건 (신호 {signal_id})")
+
+async def _execute_session_trade(session_id: str, symbol: str, action: str, user_settings: dict,
+                                 session_bingx_client: BingXClient,
+                                 session_trading_service: TradingService,
+                                 signal: Optional[dict] = None) -> dict:
+    """세션별 매매 실행 본체 (청산/반대 포지션 전환/진입)
+    
+    진입 신호는 새 포지션 진입 주문 직전에만 신호 지연 보호(_entry_guard)를 확인합니다.
+    반대 포지션 종료는 신호가 늦거나 가격이 벗어났어도 항상 실행합니다.
+    """
+    try:
         if action == 'CLOSE':
-            logger.info(f"🔴 세션 {session_id} 포지션 종료 시도")
+            trade_logger.info(f"🔴 세션 {session_id} 포지션 종료 시도")
             
             # 먼저 포지션 존재 여부 확인
             positions = await session_bingx_client.get_positions(symbol)
             active_positions = [p for p in positions['data'] if float(p.get('positionAmt', 0)) != 0]
             
             if not active_positions:
-                logger.info(f"⚠️ 세션 {session_id}: 현재 활성화된 포지션이 없습니다.")
+                session_logger.info(f"⚠️ 세션 {session_id}: 현재 활성화된 포지션이 없습니다.")
                 return {
                     "success": True,
                     "message": "현재 활성화된 포지션이 없습니다."
@@ -65,14 +181,16 @@ async def execute_trade_for_session(session_id: str, symbol: str, action: str, u
                 symbol=symbol,
                 is_close=True
             )
-            logger.info(f"🔴 세션 {session_id} 포지션 종료 결과: {result}")
+            trade_logger.info(f"🔴 세션 {session_id} 포지션 종료 완료")
+            payload_logger.debug("🔴 세션 %s 포지션 종료 결과: %s", session_id, result)
             return result
             
         else:
             # 현재가 조회
             price_info = await session_bingx_client.get_ticker(symbol)
             current_price = float(price_info['data']['price'])
-            logger.info(f"💰 세션 {session_id} 현재가 조회: {current_price}")
+            session_logger.info(f"💰 세션 {session_id} 현재가 조회: {current_price}")
+            session_trading_service.set_sizing_price(current_price)
             
             # 기존 포지션 확인
             positions = await session_bingx_client.get_positions(symbol)
@@ -88,26 +206,29 @@ async def execute_trade_for_session(session_id: str, symbol: str, action: str, u
             
             # 반대 포지션이 있으면 먼저 종료
             if opposite_position:
-                logger.info(f"🔄 세션 {session_id} 반대 포지션 발견: {opposite_position['positionSide']} -> {action} 신호로 인한 포지션 전환")
+                trade_logger.info(f"🔄 세션 {session_id} 반대 포지션 발견: {opposite_position['positionSide']} -> {action} 신호로 인한 포지션 전환")
                 
                 # 사용자 설정값 사용 (반대 포지션 종료용)
                 leverage = int(user_settings.get('leverage', 5))
                 
                 # 기존 포지션 종료
-                close_result = await session_trading_service.execute_trade(
-                    symbol=symbol,
-                    side='CLOSE',
-                    quantity=0,
-                    leverage=leverage,
-                    take_profit_percentage=0,
-                    stop_loss_percentage=0,
-                    is_close=True
-                )
-                logger.info(f"🔄 세션 {session_id} 기존 포지션 종료 결과: {close_result}")
+                with tracing.span('reverse_close'):
+                    close_result = await session_trading_service.execute_trade(
+                        symbol=symbol,
+                        side='CLOSE',
+                        quantity=0,
+                        leverage=leverage,
+                        take_profit_percentage=0,
+                        stop_loss_percentage=0,
+                        is_close=True
+                    )
+                trade_logger.info(f"🔄 세션 {session_id} 기존 포지션 종료 완료")
+                payload_logger.debug("🔄 세션 %s 기존 포지션 종료 결과: %s", session_id, close_result)
                 
-                # 잠시 대기 (주문 처리 시간)
-                import asyncio
-                await asyncio.sleep(1)
+                # 잠시 대기 (주문 처리 시간, 드라이런은 대기 없음, 재생 모드는 재생 배속 적용)
+                if not session_bingx_client.dry_run:
+                    with tracing.span('reverse_wait'):
+                        await asyncio.sleep(replay_exchange.scaled(1) if replay_exchange.enabled else 1)
             
             # 사용자 설정값 사용
             investment_amount = float(user_settings.get('investment', 100))
@@ -119,10 +240,16 @@ async def execute_trade_for_session(session_id: str, symbol: str, action: str, u
                 leverage=leverage,
                 current_price=current_price
             )
-            logger.info(f"📊 세션 {session_id} 계산된 주문 수량: {quantity}")
+            session_logger.info(f"📊 세션 {session_id} 계산된 주문 수량: {quantity}")
+            
+            # 신호가 예산을 넘겨 늦었거나 현재가가 알림 가격에서 벗어났으면 새 포지션은 진입하지 않음
+            # (반대 포지션은 위에서 이미 종료)
+            skipped = _entry_guard(session_id, signal, current_price)
+            if skipped:
+                return skipped
             
             # 새 포지션 진입
-            logger.info(f"🚀 세션 {session_id} 새 포지션 진입 시도: {action} {symbol}")
+            trade_logger.info(f"🚀 세션 {session_id} 새 포지션 진입 시도: {action} {symbol}")
             result = await session_trading_service.execute_trade(
                 symbol=symbol,
                 side=action,
@@ -132,11 +259,12 @@ async def execute_trade_for_session(session_id: str, symbol: str, action: str, u
                 stop_loss_percentage=float(user_settings.get('stopLoss', 0.5)),
                 is_close=False
             )
-            logger.info(f"✅ 세션 {session_id} 새 포지션 진입 결과: {result}")
+            trade_logger.info(f"✅ 세션 {session_id} 새 포지션 진입 완료")
+            payload_logger.debug("✅ 세션 %s 새 포지션 진입 결과: %s", session_id, result)
             
             # 포지션 진입 성공 시 프론트엔드에 수익률 정보 업데이트 신호 전송
             if result.get('success', False):
-                logger.info(f"📊 세션 {session_id} 포지션 진입 성공 - 수익률 정보 업데이트 필요")
+                session_logger.info(f"📊 세션 {session_id} 포지션 진입 성공 - 수익률 정보 업데이트 필요")
             
             return result
             
@@ -147,42 +275,244 @@ async def execute_trade_for_session(session_id: str, symbol: str, action: str, u
             "message": f"매매 실행 중 오류: {str(e)}"
         }
 
+def _parse_signal(data: dict) -> tuple:
+    """웹훅 데이터에서 (액션, 심볼, 전략) 추출 및 검증"""
+    # 액션 검증
+    action = data.get('action')
+    if action not in ['LONG', 'SHORT', 'CLOSE']:
+        logger.error(f"❌ 잘못된 액션: {action}")
+        raise ValueError(f"잘못된 액션입니다: {action}")
+        
+    # 웹훅에서 받은 티커와 전략 정보
+    symbol = data.get('symbol', 'XRP-USDT')
+    strategy = data.get('strategy', 'PREMIUM')
+    
+    # 심볼 변환 로직 추가
+    if symbol.endswith('.P'):
+        # XRPUSDT.P -> XRP-USDT 변환
+        symbol = symbol.replace('.P', '').replace('USDT', '-USDT')
+    return action, symbol, strategy
+
+def _parse_alert_time(value: Any) -> Optional[float]:
+    """알림 시각 (ISO 8601 문자열 또는 epoch 초/밀리초) -> epoch 초. 해석할 수 없으면 None"""
+    if value is None or value == '':
+        return None
+    try:
+        if isinstance(value, (int, float)) or str(value).replace('.', '', 1).isdigit():
+            timestamp = float(value)
+            # 밀리초 단위 (TradingView {{timenow}}를 숫자로 보낸 경우 등)
+            return timestamp / 1000 if timestamp > 1e11 else timestamp
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except (TypeError, ValueError, OverflowError):
+        logger.warning(f"⚠️ 알림 시각을 해석할 수 없습니다: {value}")
+        return None
+
+def _parse_bar_price(value: Any) -> Optional[float]:
+    """알림 바 가격 (양수가 아니거나 해석할 수 없으면 None)"""
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return price if price > 0 else None
+
+def _apply_signal_guard(signal: dict, data: dict, action: str, received_at: float) -> Optional[float]:
+    """알림 시각/바 가격으로 신호 지연 보호 설정. 수신 지연(ms) 반환 (알림 시각이 없으면 None)
+    
+    알림 시각은 alert_time 또는 timenow 필드를 씁니다 (TradingView {{time}}은 바 시작 시각이라 쓰지 않음).
+    바 가격은 signal_price로 넣어 원장의 슬리피지 기준으로 쓰고, 진입 신호면 deadline(알림 시각 + 예산)도
+    넣어 세션 실행까지 전달합니다.
+    """
+    alert_time = _parse_alert_time(data.get('alert_time', data.get('timenow')))
+    ingest_delay_ms = None
+    if alert_time is not None:
+        # 알림 쪽 시계가 빠르면 음수가 되므로 0으로 기록
+        ingest_delay_ms = max(0.0, (received_at - alert_time) * 1000)
+        webhook_ingest_delay.observe(ingest_delay_ms)
+    
+    bar_price = _parse_bar_price(data.get('price'))
+    if bar_price is not None:
+        signal['signal_price'] = bar_price
+    
+    if action == 'CLOSE':
+        # 청산은 늦더라도 실행
+        return ingest_delay_ms
+    if settings.signal_latency_budget_ms > 0:
+        origin = received_at if alert_time is None else min(alert_time, received_at)
+        signal['deadline'] = origin + settings.signal_latency_budget_ms / 1000
+    return ingest_delay_ms
+
+def _skip_result(reason: str, message: str) -> dict:
+    webhook_sessions_skipped.inc(reason=reason)
+    return {'success': False, 'skipped': True, 'reason': reason, 'message': message}
+
+def _entry_guard(session_id: str, signal: Optional[dict], current_price: Optional[float] = None) -> Optional[dict]:
+    """진입 신호의 지연 예산 초과/가격 괴리 확인. 진입하면 안 되면 스킵 결과 반환"""
+    if not signal:
+        return None
+    deadline = signal.get('deadline')
+    if deadline is not None and time.time() > deadline:
+        session_logger.warning(f"⏰ 세션 {session_id}: 신호 지연 예산 초과 - 진입 스킵")
+        return _skip_result(
+            'latency_budget_exceeded',
+            f"신호 지연 예산({settings.signal_latency_budget_ms:.0f}ms)을 넘겨 진입하지 않았습니다."
+        )
+    bar_price = signal.get('signal_price')
+    if bar_price is not None and current_price is not None and settings.signal_max_price_drift_bps > 0:
+        drift_bps = abs(current_price - bar_price) / bar_price * 10000
+        if drift_bps > settings.signal_max_price_drift_bps:
+            session_logger.warning(
+                f"📉 세션 {session_id}: 현재가 {current_price}가 알림 가격 {bar_price}에서 {drift_bps:.1f}bps 벗어남 - 진입 스킵"
+            )
+            return _skip_result(
+                'price_drift',
+                f"현재가가 알림 가격에서 {drift_bps:.1f}bps 벗어나 진입하지 않았습니다 "
+                f"(허용 {settings.signal_max_price_drift_bps:.0f}bps)."
+            )
+    return None
+
+def _build_job(session: dict, symbol: str, user_settings: dict, account_key: str, lease_token: str,
+               fanout_position: int) -> dict:
+    """리스를 얻은 세션의 실행 작업 (거래 심볼이 바뀐 경우에만 기록해 세션 캐시 유지)"""
+    if session.get('current_symbol') != symbol:
+        sqlite_session_service.update_session_status(session['session_id'], True, symbol)
+    return {
+        'session_id': session['session_id'],
+        'account_key': account_key,
+        'lease_token': lease_token,
+        'user_settings': user_settings,
+        'fanout_position': fanout_position
+    }
+
+async def _execute_job(symbol: str, action: str, job: dict, signal: dict) -> dict:
+    """세션 작업 하나 실행 (샤드 모드면 워커에 위임). 끝나면 리스 해제와 잔고/포지션 스트림 갱신
+
+    샤드 워커 응답이 없어 결과를 모르면 워커가 아직 주문 중일 수 있으므로 리스는 TTL 만료까지 유지합니다.
+    """
+    user_settings = job['user_settings']
+    pending = False
+    try:
+        if shard_dispatcher.enabled:
+            item = (await shard_dispatcher.dispatch(symbol, action, [job], signal=signal))[0]
+            pending = bool(item['result'].get('pending'))
+            return item
+        result = await execute_trade_for_session(
+            job['session_id'], symbol, action, user_settings, signal=signal, fanout_position=job['fanout_position']
+        )
+        return {'session_id': job['session_id'], 'result': result}
+    finally:
+        if not pending:
+            coordination_service.release_lease(job['account_key'], job['lease_token'])
+        account_stream_hub.notify_changed(user_settings['apiKey'], user_settings['exchangeType'])
+
+def _build_user_settings(session: dict) -> dict:
+    """DB 세션을 매매 실행용 설정으로 변환"""
+    return {
+        'apiKey': session['api_key'],
+        'secretKey': session['secret_key'],
+        'exchangeType': session['exchange_type'],
+        'investment': session['investment'],
+        'leverage': session['leverage'],
+        'takeProfit': session['take_profit'],
+        'stopLoss': session['stop_loss'],
+        'indicator': session['indicator'],
+        'isAutoTradingEnabled': session['is_auto_trading_enabled']
+    }
+
+def _should_trade(session_id: str, user_settings: dict, strategy: str) -> bool:
+    """세션이 이 신호로 매매해야 하는지 확인 (API 키, 자동매매 여부, 지표 일치)"""
+    # API 키가 설정되지 않은 경우 스킵
+    if not user_settings.get('apiKey') or not user_settings.get('secretKey'):
+        session_logger.debug(f"⚠️ 세션 {session_id}: API 키가 설정되지 않음 - 스킵")
+        return False
+    
+    # 자동매매가 비활성화된 경우 스킵
+    if not user_settings.get('isAutoTradingEnabled', False):
+        session_logger.debug(f"⚠️ 세션 {session_id}: 자동매매가 비활성화됨 - 스킵")
+        return False
+    
+    # 사용자가 선택한 지표와 웹훅 전략이 일치하는지 확인
+    selected_indicator = user_settings.get('indicator', 'PREMIUM')
+    
+    if strategy != selected_indicator:
+        session_logger.debug(f"⚠️ 세션 {session_id} 지표 불일치: 웹훅 전략({strategy}) != 선택된 지표({selected_indicator}) - 스킵")
+        return False
+    
+    session_logger.info(f"✅ 세션 {session_id} 지표 일치: {strategy} == {selected_indicator} - 매매 실행")
+    return True
+
 @router.post("/webhook")
 async def handle_webhook(request: Request) -> dict[str, Any]:
-    """트레이딩뷰 웹훅을 처리하는 엔드포인트"""
+    """트레이딩뷰 웹훅을 처리하는 엔드포인트 (관리자가 요청 프로파일링을 켰으면 프로파일링 대상)"""
+    if not profiler_service.armed:
+        return await _handle_webhook(request)
+    profile = profiler_service.begin_request()
+    try:
+        return await _handle_webhook(request)
+    finally:
+        if profile is not None:
+            profiler_service.end_request(profile)
+
+async def _handle_webhook(request: Request) -> dict[str, Any]:
+    """웹훅 신호 처리 본체"""
     global session_settings, session_trading_symbols
     
     logger.info("=== 웹훅 신호 수신 시작 ===")
+    received_at = time.time()
+    webhook_signals.inc(outcome='received')
+    started = time.perf_counter()
+    # 신호 단위 구간 (심볼은 파싱 후 확정)
+    trace = Trace(received_at, ALL_EXCHANGES, '')
     
     try:
         # JSON 데이터 파싱
-        body = await request.body()
-        data = json.loads(body.decode('utf-8'))
-        logger.info(f"📥 웹훅 신호 수신: {data}")
+        with trace.span('parse'):
+            body = await request.body()
+            data = json.loads(body.decode('utf-8'))
+        payload_logger.debug("📥 웹훅 신호 수신: %s", data)
+        traffic_recorder.record_signal(received_at, data)
+        
+        action, symbol, strategy = _parse_signal(data)
+        trace.symbol = symbol
+        
+        # 여러 워커가 같은 신호를 중복 처리하지 않도록 신호 선점
+        signal_key = coordination_service.make_signal_key(body, action, symbol, strategy, data)
+        with trace.span('claim'):
+            claimed = coordination_service.claim_signal(signal_key)
+        if not claimed:
+            logger.info(f"⚠️ 이미 다른 워커가 처리한 신호입니다 - 스킵 ({signal_key[:12]})")
+            webhook_signals.inc(outcome='duplicate')
+            return {
+                "success": True,
+                "message": "이미 처리된 신호입니다.",
+                "data": {"duplicate": True}
+            }
         
-        # 액션 검증
-        action = data.get('action')
-        if action not in ['LONG', 'SHORT', 'CLOSE']:
-            logger.error(f"❌ 잘못된 액션: {action}")
-            raise ValueError(f"잘못된 액션입니다: {action}")
-            
-        # 웹훅에서 받은 티커와 전략 정보
-        symbol = data.get('symbol', 'XRP-USDT')
-        strategy = data.get('strategy', 'PREMIUM')
+        logger.info(f"🎯 웹훅 신호: 심볼={symbol}, 전략={strategy}, 액션={action}")
         
-        # 심볼 변환 로직 추가
-        if symbol.endswith('.P'):
-            # XRPUSDT.P -> XRP-USDT 변환
-            symbol = symbol.replace('.P', '').replace('USDT', '-USDT')
+        # 신호 원장 기록 (세션별 주문은 이 signal_id로 연결)
+        signal = {'signal_id': uuid.uuid4().hex, 'received_at': received_at}
+        ledger_service.record_signal(signal, symbol, strategy, action, data)
         
-        logger.info(f"🎯 웹훅 신호: 심볼={symbol}, 전략={strategy}, 액션={action}")
+        # 알림 시각 기준 수신 지연 기록과 진입 신호 지연 보호 설정
+        ingest_delay_ms = _apply_signal_guard(signal, data, action, received_at)
+        if ingest_delay_ms is not None:
+            trace.add('ingest', received_at - ingest_delay_ms / 1000, ingest_delay_ms)
+        stale = signal.get('deadline') is not None and received_at > signal['deadline']
+        if stale:
+            # 수신 시점에 이미 예산을 넘긴 진입 신호도 세션에 분배 (반대 포지션 종료는 실행, 새 진입만 스킵)
+            logger.warning(f"⏰ 늦게 도착한 신호 - 반대 포지션 종료만 실행 (수신 지연 {ingest_delay_ms:.0f}ms)")
+            webhook_signals.inc(outcome='stale')
         
         # 모든 세션 조회 (웹훅은 모든 세션에 대해 처리)
-        all_sessions = sqlite_session_service.get_all_sessions()
+        with trace.span('load_sessions'):
+            all_sessions = sqlite_session_service.get_all_sessions()
+        traffic_recorder.record_sessions(all_sessions)
         logger.info(f"📊 전체 세션 수: {len(all_sessions)}")
         
         if not all_sessions:
             logger.info("⚠️ 세션이 없습니다.")
+            webhook_signals.inc(outcome='processed')
+            webhook_fanout.observe(0)
             return {
                 "success": True,
                 "message": "세션이 없습니다.",
@@ -191,54 +521,91 @@ async def handle_webhook(request: Request) -> dict[str, Any]:
         
         # 각 세션에 대해 웹훅 신호 처리
         processed_sessions = []
+        # 샤드 모드에서 워커 프로세스로 보낼 작업
+        dispatch_jobs = []
+        # 다른 워커가 계정을 처리 중이라 나중에 리스를 기다려 실행할 세션
+        deferred = []
+        # 매매 실행으로 넘긴 세션 수 (다음 세션의 팬아웃 순서)
+        served = 0
+        # 세션 라우팅(설정 변환, 지표 확인, 계정 리스, 심볼 갱신)에 쓴 시간 합계
+        routing_started_at = time.time()
+        routing_ms = 0.0
         for session in all_sessions:
             session_id = session['session_id']
+            route_started = time.perf_counter()
             
             try:
                 # 세션별 설정
-                user_settings = {
-                    'apiKey': session['api_key'],
-                    'secretKey': session['secret_key'],
-                    'exchangeType': session['exchange_type'],
-                    'investment': session['investment'],
-                    'leverage': session['leverage'],
-                    'takeProfit': session['take_profit'],
-                    'stopLoss': session['stop_loss'],
-                    'indicator': session['indicator'],
-                    'isAutoTradingEnabled': session['is_auto_trading_enabled']
-                }
-                
-                # API 키가 설정되지 않은 경우 스킵
-                if not user_settings.get('apiKey') or not user_settings.get('secretKey'):
-                    logger.info(f"⚠️ 세션 {session_id}: API 키가 설정되지 않음 - 스킵")
+                user_settings = _build_user_settings(session)
+                if not _should_trade(session_id, user_settings, strategy):
+                    routing_ms += (time.perf_counter() - route_started) * 1000
                     continue
                 
-                # 자동매매가 비활성화된 경우 스킵
-                if not user_settings.get('isAutoTradingEnabled', False):
-                    logger.info(f"⚠️ 세션 {session_id}: 자동매매가 비활성화됨 - 스킵")
+                # 같은 계정을 다른 워커가 매매 중이면 다른 세션을 먼저 처리하고 나중에 리스를 기다림
+                account_key = coordination_service.make_account_key(
+                    user_settings['apiKey'], user_settings['exchangeType']
+                )
+                lease_token = coordination_service.acquire_lease(account_key)
+                if not lease_token:
+                    routing_ms += (time.perf_counter() - route_started) * 1000
+                    session_logger.info(f"⏳ 세션 {session_id}: 다른 워커가 계정을 처리 중 - 리스 대기로 미룸")
+                    deferred.append((session, user_settings, account_key))
                     continue
                 
-                # 사용자가 선택한 지표와 웹훅 전략이 일치하는지 확인
-                selected_indicator = user_settings.get('indicator', 'PREMIUM')
+                job = _build_job(session, symbol, user_settings, account_key, lease_token, served)
+                served += 1
+                routing_ms += (time.perf_counter() - route_started) * 1000
                 
-                if strategy != selected_indicator:
-                    logger.info(f"⚠️ 세션 {session_id} 지표 불일치: 웹훅 전략({strategy}) != 선택된 지표({selected_indicator}) - 스킵")
+                # 샤드 모드: 계정 기준으로 워커 프로세스에 위임
+                if shard_dispatcher.enabled:
+                    dispatch_jobs.append(job)
                     continue
                 
-                logger.info(f"✅ 세션 {session_id} 지표 일치: {strategy} == {selected_indicator} - 매매 실행")
-                
-                # SQLite에 현재 거래 심볼 업데이트
-                sqlite_session_service.update_session_status(session_id, True, symbol)
-                
-
-                
                 # 매매 실행
-                result = await execute_trade_for_session(session_id, symbol, action, user_settings)
+                processed_sessions.append(await _execute_job(symbol, action, job, signal))
+                
+            except Exception as e:
+                logger.error(f"❌ 세션 {session_id} 처리 중 오류: {str(e)}")
                 processed_sessions.append({
                     'session_id': session_id,
-                    'result': result
+                    'result': {'success': False, 'error': str(e)}
                 })
-                
+        
+        trace.add('routing', routing_started_at, routing_ms)
+        
+        if dispatch_jobs:
+            logger.info(f"🔀 샤드 워커로 {len(dispatch_jobs)}개 세션 분배")
+            pending = set()
+            try:
+                with trace.span('dispatch'):
+                    dispatched = await shard_dispatcher.dispatch(symbol, action, dispatch_jobs, signal=signal)
+                processed_sessions.extend(dispatched)
+                pending = {item['session_id'] for item in dispatched if item['result'].get('pending')}
+            finally:
+                for job in dispatch_jobs:
+                    # 결과 미확인 계정은 워커가 아직 주문 중일 수 있으므로 리스를 TTL 만료까지 유지
+                    if job['session_id'] not in pending:
+                        coordination_service.release_lease(job['account_key'], job['lease_token'])
+                    account_stream_hub.notify_changed(job['user_settings']['apiKey'], job['user_settings']['exchangeType'])
+        
+        # 미룬 세션: 리스 TTL 동안 재시도해 얻으면 실행, 끝내 못 얻으면 매매 누락으로 오류 기록
+        for session, user_settings, account_key in deferred:
+            session_id = session['session_id']
+            try:
+                lease_token = await coordination_service.wait_for_lease(account_key)
+                if not lease_token:
+                    logger.error(
+                        f"❌ 세션 {session_id}: 계정 리스를 {settings.execution_lease_ttl_seconds:.0f}초 동안 얻지 못해 "
+                        f"신호 {signal['signal_id']} 매매를 건너뜀 ({symbol} {action})"
+                    )
+                    processed_sessions.append({
+                        'session_id': session_id,
+                        'result': _skip_result('account_busy', '다른 워커가 계정을 처리 중이라 매매하지 않았습니다.')
+                    })
+                    continue
+                job = _build_job(session, symbol, user_settings, account_key, lease_token, served)
+                served += 1
+                processed_sessions.append(await _execute_job(symbol, action, job, signal))
             except Exception as e:
                 logger.error(f"❌ 세션 {session_id} 처리 중 오류: {str(e)}")
                 processed_sessions.append({
@@ -246,27 +613,178 @@ async def handle_webhook(request: Request) -> dict[str, Any]:
                     'result': {'success': False, 'error': str(e)}
                 })
         
-        logger.info(f"📈 웹훅 처리 완료: {len(processed_sessions)}개 세션 처리됨")
+        ledger_service.complete_signal(signal['signal_id'], len(processed_sessions))
+        webhook_signals.inc(outcome='processed')
+        webhook_fanout.observe(len(processed_sessions))
+        
+        # 단계별 지연시간 집계 (세션 구간은 샤드 워커에서 기록된 것 포함)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        trace.add('webhook', received_at, elapsed_ms)
+        logger.info(
+            f"📈 웹훅 처리 완료: {len(processed_sessions)}개 세션 처리됨",
+            extra={'fields': {
+                'signal_id': signal['signal_id'], 'symbol': symbol, 'strategy': strategy, 'action': action,
+                'sessions': len(processed_sessions), 'elapsed_ms': round(elapsed_ms, 3),
+                'ingest_delay_ms': round(ingest_delay_ms, 3) if ingest_delay_ms is not None else None
+            }}
+        )
+        latency_tracer.record(trace.to_dict())
+        for item in processed_sessions:
+            session_trace = item.get('result', {}).get('trace')
+            if session_trace:
+                latency_tracer.record(session_trace)
         
         return {
             "success": True,
             "message": f"웹훅 신호가 {len(processed_sessions)}개 세션에서 처리되었습니다.",
             "data": {
+                "signal_id": signal['signal_id'],
                 "symbol": symbol,
                 "strategy": strategy,
                 "action": action,
-                "processed_sessions": processed_sessions
+                "processed_sessions": processed_sessions,
+                "stale": stale,
+                "ingest_delay_ms": round(ingest_delay_ms, 3) if ingest_delay_ms is not None else None,
+                "trace": trace.to_dict()
             }
         }
         
     except Exception as e:
         logger.error(f"웹훅 처리 중 오류: {str(e)}")
+        webhook_signals.inc(outcome='failed')
         return {
             "success": False,
             "message": f"웹훅 처리 중 오류 발생: {str(e)}",
             "data": None
         }
 
+async def _plan_price(symbol: str, override: Optional[float]) -> tuple:
+    """드라이런 현재가 (요청값 → 거래소 현재가 1회 조회 → 캔들 저장소 마지막 종가). (가격, 출처) 반환"""
+    if override is not None:
+        return override, 'request'
+    try:
+        ticker = await bingx_client.get_ticker(symbol)
+        return float(ticker['data']['price']), 'exchange'
+    except Exception as e:
+        logger.warning(f"⚠️ 드라이런 현재가 조회 실패, 캔들 저장소 사용: {str(e)}")
+    closes = (await asyncio.to_thread(candle_store.read, symbol, '1m'))['close']
+    if len(closes):
+        return float(closes[-1]), 'candle_store'
+    raise HTTPException(status_code=400, detail=f"{symbol} 현재가를 구할 수 없습니다. price를 지정해주세요.")
+
+def _duration_summary(durations_ms: list) -> dict:
+    ordered = sorted(durations_ms)
+    if not ordered:
+        return {"count": 0, "total": 0.0, "avg": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    return {
+        "count": len(ordered),
+        "total": round(sum(ordered), 3),
+        "avg": round(sum(ordered) / len(ordered), 3),
+        "p50": round(ordered[int(0.5 * (len(ordered) - 1))], 3),
+        "p95": round(ordered[int(0.95 * (len(ordered) - 1))], 3),
+        "max": round(ordered[-1], 3)
+    }
+
+@router.post("/webhook/plan")
+async def plan_webhook(request: Request) -> dict[str, Any]:
+    """드라이런(plan) 모드: 웹훅 신호를 실제 주문 없이 실행해 세션별 주문 계획과 단계별 소요 시간 반환
+
+    세션 라우팅, 수량 계산, 반대 포지션 전환, 익절/손절 계산은 실제 웹훅과 같은 코드를 사용합니다.
+    현재가는 요청의 price(없으면 1회 조회한 값)를 모든 세션이 공유하고, 포지션은 세션별 최근 자산 스냅샷을
+    사용합니다. 주문/레버리지 설정, 세션 갱신, 원장 기록, 신호 중복 선점은 하지 않습니다.
+    """
+    started = time.perf_counter()
+    timings = {}
+
+    try:
+        body = await request.body()
+        data = json.loads(body.decode('utf-8'))
+        try:
+            action, symbol, strategy = _parse_signal(data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        price_override = None
+        if data.get('price') not in (None, ''):
+            price_override = _parse_bar_price(data['price'])
+            if price_override is None:
+                raise HTTPException(status_code=400, detail=f"price는 양수인 숫자여야 합니다: {data['price']}")
+        timings['parse_ms'] = round((time.perf_counter() - started) * 1000, 3)
+
+        # 세션 라우팅 (실제 웹훅과 같은 조건)
+        stage_started = time.perf_counter()
+        routed = []
+        for session in sqlite_session_service.get_all_sessions():
+            user_settings = _build_user_settings(session)
+            if _should_trade(session['session_id'], user_settings, strategy):
+                routed.append((session['session_id'], user_settings))
+        timings['routing_ms'] = round((time.perf_counter() - stage_started) * 1000, 3)
+
+        stage_started = time.perf_counter()
+        price, price_source = await _plan_price(symbol, price_override)
+        timings['price_ms'] = round((time.perf_counter() - stage_started) * 1000, 3)
+
+        stage_started = time.perf_counter()
+        snapshots = equity_snapshot_service.get_latest_snapshots([session_id for session_id, _ in routed])
+        timings['positions_ms'] = round((time.perf_counter() - stage_started) * 1000, 3)
+
+        # 세션별 매매 로직 실행 (주문은 PlanClient에 기록만 됨)
+        plans = []
+        durations = []
+        now = time.time()
+        for session_id, user_settings in routed:
+            snapshot = snapshots.get(session_id)
+            plan_client = PlanClient({symbol: price}, positions_from_snapshot(snapshot))
+            plan_trading_service = TradingService(plan_client, record_orders=True)
+
+            session_started = time.perf_counter()
+            result = await _execute_session_trade(
+                session_id, symbol, action, user_settings, plan_client, plan_trading_service
+            )
+            elapsed_ms = (time.perf_counter() - session_started) * 1000
+            durations.append(elapsed_ms)
+
+            plans.append({
+                'session_id': session_id,
+                'exchange_type': user_settings['exchangeType'],
+                'success': result.get('success', True),
+                'message': result.get('message'),
+                'positions_source': 'snapshot' if snapshot else 'none',
+                'snapshot_age_seconds': round(now - snapshot['ts'], 3) if snapshot else None,
+                'leverage': [call for call in plan_client.calls if call['type'] == 'set_leverage'],
+                'orders': [
+                    {
+                        'kind': 'reverse_close' if order['kind'] == 'close' and action != 'CLOSE' else order['kind'],
+                        **order['params']
+                    }
+                    for order in plan_trading_service.orders
+                ],
+                'elapsed_ms': round(elapsed_ms, 3)
+            })
+        timings['execute_ms'] = _duration_summary(durations)
+        timings['total_ms'] = round((time.perf_counter() - started) * 1000, 3)
+
+        logger.info(f"🧪 드라이런 완료: {symbol} {action} {len(plans)}개 세션, {timings['total_ms']}ms")
+        return {
+            "success": True,
+            "message": f"드라이런: {len(plans)}개 세션의 주문 계획",
+            "data": {
+                "symbol": symbol,
+                "strategy": strategy,
+                "action": action,
+                "price": price,
+                "price_source": price_source,
+                "order_count": sum(len(plan['orders']) for plan in plans),
+                "plans": plans,
+                "timings": timings
+            }
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"드라이런 처리 중 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"드라이런 처리 중 오류 발생: {str(e)}")
+
 @router.get("/current-symbol/{session_id}")
 async def get_current_symbol(session_id: str) -> dict[str, str]:
     """세션별 현재 거래 중인 티커 정보 반환"""
@@ -416,8 +934,17 @@ async def close_position(request: Request) -> dict[str, Any]:
         if not session_id:
             raise HTTPException(status_code=400, detail="세션 ID가 필요합니다.")
         
-        # 세션별 설정 가져오기
+        # 세션별 설정 가져오기 (다른 워커에서 저장된 세션은 SQLite에서 조회)
         user_settings = session_settings.get(session_id, {})
+        if not user_settings.get('apiKey'):
+            db_session = sqlite_session_service.get_session(session_id)
+            if db_session:
+                user_settings = {
+                    'apiKey': db_session['api_key'],
+                    'secretKey': db_session['secret_key'],
+                    'exchangeType': db_session['exchange_type'],
+                    'leverage': db_session['leverage']
+                }
         
         # API 키가 설정되지 않은 경우 오류 반환
         if not user_settings.get('apiKey') or not user_settings.get('secretKey'):
@@ -426,7 +953,8 @@ async def close_position(request: Request) -> dict[str, Any]:
         # BingX 클라이언트에 API 키 설정
         bingx_client.set_credentials(
             api_key=user_settings['apiKey'],
-            secret_key=user_settings['secretKey']
+            secret_key=user_settings['secretKey'],
+            exchange_type=user_settings.get('exchangeType', 'demo')
         )
         
 
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -8,6 +9,23 @@ class Settings(BaseSettings):
     bingx_secret_key: str = ""
     bingx_url: str = "https://open-api-vst.bingx.com"
 
+    # 모의 거래소 설정 (exchange_type="paper")
+    # paper_exchange_url이 비어 있으면 프로세스 내부 모의 거래소, 있으면 해당 HTTP 모의 거래소 사용
+    paper_exchange_url: str = ""
+    paper_initial_balance: float = 10000.0
+    paper_initial_price: float = 100.0
+    paper_price_volatility_per_second: float = 0.0005
+    # 기록된 틱 CSV (timestamp,symbol,price), 없으면 합성 가격
+    paper_ticks_path: str = ""
+    paper_latency_ms: float = 20.0
+    paper_latency_jitter_ms: float = 10.0
+    paper_error_rate: float = 0.0
+    paper_slippage_bps: float = 1.0
+    paper_taker_fee_rate: float = 0.0005
+    paper_seed: Optional[int] = None
+    # 계정별로 보관하는 최근 체결/주문 조회 기록 수 (오래된 것부터 버림)
+    paper_max_fills_per_account: int = 1000
+
     # MongoDB 설정
     mongo_uri: str = "mongodb://localhost:27017"
     database_name: str = "tv_auto"
@@ -16,6 +34,108 @@ class Settings(BaseSettings):
     app_name: str = "TradingView Auto Trading"
     app_version: str = "1.0.0"
     api_prefix: str = "/api"
+    # 관리자 API 토큰 (X-Admin-Token 헤더, 비어 있으면 관리자 API 비활성화)
+    admin_token: str = ""
+
+    # 계좌 잔고 캐시 TTL (같은 계정의 잔고 조회는 TTL 동안 한 번만 거래소 호출)
+    balance_cache_ttl_seconds: float = 5.0
+
+    # 잔고/포지션 푸시 스트림 설정 (갱신 간격은 잔고 캐시 TTL보다 짧아지지 않음)
+    stream_refresh_interval_seconds: float = 1.0
+    stream_subscriber_queue_size: int = 16
+
+    # 자산 스냅샷 백그라운드 폴러 설정
+    equity_poll_enabled: bool = True
+    equity_poll_interval_seconds: float = 60.0
+    equity_poll_max_requests_per_second: float = 5.0
+    equity_snapshot_batch_size: int = 50
+    # 자산 시계열 보관 기간 (일, 0이면 무기한)
+    equity_retention_raw_days: int = 7
+    equity_retention_1m_days: int = 30
+    equity_retention_1h_days: int = 365
+    equity_retention_1d_days: int = 0
+
+    # 신호/주문 원장 배치 기록 설정
+    ledger_batch_size: int = 200
+    ledger_flush_interval_seconds: float = 0.5
+    # 주문 응답에 체결가가 없으면 주문 조회로 보완 (첫 조회까지 대기 초, 조회 횟수, 0이면 끔)
+    ledger_fill_query_delay_seconds: float = 1.0
+    ledger_fill_query_attempts: int = 3
+
+    # 성과 분석 설정 (새 주문이 없으면 TTL 동안 결과 재사용)
+    analytics_cache_ttl_seconds: float = 60.0
+    analytics_max_buckets: int = 2000
+
+    # 캔들 저장소 설정
+    candle_store_dir: str = "candles"
+    # 백그라운드로 최신 상태를 유지할 심볼/간격 (쉼표 구분, 비우면 요청 시에만 갱신)
+    candle_store_symbols: str = ""
+    candle_store_intervals: str = "1m"
+    candle_update_interval_seconds: float = 300.0
+    candle_store_backfill_days: int = 30
+
+    # 백테스트 설정
+    backtest_max_configs: int = 20000
+    backtest_fee_rate: float = 0.0005
+    backtest_maintenance_margin_rate: float = 0.005
+
+    # 로그 설정 (큐 + 기록 스레드, json 또는 text)
+    log_format: str = "json"
+    log_level: str = "INFO"
+    log_file: str = ""
+    log_queue_size: int = 10000
+    # 카테고리(로거 이름 접두사)별 레벨, 예: "app.services.bingx.payload=DEBUG"
+    log_levels: str = ""
+    # 카테고리별 WARNING 미만 로그 샘플링 비율 (기본은 DEBUG 페이로드/상세 로그만 샘플링)
+    # 주문 실행 기록(app.api.webhook.trade 등 .trade 카테고리)은 설정과 관계없이 샘플링하지 않음
+    log_sample_rates: str = "app.api.webhook.payload=0.01,app.services.bingx.payload=0.01,app.services.trading.detail=0.1"
+
+    # 이벤트 루프 지연 측정 주기
+    loop_lag_interval_seconds: float = 0.25
+    # 루프가 이 시간 이상 멈추면 차단 코드 스택 캡처 (0이면 끔), 경고 로그 최소 간격, 보관 이벤트 수
+    loop_block_threshold_ms: float = 100.0
+    loop_block_log_interval_seconds: float = 10.0
+    loop_block_events_kept: int = 50
+    # 관리자 프로파일링 (요청 모드 최대 요청 수, 요청 대기/샘플링 최대 시간, 샘플링 기본 간격, 보관 결과 수)
+    profile_max_requests: int = 1000
+    profile_max_seconds: float = 300.0
+    profile_sample_interval_ms: float = 5.0
+    profile_artifacts_kept: int = 5
+    # /metrics 접근 토큰 (Authorization: Bearer, 비어 있으면 인증 없이 공개)
+    metrics_token: str = ""
+    # 지연시간 지표의 symbol 라벨로 쓸 심볼 (쉼표 구분, 비우면 candle_store_symbols).
+    # 목록에 없는 심볼은 other, 둘 다 비어 있으면 처음 본 metrics_max_symbols개만 라벨로 사용
+    metrics_symbols: str = ""
+    metrics_max_symbols: int = 20
+
+    # 트래픽 기록 (웹훅 신호/세션 설정/거래소 요청·응답 JSONL, 비어 있으면 끔)
+    traffic_record_path: str = ""
+    traffic_record_queue_size: int = 10000
+    # 거래소 응답 재생 모드 (기록 파일 경로, 비어 있으면 끔), 기록된 응답 지연에 적용할 속도 배율 (0이면 즉시)
+    exchange_replay_path: str = ""
+    exchange_replay_speed: float = 1.0
+
+    # SQLite 설정
+    sqlite_db_path: str = "sessions.db"
+    # SQLite 계측 설정 (느린 쿼리 기준, 잠금 대기 최대 시간)
+    db_slow_query_ms: float = 100.0
+    db_busy_timeout_seconds: float = 5.0
+
+    # 멀티 워커 조정 설정 (SQLite 기반 신호 선점/계정 리스)
+    signal_dedup_window_seconds: float = 5.0
+    execution_lease_ttl_seconds: float = 30.0
+
+    # 신호 지연 보호 (기본 꺼짐). 켜면 늦거나 가격이 벗어난 신호는 새 포지션 진입만 건너뛰고
+    # 반대 포지션 종료와 CLOSE 신호는 그대로 실행합니다.
+    # - SIGNAL_LATENCY_BUDGET_MS: 알림 시각(alert_time/timenow, 없으면 수신 시각)부터 진입 주문까지 허용 시간 (예: 10000)
+    # - SIGNAL_MAX_PRICE_DRIFT_BPS: 알림 가격(price) 대비 현재가 허용 괴리 (예: 50)
+    signal_latency_budget_ms: float = 0.0
+    signal_max_price_drift_bps: float = 0.0
+
+    # 웹훅 샤드 워커 설정 (0이면 웹훅 프로세스에서 직접 매매 실행)
+    webhook_shard_workers: int = 0
+    shard_socket_dir: str = "/tmp/next_auto_shards"
+    shard_request_timeout_seconds: float = 60.0
 
     class Config:
         env_file = ".env"
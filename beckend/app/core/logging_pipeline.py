@@ -0,0 +1,197 @@
+import re
+import sys
+import copy
+import json
+import queue
+import random
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+
+from app.core.config import get_settings
+from app.core.metrics import registry
+
+settings = get_settings()
+
+log_records = registry.counter(
+    "log_records_total", "Log records by outcome (queued, sampled_out, dropped)", ("outcome",)
+)
+
+# 값을 가릴 키 (구조화 필드, 메시지 안의 key=value / 'key': value)
+_SECRET_KEYS = ('api_key', 'apikey', 'secret_key', 'secretkey', 'secret', 'password', 'token',
+                'signature', 'x-bx-apikey', 'authorization', 'passphrase')
+_SECRET_PATTERN = re.compile(
+    r"""(?P<key>['"]?(?:%s)['"]?\s*[:=]\s*['"]?)(?P<value>[^'"\s,&}]+)""" % '|'.join(
+        re.escape(key) for key in sorted(_SECRET_KEYS, key=len, reverse=True)
+    ),
+    re.IGNORECASE
+)
+REDACTED = "***"
+
+
+def redact(text: str) -> str:
+    """문자열 안의 API 키/시크릿/서명/비밀번호 값을 가림"""
+    return _SECRET_PATTERN.sub(lambda match: match.group('key') + REDACTED, text)
+
+
+def redact_fields(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if str(key).lower() in _SECRET_KEYS else redact_fields(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact_fields(item) for item in value]
+    if isinstance(value, str):
+        return redact(value)
+    return value
+
+
+def _parse_mapping(spec: str) -> Dict[str, str]:
+    """'a.b=INFO,c=0.1' -> {'a.b': 'INFO', 'c': '0.1'}"""
+    mapping = {}
+    for item in spec.split(','):
+        if '=' in item:
+            name, value = item.split('=', 1)
+            mapping[name.strip()] = value.strip()
+    return mapping
+
+
+# 매매 실행 기록 로거 이름의 마지막 구간 (예: app.api.webhook.trade). 샘플링 설정과 관계없이 모두 기록
+TRADE_LOGGER_SUFFIX = ".trade"
+
+
+class SamplingFilter(logging.Filter):
+    """카테고리(로거 이름 접두사)별로 WARNING 미만 레코드를 확률 샘플링
+
+    로거 이름별 샘플링 비율은 처음 한 번만 계산해 캐시합니다.
+    매매 실행 기록(이름이 .trade로 끝나는 로거)은 샘플링하지 않습니다.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            if name.endswith(TRADE_LOGGER_SUFFIX):
+                self._resolved[name] = rate
+                return rate
+            matched = -1
+            for prefix, prefix_rate in self.rates.items():
+                if (name == prefix or name.startswith(prefix + '.')) and len(prefix) > matched:
+                    rate, matched = prefix_rate, len(prefix)
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        log_records.inc(outcome='sampled_out')
+        return False
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """호출한 쪽(이벤트 루프)에서는 메시지 병합만 하고 큐에 넣음. 큐가 가득 차면 기다리지 않고 버림"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # 트레이스백 객체는 스레드를 넘기지 않고 여기서 문자열로 변환
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+            log_records.inc(outcome='queued')
+        except queue.Full:
+            log_records.inc(outcome='dropped')
+
+
+class StructuredFormatter(logging.Formatter):
+    """JSON 한 줄(json) 또는 사람이 읽는 형식(text)으로 변환하고 비밀 값을 가림
+
+    logger.info("...", extra={'fields': {...}})로 넘긴 필드는 json에서 최상위 키로 들어갑니다.
+    """
+
+    def __init__(self, output: str = "json"):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        self.output = output
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, 'fields', None)
+        if self.output != "json":
+            text = super().format(record)
+            if fields:
+                text += " " + json.dumps(fields, ensure_ascii=False, default=str)
+            return redact(text)
+
+        entry: Dict[str, Any] = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': redact(record.getMessage()),
+        }
+        if fields:
+            entry.update(redact_fields(fields))
+        if record.exc_text:
+            entry['exc'] = redact(record.exc_text)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging() -> None:
+    """루트 로거를 큐 기반 비동기 파이프라인으로 구성 (프로세스당 한 번)
+
+    로그 파일/콘솔 쓰기와 JSON 변환/비밀 값 가리기는 별도 기록 스레드에서 합니다.
+    카테고리별 레벨(log_levels)은 로거에 직접 설정하므로 꺼진 레벨은 비용 없이 걸러집니다.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    if settings.log_file:
+        output_handler: logging.Handler = logging.FileHandler(settings.log_file, encoding='utf-8')
+    else:
+        output_handler = logging.StreamHandler(sys.stderr)
+    output_handler.setFormatter(StructuredFormatter(settings.log_format))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.log_queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(
+        {name: float(rate) for name, rate in _parse_mapping(settings.log_sample_rates).items()}
+    ))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(settings.log_level.upper())
+    for name, level in _parse_mapping(settings.log_levels).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, output_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """남은 로그를 모두 쓰고 기록 스레드 종료"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,236 @@
+import bisect
+import threading
+from typing import Dict, Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+# 기본 지연시간 버킷 (밀리초)
+DEFAULT_LATENCY_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """고정 버킷 히스토그램 (관측값 저장 없이 분포와 근사 백분위 제공)"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, q: float) -> float:
+        """q(0~100) 백분위의 근사값 (해당 버킷의 상한, 마지막 버킷은 최대값)"""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = q / 100 * self.count
+            cumulative = 0
+            for index, bucket_count in enumerate(self.counts):
+                cumulative += bucket_count
+                if cumulative >= rank and bucket_count:
+                    if index < len(self.buckets):
+                        return min(self.buckets[index], self.max)
+                    return self.max
+            return self.max
+
+    def raw(self) -> Tuple[Tuple[float, ...], List[int], int, float]:
+        """(버킷 상한, 버킷별 횟수, 전체 횟수, 합계) 일관된 사본"""
+        with self._lock:
+            return self.buckets, list(self.counts), self.count, self.sum
+
+    def snapshot(self) -> Dict[str, Any]:
+        """요약 통계 (횟수, 평균, p50/p95/p99, 최대, 버킷별 횟수)"""
+        with self._lock:
+            count, total, maximum = self.count, self.sum, self.max
+            counts = list(self.counts)
+        return {
+            "count": count,
+            "avg": round(total / count, 3) if count else 0.0,
+            "p50": round(self.percentile(50), 3),
+            "p95": round(self.percentile(95), 3),
+            "p99": round(self.percentile(99), 3),
+            "max": round(maximum, 3),
+            "buckets": {
+                **{f"le_{bound}": bucket_count for bound, bucket_count in zip(self.buckets, counts)},
+                "le_inf": counts[-1],
+            },
+        }
+
+
+# 개수 분포용 버킷 (신호당 세션 수 등)
+DEFAULT_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# 렌더링용 샘플: (라벨, 값) 또는 (라벨, Histogram)
+Sample = Tuple[Dict[str, str], Any]
+
+
+class _Metric:
+    """라벨 조합별 값을 가지는 지표 (라벨 값 튜플 -> 값)"""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        return [(dict(zip(self.labelnames, key)), value) for key, value in items]
+
+
+class Counter(_Metric):
+    """단조 증가 카운터"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """현재 값 지표"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class LabeledHistogram(_Metric):
+    """라벨 조합별 Histogram"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def get(self, **labels: Any) -> Histogram:
+        key = self._key(labels)
+        with self._lock:
+            histogram = self._values.get(key)
+            if histogram is None:
+                histogram = self._values[key] = Histogram(self.buckets)
+        return histogram
+
+    def observe(self, value: float, **labels: Any) -> None:
+        self.get(**labels).observe(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in labels.items()]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_family(name: str, kind: str, help_text: str, samples: Iterable[Sample]) -> List[str]:
+    """지표 하나를 Prometheus 텍스트 형식 줄 목록으로 변환 (히스토그램 버킷은 누적)"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        if kind == "histogram":
+            buckets, counts, count, total = value.raw()
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(round(total, 6))}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        else:
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return lines
+
+
+# 수집 시점에 지표를 만드는 함수: [(이름, 종류, 설명, 샘플 목록), ...]
+Collector = Callable[[], Iterable[Tuple[str, str, str, Iterable[Sample]]]]
+
+
+class MetricsRegistry:
+    """프로세스 내 지표 등록소
+
+    기록 경로에서는 락 한 번과 dict 갱신만 하고, 텍스트 변환은 수집(/metrics) 시점에만 합니다.
+    다른 서비스의 기존 통계(쿼리 통계 등)는 collector로 등록해 수집 시점에 읽습니다.
+    """
+
+    def __init__(self, prefix: str = "next_auto_"):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(self.prefix + name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS) -> LabeledHistogram:
+        return self._register(LabeledHistogram, name, help_text, labelnames, buckets)
+
+    def register_collector(self, collector: Collector) -> None:
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def render(self) -> str:
+        """등록된 모든 지표를 Prometheus 텍스트 형식(0.0.4)으로 변환"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+            collectors = list(self._collectors)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(render_family(metric.name, metric.kind, metric.help, metric.samples()))
+        for collector in collectors:
+            for name, kind, help_text, samples in collector():
+                lines.extend(render_family(self.prefix + name, kind, help_text, samples))
+        return '\n'.join(lines) + '\n'
+
+# 전역 지표 등록소
+registry = MetricsRegistry()
+
+# 캐시별 조회 결과 (hit/miss), 적중률은 수집 시점에 계산
+cache_requests = registry.counter("cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
@@ -0,0 +1,15 @@
+import hmac
+from fastapi import HTTPException, Request
+
+from app.core.config import get_settings
+
+
+async def require_admin(request: Request) -> None:
+    """관리자 API 접근 검증 (X-Admin-Token 헤더)"""
+    admin_token = get_settings().admin_token
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="관리자 API가 비활성화되어 있습니다.")
+
+    provided = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(provided.encode('utf-8'), admin_token.encode('utf-8')):
+        raise HTTPException(status_code=401, detail="관리자 토큰이 올바르지 않습니다.")
@@ -1,20 +1,232 @@
+import re
 import sqlite3
 import os
+import time
 import logging
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Dict, Any, Callable, List, Tuple
+
+from app.core.config import get_settings
+from app.core.metrics import Histogram
 
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+@lru_cache(maxsize=1024)
+def query_shape(sql: str) -> str:
+    """SQL 문을 쿼리 형태로 정규화 (공백 정리, 리터럴 -> ?)"""
+    return _LITERAL_RE.sub("?", _WHITESPACE_RE.sub(" ", sql).strip())[:200]
+
+# SQLite 자체 대기(busy_timeout) 후에도 잠금 오류가 나면 즉시 다시 시도하는 최대 횟수
+# (BUSY_SNAPSHOT처럼 대기 없이 바로 반환되는 오류는 다시 실행하면 새 스냅샷으로 성공)
+BUSY_RETRY_LIMIT = 3
+
+def _is_busy_error(error: sqlite3.OperationalError) -> bool:
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        # 확장 코드(BUSY_RECOVERY 261, LOCKED_SHAREDCACHE 262, BUSY_SNAPSHOT 517 등)는 하위 8비트가 기본 코드
+        return (code & 0xff) in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return 'locked' in str(error) or 'busy' in str(error)
+
+
+class QueryStats:
+    """쿼리 형태별 지연시간/행 수/잠금 대기/SQLITE_BUSY 재시도 집계"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._shapes: Dict[str, Dict[str, Any]] = {}
+
+    def _entry(self, shape: str) -> Dict[str, Any]:
+        entry = self._shapes.get(shape)
+        if entry is None:
+            entry = {
+                'latency_ms': Histogram(),
+                'calls': 0,
+                'errors': 0,
+                'rows': 0,
+                'fetch_ms': 0.0,
+                'lock_wait_ms': 0.0,
+                'busy_retries': 0,
+            }
+            self._shapes[shape] = entry
+        return entry
+
+    def record_execute(self, shape: str, elapsed_ms: float, lock_wait_ms: float,
+                       busy_retries: int, rows: int = 0, failed: bool = False) -> None:
+        with self._lock:
+            entry = self._entry(shape)
+            entry['calls'] += 1
+            entry['errors'] += int(failed)
+            entry['rows'] += max(rows, 0)
+            entry['lock_wait_ms'] += lock_wait_ms
+            entry['busy_retries'] += busy_retries
+        entry['latency_ms'].observe(elapsed_ms)
+
+    def record_fetch(self, shape: str, rows: int, elapsed_ms: float) -> None:
+        with self._lock:
+            entry = self._entry(shape)
+            entry['rows'] += rows
+            entry['fetch_ms'] += elapsed_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        """쿼리 형태별 집계 (총 소요시간 내림차순)"""
+        with self._lock:
+            items = list(self._shapes.items())
+
+        queries = []
+        for shape, entry in items:
+            latency = entry['latency_ms'].snapshot()
+            queries.append({
+                'query': shape,
+                'calls': entry['calls'],
+                'errors': entry['errors'],
+                'rows': entry['rows'],
+                'total_ms': round(latency['avg'] * latency['count'] + entry['fetch_ms'], 3),
+                'fetch_ms': round(entry['fetch_ms'], 3),
+                'lock_wait_ms': round(entry['lock_wait_ms'], 3),
+                'busy_retries': entry['busy_retries'],
+                'latency_ms': latency,
+            })
+        queries.sort(key=lambda query: query['total_ms'], reverse=True)
+
+        return {
+            'total_calls': sum(query['calls'] for query in queries),
+            'total_ms': round(sum(query['total_ms'] for query in queries), 3),
+            'total_lock_wait_ms': round(sum(query['lock_wait_ms'] for query in queries), 3),
+            'total_busy_retries': sum(query['busy_retries'] for query in queries),
+            'slow_query_threshold_ms': settings.db_slow_query_ms,
+            'queries': queries,
+        }
+
+    def histograms(self) -> List[Tuple[str, Histogram, int, float]]:
+        """쿼리 형태별 (형태, 지연시간 히스토그램, SQLITE_BUSY 재시도 수, 잠금 대기 ms)"""
+        with self._lock:
+            return [(shape, entry['latency_ms'], entry['busy_retries'], entry['lock_wait_ms'])
+                    for shape, entry in self._shapes.items()]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._shapes = {}
+
+# 전역 쿼리 통계
+query_stats = QueryStats()
+
+
+def _run_instrumented(shape: str, operation: Callable[[], Any], rowcount: Callable[[], int] = lambda: 0) -> Any:
+    """실행하고 소요시간/대기시간을 기록
+
+    잠금 대기는 연결의 busy_timeout(SQLite가 GIL을 놓고 대기)에 맡기고 파이썬에서 sleep하지 않습니다.
+    대기 후에도 잠금 오류가 나면 busy_timeout 안에서 BUSY_RETRY_LIMIT번까지 바로 다시 실행하며,
+    실패한 시도에 쓴 시간을 잠금 대기로 기록합니다.
+    """
+    start = time.perf_counter()
+    deadline = start + settings.db_busy_timeout_seconds
+    retries = 0
+    while True:
+        attempt_start = time.perf_counter()
+        try:
+            result = operation()
+            break
+        except sqlite3.OperationalError as e:
+            if not _is_busy_error(e) or retries >= BUSY_RETRY_LIMIT or time.perf_counter() >= deadline:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                query_stats.record_execute(shape, elapsed_ms, (attempt_start - start) * 1000, retries, failed=True)
+                raise
+            retries += 1
+
+    end = time.perf_counter()
+    elapsed_ms = (end - start) * 1000
+    lock_wait_ms = (attempt_start - start) * 1000
+    query_stats.record_execute(shape, elapsed_ms, lock_wait_ms, retries, rows=rowcount())
+
+    if elapsed_ms >= settings.db_slow_query_ms:
+        logger.warning(
+            f"🐢 느린 쿼리 {elapsed_ms:.1f}ms (잠금 대기 {lock_wait_ms:.1f}ms, 재시도 {retries}회): {shape}"
+        )
+    return result
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """실행/조회 시간을 query_stats에 기록하는 커서"""
+
+    _shape = "unknown"
+
+    def execute(self, sql, parameters=()):
+        self._shape = query_shape(sql)
+        _run_instrumented(
+            self._shape,
+            lambda: sqlite3.Cursor.execute(self, sql, parameters),
+            lambda: self.rowcount
+        )
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._shape = query_shape(sql)
+        # 잠금 재시도 때 같은 행을 다시 넣을 수 있도록 제너레이터/이터레이터는 목록으로 고정
+        if not isinstance(seq_of_parameters, (list, tuple)):
+            seq_of_parameters = list(seq_of_parameters)
+        _run_instrumented(
+            self._shape,
+            lambda: sqlite3.Cursor.executemany(self, sql, seq_of_parameters),
+            lambda: self.rowcount
+        )
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = sqlite3.Cursor.fetchone(self)
+        query_stats.record_fetch(self._shape, int(row is not None), (time.perf_counter() - start) * 1000)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = sqlite3.Cursor.fetchmany(self, self.arraysize if size is None else size)
+        query_stats.record_fetch(self._shape, len(rows), (time.perf_counter() - start) * 1000)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = sqlite3.Cursor.fetchall(self)
+        query_stats.record_fetch(self._shape, len(rows), (time.perf_counter() - start) * 1000)
+        return rows
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """모든 구문을 InstrumentedCursor로 실행하는 연결"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return sqlite3.Connection.cursor(self, factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        _run_instrumented("COMMIT", lambda: sqlite3.Connection.commit(self))
+
+
 class SQLiteDatabase:
     def __init__(self, db_path: str = "sessions.db"):
         """SQLite 데이터베이스 초기화"""
         self.db_path = db_path
+        self._watch_conn: Optional[sqlite3.Connection] = None
+        self._watch_lock = threading.Lock()
         self.init_database()
     
     def get_connection(self):
-        """데이터베이스 연결 반환"""
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        """데이터베이스 연결 반환 (잠금 대기는 SQLite busy_timeout으로 처리)"""
+        conn = sqlite3.connect(
+            self.db_path, timeout=settings.db_busy_timeout_seconds, check_same_thread=False,
+            factory=InstrumentedConnection
+        )
         conn.row_factory = sqlite3.Row  # 딕셔너리 형태로 결과 반환
         return conn
     
@@ -53,6 +265,23 @@ class SQLiteDatabase:
                     # 컬럼이 이미 존재하는 경우 무시
                     pass
                 
+                # 테이블 변경 버전 (트리거로 유지, 다른 프로세스의 변경도 감지하는 캐시 무효화용)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS table_versions (
+                        name TEXT PRIMARY KEY,
+                        version INTEGER NOT NULL DEFAULT 0
+                    )
+                ''')
+                cursor.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES ('user_sessions', 0)")
+                for event in ('INSERT', 'UPDATE', 'DELETE'):
+                    cursor.execute(f'''
+                        CREATE TRIGGER IF NOT EXISTS user_sessions_version_{event.lower()}
+                        AFTER {event} ON user_sessions
+                        BEGIN
+                            UPDATE table_versions SET version = version + 1 WHERE name = 'user_sessions';
+                        END
+                    ''')
+                
                 # 사용자 계정 테이블 생성
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS users (
@@ -63,10 +292,132 @@ class SQLiteDatabase:
                     )
                 ''')
                 
+                # 신호 선점 테이블 (여러 워커가 같은 웹훅을 중복 처리하지 않도록)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS signal_claims (
+                        signal_key TEXT PRIMARY KEY,
+                        owner TEXT NOT NULL,
+                        claimed_at REAL NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                ''')
+                
+                # 계정별 실행 리스 테이블 (한 계정은 한 번에 하나의 워커만 매매)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS execution_leases (
+                        account_key TEXT PRIMARY KEY,
+                        owner TEXT NOT NULL,
+                        acquired_at REAL NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                ''')
+                
+                # 자산 스냅샷 테이블 (백그라운드 폴러가 주기적으로 기록)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS equity_snapshots (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        session_id TEXT NOT NULL,
+                        ts REAL NOT NULL,
+                        total_balance REAL NOT NULL,
+                        available_balance REAL,
+                        unrealized_pnl REAL DEFAULT 0,
+                        equity REAL NOT NULL,
+                        position_count INTEGER DEFAULT 0,
+                        positions TEXT
+                    )
+                ''')
+                
+                # 자산 시계열 롤업 테이블 (1m/1h/1d 버킷별 OHLC)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS equity_rollups (
+                        session_id TEXT NOT NULL,
+                        resolution TEXT NOT NULL,
+                        bucket_ts INTEGER NOT NULL,
+                        open REAL NOT NULL,
+                        high REAL NOT NULL,
+                        low REAL NOT NULL,
+                        close REAL NOT NULL,
+                        unrealized_pnl REAL DEFAULT 0,
+                        samples INTEGER NOT NULL,
+                        first_ts REAL NOT NULL,
+                        last_ts REAL NOT NULL,
+                        PRIMARY KEY (session_id, resolution, bucket_ts)
+                    ) WITHOUT ROWID
+                ''')
+                
+                # 신호 원장 테이블
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS signals (
+                        signal_id TEXT PRIMARY KEY,
+                        received_at REAL NOT NULL,
+                        symbol TEXT NOT NULL,
+                        strategy TEXT,
+                        action TEXT NOT NULL,
+                        raw_payload TEXT,
+                        session_count INTEGER,
+                        completed_at REAL
+                    )
+                ''')
+                
+                # 주문/체결 원장 테이블 (신호별 세션 주문)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS trades (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        signal_id TEXT,
+                        session_id TEXT NOT NULL,
+                        exchange_type TEXT,
+                        symbol TEXT NOT NULL,
+                        action TEXT NOT NULL,
+                        order_kind TEXT NOT NULL,
+                        side TEXT,
+                        position_side TEXT,
+                        quantity REAL,
+                        status TEXT NOT NULL,
+                        exchange_order_id TEXT,
+                        fill_price REAL,
+                        error TEXT,
+                        signal_received_at REAL,
+                        requested_at REAL,
+                        acked_at REAL,
+                        order_latency_ms REAL,
+                        signal_latency_ms REAL,
+                        signal_price REAL,
+                        sizing_price REAL,
+                        sized_at REAL,
+                        filled_at REAL,
+                        fill_source TEXT,
+                        fanout_position INTEGER
+                    )
+                ''')
+                
+                # 체결 품질 컬럼이 없는 경우 추가 (신호 가격, 수량 계산 가격/시각, 체결 시각/출처, 팬아웃 순서)
+                for column, column_type in (
+                    ('signal_price', 'REAL'), ('sizing_price', 'REAL'), ('sized_at', 'REAL'),
+                    ('filled_at', 'REAL'), ('fill_source', 'TEXT'), ('fanout_position', 'INTEGER'),
+                ):
+                    try:
+                        cursor.execute(f'ALTER TABLE trades ADD COLUMN {column} {column_type}')
+                        logger.info(f"trades.{column} 컬럼 추가됨")
+                    except sqlite3.OperationalError:
+                        # 컬럼이 이미 존재하는 경우 무시
+                        pass
+                
                 # 인덱스 생성
                 cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_email ON user_sessions(user_email)')
                 cursor.execute('CREATE INDEX IF NOT EXISTS idx_exchange_type ON user_sessions(exchange_type)')
                 cursor.execute('CREATE INDEX IF NOT EXISTS idx_auto_trading ON user_sessions(is_auto_trading_enabled)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_created ON user_sessions(created_at, session_id)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_active_created ON user_sessions(is_auto_trading_enabled, created_at, session_id)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_equity_session_ts ON equity_snapshots(session_id, ts)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_equity_ts ON equity_snapshots(ts)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_equity_rollups_retention ON equity_rollups(resolution, bucket_ts)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_signals_received ON signals(received_at)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_signals_strategy_symbol ON signals(strategy, symbol, received_at)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_signal ON trades(signal_id)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_session_time ON trades(session_id, requested_at)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_symbol_time ON trades(symbol, requested_at)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_time ON trades(requested_at)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_signal_claims_expires ON signal_claims(expires_at)')
                 
                 conn.commit()
                 logger.info("SQLite 데이터베이스 초기화 완료")
@@ -74,6 +425,19 @@ class SQLiteDatabase:
         except Exception as e:
             logger.error(f"데이터베이스 초기화 오류: {str(e)}")
             raise
+    
+    def table_version(self, name: str) -> int:
+        """테이블 변경 버전 (트리거가 INSERT/UPDATE/DELETE마다 올림, 다른 프로세스의 변경 포함)
+        
+        다른 테이블의 쓰기로는 바뀌지 않습니다. 조회마다 연결을 만들지 않도록 읽기 전용 연결을 유지합니다.
+        """
+        with self._watch_lock:
+            if self._watch_conn is None:
+                self._watch_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            row = self._watch_conn.execute(
+                "SELECT version FROM table_versions WHERE name = ?", (name,)
+            ).fetchone()
+            return row[0] if row else 0
 
 # 전역 데이터베이스 인스턴스
-sqlite_db = SQLiteDatabase()
+sqlite_db = SQLiteDatabase(settings.sqlite_db_path)
@@ -0,0 +1,167 @@
+import re
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.metrics import Histogram
+
+settings = get_settings()
+
+# 신호 단위(세션 공통) 단계의 거래소 구분 라벨
+ALL_EXCHANGES = "all"
+
+# 허용되지 않은 심볼의 라벨
+OTHER_SYMBOL = "other"
+
+_SYMBOL_KEY_RE = re.compile(r'[^A-Z0-9]')
+
+
+class SymbolLabels:
+    """지표 라벨용 심볼 정규화
+
+    심볼은 웹훅 페이로드에서 오므로 그대로 라벨로 쓰면 히스토그램 수가 무한히 늘 수 있습니다.
+    허용 목록이 있으면 목록의 심볼만, 없으면 처음 본 max_symbols개만 그대로 쓰고 나머지는 other로 묶습니다.
+    (BTC-USDT, BTCUSDT처럼 구분자만 다른 심볼은 같은 심볼로 봄)
+    """
+
+    def __init__(self, allowed: Iterable[str] = (), max_symbols: int = 20):
+        self.allowed = {self._key(symbol): symbol.strip() for symbol in allowed if symbol.strip()}
+        self.max_symbols = max_symbols
+        self._lock = threading.Lock()
+        self._seen: Dict[str, str] = {}
+
+    @staticmethod
+    def _key(symbol: str) -> str:
+        return _SYMBOL_KEY_RE.sub('', symbol.upper())
+
+    def label(self, symbol: str) -> str:
+        if not symbol:
+            return symbol
+        key = self._key(symbol)
+        if self.allowed:
+            return self.allowed.get(key, OTHER_SYMBOL)
+        with self._lock:
+            label = self._seen.get(key)
+            if label is None:
+                if len(self._seen) >= self.max_symbols:
+                    return OTHER_SYMBOL
+                label = self._seen[key] = symbol
+            return label
+
+
+class Trace:
+    """신호 하나(또는 신호의 세션 하나)의 단계별 구간 기록
+
+    구간 시작 시각은 신호 수신 시각(origin, epoch 초) 기준 밀리초 오프셋으로 기록하므로
+    샤드 워커 프로세스에서 만든 구간도 같은 기준으로 비교할 수 있습니다.
+    """
+
+    def __init__(self, origin: float, exchange_type: str, symbol: str):
+        self.origin = origin
+        self.exchange_type = exchange_type
+        self.symbol = symbol
+        self.spans: List[Dict[str, Any]] = []
+
+    def add(self, stage: str, started_at: float, duration_ms: float, error: Optional[str] = None) -> None:
+        span = {
+            'stage': stage,
+            'start_ms': round((started_at - self.origin) * 1000, 3),
+            'duration_ms': round(duration_ms, 3),
+        }
+        if error is not None:
+            span['error'] = error
+        self.spans.append(span)
+
+    @contextmanager
+    def span(self, stage: str):
+        started_at = time.time()
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.add(stage, started_at, (time.perf_counter() - started) * 1000, error)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'exchange_type': self.exchange_type,
+            'symbol': self.symbol,
+            'spans': self.spans,
+        }
+
+
+# 현재 실행 중인 세션 매매의 트레이스 (거래소 클라이언트 호출 구간 기록용)
+_current_trace: ContextVar[Optional[Trace]] = ContextVar('current_trace', default=None)
+
+
+@contextmanager
+def activate(trace: Trace):
+    """블록 안의 span() 호출을 trace에 기록"""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(stage: str):
+    """현재 트레이스가 있으면 구간 기록 (없으면 아무것도 하지 않음)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    with trace.span(stage):
+        yield
+
+
+class LatencyTracer:
+    """단계 x 거래소 구분 x 심볼별 지연시간 히스토그램"""
+
+    def __init__(self, symbol_labels: Optional[SymbolLabels] = None):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str, str], Histogram] = {}
+        # 허용 심볼: metrics_symbols, 없으면 캔들 저장소 심볼
+        self.symbol_labels = symbol_labels or SymbolLabels(
+            (settings.metrics_symbols or settings.candle_store_symbols).split(','), settings.metrics_max_symbols
+        )
+
+    def observe(self, stage: str, exchange_type: str, symbol: str, duration_ms: float) -> None:
+        key = (stage, exchange_type, self.symbol_labels.label(symbol))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+        histogram.observe(duration_ms)
+
+    def record(self, trace: Dict[str, Any]) -> None:
+        """트레이스(to_dict 결과)의 모든 구간을 히스토그램에 반영"""
+        for item in trace.get('spans', []):
+            self.observe(item['stage'], trace['exchange_type'], trace['symbol'], item['duration_ms'])
+
+    def histograms(self) -> List[Tuple[Tuple[str, str, str], Histogram]]:
+        """((단계, 거래소 구분, 심볼), 히스토그램) 목록"""
+        with self._lock:
+            return list(self._histograms.items())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """단계별 -> 거래소 구분별 -> 심볼별 지연시간 요약"""
+        with self._lock:
+            items = sorted(self._histograms.items())
+        stages: Dict[str, Any] = {}
+        for (stage, exchange_type, symbol), histogram in items:
+            stages.setdefault(stage, {}).setdefault(exchange_type, {})[symbol] = histogram.snapshot()
+        return {'stages': stages}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms = {}
+
+# 전역 지연시간 집계
+latency_tracer = LatencyTracer()
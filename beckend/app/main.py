@@ -2,10 +2,21 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import get_settings
-from app.api import webhook, session, auth, test_trading
+from app.core.logging_pipeline import setup_logging, shutdown_logging
+from app.api import webhook, session, auth, test_trading, diagnostics, profit, dashboard, ledger, analytics, backtest, candles, metrics
+from app.services.shard_dispatcher import shard_dispatcher
+from app.services.equity_poller import equity_poller
+from app.services.ledger_service import ledger_service
+from app.services.candle_service import candle_updater
+from app.services.loop_monitor import loop_lag_monitor
+from app.services.traffic_recorder import traffic_recorder
+from app.services.traffic_replay import replay_exchange
 
 settings = get_settings()
 
+# 로그는 큐로 넘기고 별도 스레드에서 기록 (이벤트 루프에서 파일/콘솔 쓰기 없음)
+setup_logging()
+
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
@@ -33,6 +44,15 @@ app.include_router(webhook.router, prefix=settings.api_prefix, tags=["webhook"])
 app.include_router(session.router, prefix=settings.api_prefix, tags=["session"])
 app.include_router(auth.router, prefix=settings.api_prefix, tags=["auth"])
 app.include_router(test_trading.router, prefix=settings.api_prefix, tags=["test"])
+app.include_router(profit.router, prefix=settings.api_prefix, tags=["profit"])
+app.include_router(dashboard.router, prefix=settings.api_prefix, tags=["dashboard"])
+app.include_router(ledger.router, prefix=settings.api_prefix, tags=["ledger"])
+app.include_router(analytics.router, prefix=settings.api_prefix, tags=["analytics"])
+app.include_router(backtest.router, prefix=settings.api_prefix, tags=["backtest"])
+app.include_router(candles.router, prefix=settings.api_prefix, tags=["candles"])
+app.include_router(diagnostics.router, prefix=settings.api_prefix, tags=["diagnostics"])
+# Prometheus 수집 경로는 관례대로 /metrics
+app.include_router(metrics.router, tags=["metrics"])
 
 @app.on_event("startup")
 async def startup_event():
@@ -41,8 +61,26 @@ async def startup_event():
     print("성공007: FastAPI 서버가 정상적으로 시작되었습니다.")
     print("성공007: 포트 8000에서 서비스 중...")
     print("성공007: 계좌 잔고 조회 API 추가 완료")
+    
+    # 거래소 응답 재생 모드면 기록 파일을 미리 읽음
+    if replay_exchange.enabled:
+        replay_exchange.load()
+    
+    # 샤드 워커 모드가 설정된 경우 워커 프로세스 시작
+    await shard_dispatcher.start()
+    
+    # 활성 세션 자산 스냅샷 백그라운드 폴러 시작
+    equity_poller.start()
+    candle_updater.start()
+    loop_lag_monitor.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     # SQLite 연결은 자동으로 관리됩니다
-    pass
\ No newline at end of file
+    await equity_poller.stop()
+    await candle_updater.stop()
+    await loop_lag_monitor.stop()
+    ledger_service.flush()
+    traffic_recorder.flush()
+    await shard_dispatcher.stop()
+    shutdown_logging()
@@ -7,7 +7,7 @@ class UserSession(BaseModel):
     session_id: str
     api_key: str
     secret_key: str
-    exchange_type: str  # "demo" or "live"
+    exchange_type: str  # "demo", "live" or "paper"
     investment: float
     leverage: int
     take_profit: float
@@ -0,0 +1,127 @@
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Set
+from fastapi import HTTPException
+from app.core.config import get_settings
+from app.services.balance_service import balance_service
+from app.services.coordination_service import coordination_service
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+class _AccountFeed:
+    """계정 하나의 공유 갱신 작업과 구독자 큐"""
+
+    def __init__(self, account_key: str, api_key: str, secret_key: str, exchange_type: str):
+        self.account_key = account_key
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.exchange_type = exchange_type
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.last_event: Optional[Dict[str, Any]] = None
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.dropped_events = 0
+
+
+class AccountStreamHub:
+    """계정별 잔고/포지션/미실현손익을 한 번만 갱신해 모든 구독자에게 변경분만 전달하는 허브"""
+
+    def __init__(self, interval_seconds: Optional[float] = None, queue_size: Optional[int] = None):
+        interval_seconds = settings.stream_refresh_interval_seconds if interval_seconds is None else interval_seconds
+        # 잔고 캐시 TTL보다 자주 갱신하면 캐시를 우회해 거래소를 더 자주 호출하므로 TTL을 최소 간격으로 사용
+        # (주문 체결 등 상태 변경은 notify_changed로 즉시 갱신)
+        self.interval_seconds = max(interval_seconds, settings.balance_cache_ttl_seconds)
+        self.queue_size = settings.stream_subscriber_queue_size if queue_size is None else queue_size
+        self._feeds: Dict[str, _AccountFeed] = {}
+
+    def subscribe(self, api_key: str, secret_key: str, exchange_type: str) -> asyncio.Queue:
+        """구독 큐 반환. 계정의 첫 구독자면 갱신 작업을 시작"""
+        account_key = coordination_service.make_account_key(api_key, exchange_type)
+        feed = self._feeds.get(account_key)
+        if feed is None:
+            feed = _AccountFeed(account_key, api_key, secret_key, exchange_type)
+            self._feeds[account_key] = feed
+            feed.task = asyncio.create_task(self._refresh_loop(feed))
+            logger.info(f"📡 계정 스트림 갱신 시작 ({account_key[:12]})")
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        if feed.last_event is not None:
+            queue.put_nowait(feed.last_event)
+        feed.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, api_key: str, exchange_type: str, queue: asyncio.Queue) -> None:
+        """구독 해제. 마지막 구독자가 나가면 갱신 작업 중지"""
+        account_key = coordination_service.make_account_key(api_key, exchange_type)
+        feed = self._feeds.get(account_key)
+        if feed is None:
+            return
+        feed.subscribers.discard(queue)
+        if not feed.subscribers:
+            feed.task.cancel()
+            del self._feeds[account_key]
+            logger.info(f"📡 계정 스트림 갱신 종료 ({account_key[:12]})")
+
+    def notify_changed(self, api_key: str, exchange_type: str) -> None:
+        """주문 체결 등으로 계정 상태가 바뀌었을 때 다음 주기를 기다리지 않고 즉시 갱신"""
+        account_key = coordination_service.make_account_key(api_key, exchange_type)
+        balance_service.invalidate(api_key, exchange_type)
+        feed = self._feeds.get(account_key)
+        if feed is not None:
+            feed.wakeup.set()
+
+    def _publish(self, feed: _AccountFeed, event: Dict[str, Any]) -> None:
+        """모든 구독자에게 전달. 느린 구독자는 가장 오래된 이벤트를 버리고 최신 상태를 받음"""
+        feed.last_event = event
+        for queue in feed.subscribers:
+            if queue.full():
+                queue.get_nowait()
+                feed.dropped_events += 1
+            queue.put_nowait(event)
+
+    async def _fetch_state(self, feed: _AccountFeed) -> Dict[str, Any]:
+        return await balance_service.get_account_state(
+            feed.api_key, feed.secret_key, feed.exchange_type
+        )
+
+    async def _refresh_loop(self, feed: _AccountFeed) -> None:
+        last_state = None
+        last_error = None
+        delay = self.interval_seconds
+        while True:
+            # 조회 중에 온 notify_changed(체결 직후 등)를 놓치지 않도록 조회 전에 초기화
+            feed.wakeup.clear()
+            try:
+                state = await self._fetch_state(feed)
+                delay = self.interval_seconds
+                last_error = None
+                if state != last_state:
+                    last_state = state
+                    self._publish(feed, {"type": "snapshot", "updated_at": time.time(), **state})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                message = e.detail if isinstance(e, HTTPException) else str(e)
+                # 같은 오류는 한 번만 전달하고 재시도 간격을 늘림
+                if message != last_error:
+                    last_error = message
+                    self._publish(feed, {"type": "error", "updated_at": time.time(), "message": message})
+                delay = min(delay * 2, 30.0)
+
+            try:
+                await asyncio.wait_for(feed.wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "accounts": len(self._feeds),
+            "subscribers": sum(len(feed.subscribers) for feed in self._feeds.values()),
+            "dropped_events": sum(feed.dropped_events for feed in self._feeds.values()),
+        }
+
+# 전역 스트림 허브 인스턴스
+account_stream_hub = AccountStreamHub()
@@ -0,0 +1,432 @@
+import time
+import math
+import logging
+import threading
+import numpy as np
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from app.core.config import get_settings
+from app.core.sqlite_database import sqlite_db
+from app.core.metrics import cache_requests
+from app.services.equity_snapshot_service import ROLLUP_RESOLUTIONS
+from app.services.sqlite_session_service import sqlite_session_service
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+SECONDS_PER_YEAR = 365 * 86400
+
+# 청산 주문 종류 (진입 주문과 짝지어 실현손익 계산)
+CLOSE_KINDS = ('close', 'reverse_close')
+
+# 체결 품질 분포의 백분위
+EXECUTION_PERCENTILES = (50, 90, 99)
+
+# 팬아웃 순서 구간 (신호 하나에서 몇 번째로 실행된 세션인지, 0부터)
+FANOUT_BUCKETS = ((0, 0, '0'), (1, 9, '1-9'), (10, 99, '10-99'), (100, 999, '100-999'), (1000, None, '1000+'))
+
+
+def _group_sum(group: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    return np.bincount(group, weights=values, minlength=n_groups)[:n_groups]
+
+
+def _trade_metrics(trades: Dict[str, np.ndarray], group_of_session: np.ndarray, n_groups: int,
+                   start: float, end: float) -> Dict[str, np.ndarray]:
+    """진입/청산 주문을 짝지어 그룹별 실현손익, 승률, 손익비, 포지션 보유 비율 계산
+
+    trades 배열은 (세션, 심볼, 시각) 순으로 정렬되어 있어야 합니다.
+    청산 주문은 같은 세션/심볼에서 바로 앞 주문이 진입일 때만 그 진입가로 짝지으며, 짝지은 진입은 다시 쓰지 않습니다.
+    원장 밖(거래소 익절/손절 등)에서 청산되어 다음 진입이 바로 이어진 진입과, 짝이 없는 청산은
+    손익을 추정하지 않고 unmatched_opens/unmatched_closes로만 셉니다.
+    """
+    n = len(trades['session'])
+    empty = np.zeros(n_groups)
+    if n == 0:
+        return {'trade_count': empty, 'wins': empty, 'realized_pnl': empty, 'gross_profit': empty,
+                'gross_loss': empty, 'exposure': empty, 'unmatched_opens': empty, 'unmatched_closes': empty}
+
+    # 세션+심볼 단위 구간 키
+    lane = trades['session'] * (int(trades['symbol'].max()) + 1) + trades['symbol']
+    is_open = trades['is_open']
+    is_close = ~is_open
+    same_lane_prev = np.append(False, lane[1:] == lane[:-1])
+    same_lane_next = np.append(lane[1:] == lane[:-1], False)
+    prev_open = np.append(False, is_open[:-1])
+    next_open = np.append(is_open[1:], False)
+
+    # 청산은 같은 구간의 바로 앞 진입과만 짝지음 (진입 하나는 청산 하나에만 쓰임)
+    paired = is_close & same_lane_prev & prev_open
+    paired_rows = np.flatnonzero(paired)
+    direction = np.where(trades['position_side'] == 'SHORT', -1.0, 1.0)
+    entry = np.full(n, np.nan)
+    entry[paired_rows] = trades['fill_price'][paired_rows - 1]
+    pnl = (trades['fill_price'] - entry) * trades['quantity'] * direction
+    realized = paired & np.isfinite(pnl)
+
+    trade_group = group_of_session[trades['session'][realized]]
+    trade_pnl = pnl[realized]
+
+    # 원장에 청산이 없는데 다음 진입이 이어진 진입 (원장 밖에서 청산됨)
+    closed_outside = is_open & same_lane_next & next_open
+    unmatched_close = is_close & ~paired
+
+    # 포지션 보유 시간: 진입부터 같은 구간의 청산(없으면 구간 끝)까지. 원장 밖에서 청산된 진입은 시각을 모르므로 제외
+    next_time = np.where(same_lane_next, np.append(trades['time'][1:], end), end)
+    held = np.where(is_open & ~closed_outside, np.clip(next_time - trades['time'], 0, None), 0.0)
+    session_held = np.bincount(trades['session'], weights=held, minlength=len(group_of_session))
+    first_seen = np.full(len(group_of_session), end)
+    np.minimum.at(first_seen, trades['session'], trades['time'])
+    active = first_seen < end
+    session_exposure = np.zeros(len(group_of_session))
+    span = end - np.maximum(first_seen[active], start)
+    session_exposure[active] = np.clip(session_held[active] / np.maximum(span, 1.0), 0, 1)
+
+    # 그룹 노출도는 거래가 있었던 세션들의 평균
+    active_count = _group_sum(group_of_session[active], np.ones(active.sum()), n_groups)
+    exposure_sum = _group_sum(group_of_session[active], session_exposure[active], n_groups)
+    row_group = group_of_session[trades['session']]
+
+    return {
+        'trade_count': _group_sum(trade_group, np.ones(len(trade_pnl)), n_groups),
+        'wins': _group_sum(trade_group, (trade_pnl > 0).astype(float), n_groups),
+        'realized_pnl': _group_sum(trade_group, trade_pnl, n_groups),
+        'gross_profit': _group_sum(trade_group, np.clip(trade_pnl, 0, None), n_groups),
+        'gross_loss': _group_sum(trade_group, np.clip(-trade_pnl, 0, None), n_groups),
+        'exposure': np.divide(exposure_sum, active_count, out=np.zeros(n_groups), where=active_count > 0),
+        'unmatched_opens': _group_sum(row_group, closed_outside.astype(float), n_groups),
+        'unmatched_closes': _group_sum(row_group, unmatched_close.astype(float), n_groups),
+    }
+
+
+def _equity_metrics(equity: Dict[str, np.ndarray], group_of_session: np.ndarray, n_groups: int,
+                    periods_per_year: float) -> Dict[str, np.ndarray]:
+    """롤업 자산 시계열로 그룹별 누적손익, 최대낙폭, 샤프/소르티노 계산
+
+    equity 배열은 (세션, 버킷) 순으로 정렬되어 있어야 합니다. 버킷별 그룹 수익률은
+    (해당 버킷 자산 변화 합) / (직전 버킷 자산 합)으로, 중간에 추가/종료된 세션이 있어도
+    입출금처럼 보이지 않도록 양쪽 버킷에 모두 있는 세션만 사용합니다.
+    """
+    n = len(equity['session'])
+    nan = np.full(n_groups, np.nan)
+    if n < 2:
+        return {'cumulative_pnl': np.zeros(n_groups), 'max_drawdown': nan,
+                'sharpe': nan, 'sortino': nan, 'periods': np.zeros(n_groups)}
+
+    buckets, bucket_index = np.unique(equity['bucket'], return_inverse=True)
+    n_buckets = len(buckets)
+    continued = equity['session'][1:] == equity['session'][:-1]
+    rows = np.flatnonzero(continued) + 1
+    group = group_of_session[equity['session'][rows]]
+    cell = group * n_buckets + bucket_index[rows]
+    size = n_groups * n_buckets
+
+    delta = np.bincount(cell, weights=equity['close'][rows] - equity['close'][rows - 1], minlength=size)
+    base = np.bincount(cell, weights=equity['close'][rows - 1], minlength=size)
+    delta = delta.reshape(n_groups, n_buckets)
+    base = base.reshape(n_groups, n_buckets)
+    returns = np.divide(delta, base, out=np.full_like(delta, np.nan), where=base > 0)
+
+    valid = np.isfinite(returns)
+    periods = valid.sum(axis=1)
+    filled = np.where(valid, returns, 0.0)
+    mean = filled.sum(axis=1) / np.maximum(periods, 1)
+    variance = np.where(valid, (returns - mean[:, None]) ** 2, 0.0).sum(axis=1) / np.maximum(periods - 1, 1)
+    downside = np.sqrt((np.minimum(filled, 0.0) ** 2).sum(axis=1) / np.maximum(periods, 1))
+    std = np.sqrt(variance)
+    annualize = math.sqrt(periods_per_year)
+
+    curve = np.cumprod(1.0 + filled, axis=1)
+    peak = np.maximum.accumulate(curve, axis=1)
+    max_drawdown = (1.0 - curve / peak).max(axis=1)
+
+    enough = periods >= 2
+    return {
+        'cumulative_pnl': delta.sum(axis=1),
+        'max_drawdown': np.where(periods > 0, max_drawdown, np.nan),
+        'sharpe': np.divide(mean * annualize, std, out=nan.copy(), where=enough & (std > 0)),
+        'sortino': np.divide(mean * annualize, downside, out=nan.copy(), where=enough & (downside > 0)),
+        'periods': periods,
+    }
+
+
+def _clean(value: float, digits: int = 6) -> Optional[float]:
+    """JSON 응답용 값 정리 (NaN/inf는 None)"""
+    value = float(value)
+    return round(value, digits) if math.isfinite(value) else None
+
+
+def _distribution(values: np.ndarray, digits: int = 3) -> Dict[str, Any]:
+    """분포 요약 (NaN 제외 건수, 평균, 백분위, 최소/최대)"""
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return {'count': 0}
+    summary = {'count': int(len(values)), 'mean': _clean(values.mean(), digits)}
+    for q, value in zip(EXECUTION_PERCENTILES, np.percentile(values, EXECUTION_PERCENTILES)):
+        summary[f'p{q}'] = _clean(value, digits)
+    summary['min'] = _clean(values.min(), digits)
+    summary['max'] = _clean(values.max(), digits)
+    return summary
+
+
+def _execution_metrics(fills: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """체결 주문별 슬리피지(bps)와 체결까지 걸린 시간(ms)
+
+    슬리피지는 불리한 방향이 양수입니다 (매수는 기준가보다 비싸게, 매도는 싸게 체결되면 양수).
+    기준가는 신호(알림 바) 가격과 수량 계산 때 조회한 현재가 두 가지입니다.
+    """
+    direction = np.where(fills['side'] == 'SELL', -1.0, 1.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'slippage_bps': direction * (fills['fill_price'] / fills['signal_price'] - 1) * 10000,
+            'sizing_slippage_bps': direction * (fills['fill_price'] / fills['sizing_price'] - 1) * 10000,
+            'time_to_fill_ms': (fills['filled_at'] - fills['received_at']) * 1000,
+            'order_to_fill_ms': (fills['filled_at'] - fills['requested_at']) * 1000,
+        }
+
+
+def _group_distributions(keys: np.ndarray, metrics: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """키별 주문 수와 체결 품질 분포"""
+    groups = {}
+    for key in np.unique(keys):
+        mask = keys == key
+        groups[str(key)] = {
+            'orders': int(mask.sum()),
+            **{name: _distribution(values[mask]) for name, values in metrics.items()},
+        }
+    return groups
+
+
+class AnalyticsService:
+    """세션/지표/전체 성과 분석. 원장과 자산 롤업을 컬럼 배열로 읽어 NumPy로 한 번에 계산"""
+
+    def __init__(self):
+        self.db = sqlite_db
+        self._cache: Dict[Tuple[int, str], Tuple[Any, float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _choose_resolution(self, span: float) -> str:
+        for resolution, size in ROLLUP_RESOLUTIONS.items():
+            if span / size <= settings.analytics_max_buckets:
+                return resolution
+        return '1d'
+
+    def _trades_version(self) -> Any:
+        """마지막 주문 기록 ID (새 주문이 기록되면 바뀜, 다른 프로세스 기록 포함)"""
+        with self.db.get_connection() as conn:
+            return conn.execute("SELECT MAX(id) FROM trades").fetchone()[0]
+
+    def _load_columns(self, query: str, params: Tuple[Any, ...], width: int) -> List[np.ndarray]:
+        with self.db.get_connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        if not rows:
+            return [np.array([]) for _ in range(width)]
+        return [np.array(column) for column in zip(*rows)]
+
+    def _load_trades(self, start: float, session_index: Dict[str, int]) -> Dict[str, np.ndarray]:
+        placeholders = ', '.join('?' for _ in CLOSE_KINDS)
+        session_ids, symbols, kinds, position_sides, quantities, prices, times = self._load_columns(f'''
+            SELECT session_id, symbol, order_kind, position_side, quantity, fill_price, requested_at
+            FROM trades
+            WHERE requested_at >= ? AND status = 'success' AND order_kind IN ('open', {placeholders})
+        ''', (start, *CLOSE_KINDS), 7)
+
+        known = np.array([session_id in session_index for session_id in session_ids], dtype=bool)
+        session = np.array([session_index.get(session_id, -1) for session_id in session_ids], dtype=np.int64)[known]
+        _, symbol = np.unique(symbols[known].astype(str), return_inverse=True)
+        trades = {
+            'session': session,
+            'symbol': symbol.astype(np.int64),
+            'is_open': kinds[known] == 'open',
+            'position_side': position_sides[known].astype(str),
+            'quantity': quantities[known].astype(float),
+            'fill_price': np.array([np.nan if price is None else price for price in prices[known]], dtype=float),
+            'time': times[known].astype(float),
+        }
+        order = np.lexsort((trades['time'], trades['symbol'], trades['session']))
+        return {key: values[order] for key, values in trades.items()}
+
+    def _load_equity(self, start: float, resolution: str, session_index: Dict[str, int]) -> Dict[str, np.ndarray]:
+        size = ROLLUP_RESOLUTIONS[resolution]
+        session_ids, buckets, closes = self._load_columns('''
+            SELECT session_id, bucket_ts, close FROM equity_rollups
+            WHERE resolution = ? AND bucket_ts >= ?
+        ''', (resolution, int(start // size) * size), 3)
+
+        known = np.array([session_id in session_index for session_id in session_ids], dtype=bool)
+        equity = {
+            'session': np.array([session_index.get(session_id, -1) for session_id in session_ids], dtype=np.int64)[known],
+            'bucket': buckets[known].astype(np.int64),
+            'close': closes[known].astype(float),
+        }
+        order = np.lexsort((equity['bucket'], equity['session']))
+        return {key: values[order] for key, values in equity.items()}
+
+    def _load_fills(self, start: float) -> Dict[str, np.ndarray]:
+        """구간 내 체결된 주문과 각 주문 신호의 마지막 팬아웃 순서"""
+        (signal_ids, symbols, exchange_types, kinds, sides, statuses, positions, signal_prices, sizing_prices,
+         fill_prices, received, requested, filled) = self._load_columns('''
+            SELECT signal_id, symbol, exchange_type, order_kind, side, status, fanout_position,
+                   signal_price, sizing_price, fill_price, signal_received_at, requested_at, filled_at
+            FROM trades
+            WHERE requested_at >= ? AND signal_id IS NOT NULL
+        ''', (start,), 13)
+
+        def floats(values: np.ndarray) -> np.ndarray:
+            return np.array([np.nan if value is None else value for value in values], dtype=float)
+
+        # 신호별 마지막 순서는 스킵/주문 없음 행까지 포함해서 구함
+        position = floats(positions)
+        _, signal = np.unique(signal_ids.astype(str), return_inverse=True)
+        last_position = np.full(int(signal.max()) + 1 if len(signal) else 0, np.nan)
+        has_position = np.isfinite(position)
+        np.fmax.at(last_position, signal[has_position], position[has_position])
+
+        fill_price = floats(fill_prices)
+        filled_mask = (statuses == 'success') & np.isfinite(fill_price)
+        return {
+            'symbol': symbols[filled_mask].astype(str),
+            'exchange_type': np.array([value or 'unknown' for value in exchange_types[filled_mask]], dtype=str),
+            'order_kind': kinds[filled_mask].astype(str),
+            'side': sides[filled_mask].astype(str),
+            'position': position[filled_mask],
+            'last_position': last_position[signal[filled_mask]],
+            'signal_price': floats(signal_prices[filled_mask]),
+            'sizing_price': floats(sizing_prices[filled_mask]),
+            'fill_price': fill_price[filled_mask],
+            'received_at': floats(received[filled_mask]),
+            'requested_at': floats(requested[filled_mask]),
+            'filled_at': floats(filled[filled_mask]),
+        }
+
+    def _compute_execution(self, days: int) -> Dict[str, Any]:
+        end = time.time()
+        start = end - days * 86400
+        fills = self._load_fills(start)
+        metrics = _execution_metrics(fills)
+
+        position = fills['position']
+        known = np.isfinite(position)
+        # 신호의 첫 세션 / 마지막 세션 / 그 사이 (세션이 하나뿐인 신호는 first)
+        fanout = np.where(position == 0, 'first', np.where(position == fills['last_position'], 'last', 'middle'))
+        fanout = np.where(known, fanout, 'unknown')
+        buckets = np.full(len(position), 'unknown', dtype=object)
+        for low, high, name in FANOUT_BUCKETS:
+            buckets[known & (position >= low) & (position <= (np.inf if high is None else high))] = name
+
+        # 실행 순서가 뒤로 갈수록 신호 가격 대비 슬리피지가 얼마나 늘어나는지 (세션 100개당 bps, 최소제곱 기울기)
+        slippage = metrics['slippage_bps']
+        fitted = known & np.isfinite(slippage)
+        slope = None
+        if fitted.sum() >= 2 and np.ptp(position[fitted]) > 0:
+            slope = _clean(np.polyfit(position[fitted], slippage[fitted], 1)[0] * 100, 4)
+
+        return {
+            'start': start,
+            'end': end,
+            'days': days,
+            'order_count': int(len(position)),
+            'fleet': {name: _distribution(values) for name, values in metrics.items()},
+            'slippage_bps_per_100_sessions': slope,
+            'symbols': _group_distributions(fills['symbol'], metrics),
+            'exchange_types': _group_distributions(fills['exchange_type'], metrics),
+            'order_kinds': _group_distributions(fills['order_kind'], metrics),
+            'fanout': _group_distributions(fanout.astype(str), metrics),
+            'fanout_buckets': _group_distributions(buckets.astype(str), metrics),
+        }
+
+    def _compute(self, days: int, resolution: str) -> Dict[str, Any]:
+        end = time.time()
+        start = end - days * 86400
+        sessions = list(sqlite_session_service.iter_sessions(active_only=False, columns=('session_id', 'indicator')))
+        session_ids = [session['session_id'] for session in sessions]
+        session_index = {session_id: index for index, session_id in enumerate(session_ids)}
+        indicators, indicator_of_session = np.unique(
+            np.array([session.get('indicator') or '' for session in sessions], dtype=str), return_inverse=True
+        )
+
+        trades = self._load_trades(start, session_index)
+        equity = self._load_equity(start, resolution, session_index)
+        periods_per_year = SECONDS_PER_YEAR / ROLLUP_RESOLUTIONS[resolution]
+
+        scopes = {
+            'sessions': (np.arange(len(session_ids)), len(session_ids), session_ids),
+            'indicators': (indicator_of_session.astype(np.int64), len(indicators), list(indicators)),
+            'fleet': (np.zeros(len(session_ids), dtype=np.int64), 1, ['fleet']),
+        }
+        report: Dict[str, Any] = {
+            'start': start,
+            'end': end,
+            'days': days,
+            'resolution': resolution,
+            'session_count': len(session_ids),
+        }
+        for scope, (group_of_session, n_groups, names) in scopes.items():
+            trade_stats = _trade_metrics(trades, group_of_session, n_groups, start, end)
+            equity_stats = _equity_metrics(equity, group_of_session, n_groups, periods_per_year)
+            rows = {}
+            for index, name in enumerate(names):
+                count = int(trade_stats['trade_count'][index])
+                gross_loss = trade_stats['gross_loss'][index]
+                rows[name] = {
+                    'cumulative_pnl': _clean(equity_stats['cumulative_pnl'][index]),
+                    'realized_pnl': _clean(trade_stats['realized_pnl'][index]),
+                    'max_drawdown': _clean(equity_stats['max_drawdown'][index]),
+                    'sharpe': _clean(equity_stats['sharpe'][index], 4),
+                    'sortino': _clean(equity_stats['sortino'][index], 4),
+                    'trade_count': count,
+                    'win_rate': _clean(trade_stats['wins'][index] / count, 4) if count else None,
+                    'profit_factor': _clean(trade_stats['gross_profit'][index] / gross_loss, 4) if gross_loss > 0 else None,
+                    'exposure': _clean(trade_stats['exposure'][index], 4),
+                    'unmatched_opens': int(trade_stats['unmatched_opens'][index]),
+                    'unmatched_closes': int(trade_stats['unmatched_closes'][index]),
+                    'periods': int(equity_stats['periods'][index]),
+                }
+            report[scope] = rows
+        report['fleet'] = report['fleet']['fleet']
+        return report
+
+    def get_report(self, days: int = 30, resolution: str = 'auto') -> Dict[str, Any]:
+        """기간 내 세션별/지표별/전체 성과 지표
+
+        결과는 새 주문이 기록되거나 analytics_cache_ttl_seconds가 지날 때까지 캐시합니다.
+        """
+        if resolution == 'auto':
+            resolution = self._choose_resolution(days * 86400)
+        if resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"지원하지 않는 해상도입니다: {resolution}")
+
+        return self._cached((days, resolution), lambda: self._compute(days, resolution))
+
+    def get_execution_report(self, days: int = 7) -> Dict[str, Any]:
+        """기간 내 체결 품질: 슬리피지(bps)와 체결까지 걸린 시간(ms) 분포를 전체/심볼/거래소 타입/
+        주문 종류/팬아웃 순서별로 집계
+
+        - slippage_bps: 신호 가격 대비, sizing_slippage_bps: 수량 계산 때 현재가 대비 (불리한 방향이 양수)
+        - time_to_fill_ms: 신호 수신부터 체결까지, order_to_fill_ms: 주문 요청부터 체결까지
+        - fanout: 신호의 첫 세션(first)/마지막 세션(last)/그 사이(middle), fanout_buckets: 실행 순서 구간
+
+        캐시는 get_report와 같습니다 (주문 조회로 나중에 보완된 체결가는 TTL이 지나야 반영).
+        """
+        return self._cached((days, 'execution'), lambda: self._compute_execution(days))
+
+    def _cached(self, key: Tuple[int, str], compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        # 같은 구간 계산이 동시에 들어오면 한 번만 계산
+        with self._lock:
+            version = self._trades_version()
+            cached = self._cache.get(key)
+            if cached and cached[0] == version and time.time() - cached[1] < settings.analytics_cache_ttl_seconds:
+                cache_requests.inc(cache='analytics', result='hit')
+                return cached[2]
+            cache_requests.inc(cache='analytics', result='miss')
+            started = time.perf_counter()
+            report = compute()
+            report['compute_ms'] = round((time.perf_counter() - started) * 1000, 3)
+            self._cache[key] = (version, time.time(), report)
+            return report
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+# 전역 서비스 인스턴스
+analytics_service = AnalyticsService()
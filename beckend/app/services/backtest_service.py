@@ -0,0 +1,197 @@
+import time
+import logging
+import numpy as np
+from typing import Dict, Any, List, Sequence, Tuple
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# 결과 정렬 기준 (True: 클수록 좋음)
+SORT_KEYS = {
+    'total_pnl': True,
+    'return_pct': True,
+    'win_rate': True,
+    'profit_factor': True,
+    'sharpe': True,
+    'max_drawdown': False,
+}
+
+# 한 번에 평가하는 설정 수 (거래 수 x 설정 수 행렬 메모리 제한)
+CONFIG_CHUNK_SIZE = 2000
+
+
+def build_trades(candles: Dict[str, np.ndarray], signals: Sequence[Tuple[float, str]]) -> Dict[str, np.ndarray]:
+    """신호를 캔들 구간으로 변환 (설정값과 무관한 부분)
+
+    진입 신호(LONG/SHORT)마다 신호가 속한 캔들의 다음 캔들 시가에 진입하고, 다음 신호(종류 무관)가
+    속한 캔들의 다음 캔들 시가에 청산합니다. 같은 방향 신호가 다시 오면 청산 후 재진입으로 봅니다
+    (실거래에서 익절/손절가가 새로 설정되는 것과 같은 효과). 다음 신호가 없으면 마지막 종가로 청산합니다.
+    """
+    ts = candles['ts']
+    n = len(ts)
+    if n == 0 or not signals:
+        return {'entry_bar': np.array([], dtype=np.int64), 'exit_bar': np.array([], dtype=np.int64),
+                'direction': np.array([]), 'entry_price': np.array([]), 'hold_move': np.array([])}
+
+    times = np.array([signal[0] for signal in signals], dtype=np.float64)
+    actions = np.array([signal[1] for signal in signals])
+    bars = np.searchsorted(ts, times, side='right')
+    exit_bars = np.append(bars[1:], n)
+
+    entries = np.isin(actions, ('LONG', 'SHORT')) & (bars < exit_bars) & (bars < n)
+    entry_bar = bars[entries]
+    exit_bar = exit_bars[entries]
+    direction = np.where(actions[entries] == 'LONG', 1.0, -1.0)
+    entry_price = candles['open'][entry_bar]
+    exit_price = np.where(exit_bar < n, candles['open'][np.minimum(exit_bar, n - 1)], candles['close'][-1])
+    return {
+        'entry_bar': entry_bar,
+        'exit_bar': exit_bar,
+        'direction': direction,
+        'entry_price': entry_price,
+        'hold_move': (exit_price / entry_price - 1.0) * direction,
+    }
+
+
+def _first_hits(candles: Dict[str, np.ndarray], trades: Dict[str, np.ndarray],
+                tp_levels: np.ndarray, stop_levels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """거래별로 각 익절/손절 수준(진입가 대비 비율)에 처음 도달한 캔들 순번 (미도달은 보유 캔들 수)
+
+    모든 거래의 보유 구간 캔들을 이어 붙인 뒤 거래별 유리/불리 변동폭의 누적 최대값을 구하고
+    (거래마다 오프셋을 더해 전체가 단조 증가하도록 만듦), 수준별 첫 도달 위치를 searchsorted
+    한 번으로 찾습니다.
+    """
+    lengths = trades['exit_bar'] - trades['entry_bar']
+    n_trades = len(lengths)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    trade_of_row = np.repeat(np.arange(n_trades), lengths)
+    bar = np.arange(lengths.sum()) - np.repeat(starts, lengths) + np.repeat(trades['entry_bar'], lengths)
+
+    entry = trades['entry_price'][trade_of_row]
+    up = candles['high'][bar] / entry - 1.0
+    down = 1.0 - candles['low'][bar] / entry
+    is_long = trades['direction'][trade_of_row] > 0
+    favorable = np.where(is_long, up, down)
+    adverse = np.where(is_long, down, up)
+
+    def search(excursion: np.ndarray, levels: np.ndarray) -> np.ndarray:
+        # 변동폭은 -1 이상이므로 오프셋 간격을 최대값+2로 두면 거래 경계에서 값이 줄어들지 않음
+        offset = float(excursion.max()) + 2.0 if len(excursion) else 2.0
+        running = np.maximum.accumulate(excursion + trade_of_row * offset)
+        targets = np.arange(n_trades)[:, None] * offset + levels[None, :]
+        positions = np.searchsorted(running, targets.ravel(), side='left').reshape(n_trades, len(levels))
+        hits = positions - starts[:, None]
+        return np.minimum(hits, lengths[:, None])
+
+    return search(favorable, tp_levels), search(adverse, stop_levels)
+
+
+def run_sweep(candles: Dict[str, np.ndarray], signals: Sequence[Tuple[float, str]],
+              leverages: Sequence[int], take_profits: Sequence[float], stop_losses: Sequence[float],
+              investment: float = 100.0, fee_rate: float = None, sort_by: str = 'total_pnl',
+              top: int = 20) -> Dict[str, Any]:
+    """레버리지 x 익절% x 손절% 전체 조합을 한 번에 평가하고 정렬된 상위 결과 반환
+
+    익절/손절은 캔들 고가/저가로 판정하며, 같은 캔들에서 둘 다 닿으면 손절을 먼저 적용합니다.
+    청산가(1/레버리지 - 유지증거금률)에 손절보다 먼저 닿으면 증거금 전액 손실로 처리합니다.
+    익절/손절 0은 해당 주문 없음을 뜻합니다.
+    """
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"지원하지 않는 정렬 기준입니다: {sort_by}")
+    fee_rate = settings.backtest_fee_rate if fee_rate is None else fee_rate
+    started = time.perf_counter()
+
+    lev_grid, tp_grid, sl_grid = np.meshgrid(
+        np.asarray(leverages, dtype=np.float64), np.asarray(take_profits, dtype=np.float64),
+        np.asarray(stop_losses, dtype=np.float64), indexing='ij'
+    )
+    lev_grid, tp_grid, sl_grid = lev_grid.ravel(), tp_grid.ravel(), sl_grid.ravel()
+    n_configs = len(lev_grid)
+    if n_configs == 0 or n_configs > settings.backtest_max_configs:
+        raise ValueError(f"설정 조합 수는 1~{settings.backtest_max_configs}개여야 합니다. (요청: {n_configs})")
+    if (lev_grid < 1).any() or (tp_grid < 0).any() or (sl_grid < 0).any():
+        raise ValueError("레버리지는 1 이상, 익절/손절은 0 이상이어야 합니다.")
+
+    trades = build_trades(candles, signals)
+    n_trades = len(trades['entry_bar'])
+
+    # 설정별 익절 수준과 실제 손절 수준(손절과 청산가 중 가까운 쪽)
+    liquidation = 1.0 / lev_grid - settings.backtest_maintenance_margin_rate
+    stop_loss = np.where(sl_grid > 0, sl_grid / 100, np.inf)
+    is_liquidation = liquidation <= stop_loss
+    stop_level = np.minimum(stop_loss, liquidation)
+    tp_level = np.where(tp_grid > 0, tp_grid / 100, np.inf)
+
+    tp_values, tp_index = np.unique(tp_level, return_inverse=True)
+    stop_values, stop_index = np.unique(stop_level, return_inverse=True)
+
+    metrics = {name: np.zeros(n_configs) for name in
+               ('total_pnl', 'win_rate', 'profit_factor', 'sharpe', 'max_drawdown')}
+    counts = {name: np.zeros(n_configs, dtype=np.int64) for name in ('take_profit_hits', 'stop_hits', 'liquidations')}
+
+    if n_trades:
+        tp_hits, stop_hits = _first_hits(candles, trades, tp_values, stop_values)
+        lengths = (trades['exit_bar'] - trades['entry_bar'])[:, None]
+        for begin in range(0, n_configs, CONFIG_CHUNK_SIZE):
+            chunk = slice(begin, begin + CONFIG_CHUNK_SIZE)
+            tp_bar = tp_hits[:, tp_index[chunk]]
+            stop_bar = stop_hits[:, stop_index[chunk]]
+            stopped = (stop_bar < lengths) & (stop_bar <= tp_bar)
+            took_profit = (tp_bar < lengths) & ~stopped
+            liquidated = stopped & is_liquidation[chunk]
+
+            move = np.where(stopped, -stop_level[chunk],
+                            np.where(took_profit, tp_level[chunk], trades['hold_move'][:, None]))
+            leverage = lev_grid[chunk]
+            returns = np.maximum(move * leverage - 2 * fee_rate * leverage, -1.0)
+            returns = np.where(liquidated, -1.0, returns)
+            pnl = returns * investment
+
+            gross_profit = np.where(pnl > 0, pnl, 0.0).sum(axis=0)
+            gross_loss = -np.where(pnl < 0, pnl, 0.0).sum(axis=0)
+            equity = investment + np.cumsum(pnl, axis=0)
+            peak = np.maximum(np.maximum.accumulate(equity, axis=0), investment)
+            std = returns.std(axis=0)
+
+            metrics['total_pnl'][chunk] = pnl.sum(axis=0)
+            metrics['win_rate'][chunk] = (pnl > 0).mean(axis=0)
+            metrics['profit_factor'][chunk] = np.divide(
+                gross_profit, gross_loss, out=np.full(len(leverage), np.inf), where=gross_loss > 0
+            )
+            metrics['sharpe'][chunk] = np.divide(returns.mean(axis=0), std, out=np.zeros(len(leverage)), where=std > 0)
+            metrics['max_drawdown'][chunk] = ((peak - equity) / peak).max(axis=0)
+            counts['take_profit_hits'][chunk] = took_profit.sum(axis=0)
+            counts['stop_hits'][chunk] = (stopped & ~liquidated).sum(axis=0)
+            counts['liquidations'][chunk] = liquidated.sum(axis=0)
+
+    metrics['return_pct'] = metrics['total_pnl'] / investment * 100
+    ranking = metrics[sort_by]
+    order = np.argsort(-ranking if SORT_KEYS[sort_by] else ranking, kind='stable')[:max(top, 1)]
+
+    results: List[Dict[str, Any]] = []
+    for rank, index in enumerate(order, start=1):
+        profit_factor = metrics['profit_factor'][index]
+        results.append({
+            'rank': rank,
+            'leverage': int(lev_grid[index]),
+            'take_profit': float(tp_grid[index]),
+            'stop_loss': float(sl_grid[index]),
+            'total_pnl': round(float(metrics['total_pnl'][index]), 4),
+            'return_pct': round(float(metrics['return_pct'][index]), 4),
+            'win_rate': round(float(metrics['win_rate'][index]), 4),
+            'profit_factor': round(float(profit_factor), 4) if np.isfinite(profit_factor) else None,
+            'sharpe': round(float(metrics['sharpe'][index]), 4),
+            'max_drawdown': round(float(metrics['max_drawdown'][index]), 4),
+            **{name: int(values[index]) for name, values in counts.items()},
+        })
+
+    return {
+        'trade_count': n_trades,
+        'candle_count': len(candles['ts']),
+        'config_count': n_configs,
+        'sort_by': sort_by,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+        'results': results,
+    }
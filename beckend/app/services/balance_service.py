@@ -0,0 +1,113 @@
+import time
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+from app.core.config import get_settings
+from app.core.metrics import cache_requests
+from app.services.bingx import BingXClient
+from app.services.coordination_service import coordination_service
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+class BalanceService:
+    """계정별 잔고를 TTL 동안 캐시하고 동시 요청을 하나의 거래소 호출로 합치는 서비스"""
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = settings.balance_cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+        # 계정 키 -> (만료 시각, 계정 정보)
+        self._cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        # 계정 키 -> 진행 중인 거래소 호출
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.exchange_calls = 0
+        self.cache_hits = 0
+
+    async def _fetch_account(self, account_key: str, api_key: str, secret_key: str, exchange_type: str) -> Dict[str, Any]:
+        client = BingXClient()
+        client.set_credentials(api_key=api_key, secret_key=secret_key, exchange_type=exchange_type)
+        self.exchange_calls += 1
+        result = await client.get_account()
+        self._cache[account_key] = (time.monotonic() + self.ttl_seconds, result.get('data', {}))
+        return self._cache[account_key][1]
+
+    async def get_account_data(self, api_key: str, secret_key: str, exchange_type: str,
+                               max_age: Optional[float] = None) -> Dict[str, Any]:
+        """계정 정보(data) 조회. 캐시가 유효하면 캐시, 진행 중인 호출이 있으면 그 결과를 공유
+
+        max_age를 주면 그보다 오래된 캐시는 사용하지 않습니다.
+        거래소 오류는 캐시하지 않고 그대로 전달합니다.
+        """
+        account_key = coordination_service.make_account_key(api_key, exchange_type)
+        now = time.monotonic()
+
+        cached = self._cache.get(account_key)
+        if cached:
+            expires_at, data = cached
+            age = now - (expires_at - self.ttl_seconds)
+            if expires_at > now and (max_age is None or age <= max_age):
+                self.cache_hits += 1
+                cache_requests.inc(cache='balance', result='hit')
+                return data
+
+        task = self._inflight.get(account_key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_account(account_key, api_key, secret_key, exchange_type))
+            self._inflight[account_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(account_key, None))
+            cache_requests.inc(cache='balance', result='miss')
+        else:
+            self.cache_hits += 1
+            cache_requests.inc(cache='balance', result='hit')
+
+        # 한 요청이 취소되어도 다른 대기자의 호출은 계속되도록 shield
+        return await asyncio.shield(task)
+
+    async def get_account_state(self, api_key: str, secret_key: str, exchange_type: str,
+                                max_age: Optional[float] = None) -> Dict[str, Any]:
+        """잔고(캐시 공유) + 활성 포지션 + 미실현손익 합계 조회"""
+        account_data = await self.get_account_data(api_key, secret_key, exchange_type, max_age=max_age)
+        client = BingXClient()
+        client.set_credentials(api_key=api_key, secret_key=secret_key, exchange_type=exchange_type)
+        positions_result = await client.get_positions()
+
+        positions: List[Dict[str, Any]] = []
+        for position in positions_result.get('data', []) or []:
+            if float(position.get('positionAmt', 0)) == 0:
+                continue
+            positions.append({
+                "symbol": position.get('symbol'),
+                "side": position.get('positionSide'),
+                "size": float(position.get('positionAmt', 0)),
+                "entry_price": float(position.get('avgPrice', position.get('entryPrice', 0)) or 0),
+                "mark_price": float(position.get('markPrice', 0) or 0),
+                "unrealized_pnl": float(position.get('unrealizedProfit', 0) or 0),
+                "leverage": position.get('leverage'),
+            })
+
+        return {
+            "balance": {
+                "total_balance": float(account_data.get('totalWalletBalance', 0)),
+                "available_balance": float(account_data.get('availableBalance', 0)),
+                "frozen_balance": float(account_data.get('frozenBalance', 0)),
+                "currency": "USDT" if exchange_type == "live" else "VST",
+            },
+            "positions": positions,
+            "unrealized_pnl": round(sum(position['unrealized_pnl'] for position in positions), 8),
+        }
+
+    def invalidate(self, api_key: str, exchange_type: str) -> None:
+        """계정 잔고 캐시 무효화 (주문 체결 직후 등)"""
+        self._cache.pop(coordination_service.make_account_key(api_key, exchange_type), None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "cached_accounts": len(self._cache),
+            "inflight": len(self._inflight),
+            "exchange_calls": self.exchange_calls,
+            "cache_hits": self.cache_hits,
+        }
+
+# 전역 서비스 인스턴스
+balance_service = BalanceService()
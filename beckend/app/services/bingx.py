@@ -1,29 +1,56 @@
 import time
 import hmac
 import json
+import logging
 from hashlib import sha256
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
 import aiohttp
 from fastapi import HTTPException
 
 from app.core.config import get_settings
+from app.core import tracing
+from app.core.metrics import registry
+from app.services.paper_exchange import paper_exchange
+from app.services.traffic_recorder import traffic_recorder
+from app.services.traffic_replay import replay_exchange
 
 settings = get_settings()
 
+# 요청 URL/응답 전체는 별도 카테고리(DEBUG)로 기록 (서명/키는 로그 파이프라인에서 가림)
+payload_logger = logging.getLogger(f"{__name__}.payload")
+
+# 요청 한도 초과 응답 코드
+RATE_LIMIT_CODES = {100410}
+
+exchange_requests = registry.counter(
+    "exchange_requests_total", "BingX API calls by endpoint, exchange type and result",
+    ("endpoint", "exchange_type", "status")
+)
+exchange_latency_ms = registry.histogram(
+    "exchange_request_latency_ms", "BingX API call latency (ms)", ("endpoint", "exchange_type")
+)
+
 class BingXClient:
+    # 주문을 실제로 보내지 않는 드라이런 클라이언트 여부
+    dry_run = False
+
     def __init__(self):
         self.api_key = settings.bingx_api_key
         self.secret_key = settings.bingx_secret_key
         self.base_url = settings.bingx_url
+        self.exchange_type = None
 
     def set_credentials(self, api_key: str, secret_key: str, exchange_type: str = "demo"):
         """API 키와 시크릿 키를 동적으로 설정합니다."""
         self.api_key = api_key
         self.secret_key = secret_key
+        self.exchange_type = exchange_type
         
         # 거래소 타입에 따라 URL 설정
-        if exchange_type == "live":
+        if exchange_type == "paper":
+            self.base_url = settings.paper_exchange_url
+        elif exchange_type == "live":
             self.base_url = "https://open-api.bingx.com"
         else:
             self.base_url = "https://open-api-vst.bingx.com"
@@ -47,57 +74,107 @@ class BingXClient:
         
         return params_str, signature
 
-    async def _request(self, method: str, path: str, params: Dict[str, Any] = None) -> Dict:
-        """API 요청을 보냅니다."""
-        params = params or {}
+    async def _send(self, method: str, path: str, params: Dict[str, Any]) -> Tuple[int, Dict]:
+        """요청을 보내고 (HTTP 상태, 응답 JSON) 반환"""
+        # 재생 모드: 기록된 응답 (API 키 자리에 기록 파일의 계정 식별자가 들어 있음)
+        if replay_exchange.enabled:
+            return await replay_exchange.request(self.api_key, method, path)
+        
+        # 모의 거래소 (프로세스 내부)
+        if self.exchange_type == "paper" and not self.base_url:
+            return 200, await paper_exchange.request(self.api_key, method, path, params)
         
         # 서명 생성
         params_str, signature = self._generate_signature(params)
         
         # URL 생성
         url = f"{self.base_url}{path}?{params_str}&signature={signature}"
-        print(f"요청 URL: {url}")  # 디버깅용
+        payload_logger.debug("요청 URL: %s", url)
         
         # API 요청
         async with aiohttp.ClientSession() as session:
             headers = {
                 'X-BX-APIKEY': self.api_key,
             }
+            async with session.request(method, url, headers=headers) as response:
+                result = await response.json()
+                payload_logger.debug("API 응답: %s", result)
+                return response.status, result
+
+    async def _request(self, method: str, path: str, params: Dict[str, Any] = None) -> Dict:
+        """API 요청을 보냅니다. (엔드포인트/결과별 호출 수와 지연시간 기록)"""
+        params = params or {}
+        started_at = time.time()
+        started = time.perf_counter()
+        status = 'error'
+        try:
             try:
-                async with session.request(method, url, headers=headers) as response:
-                    result = await response.json()
-                    print(f"API 응답: {result}")  # 디버깅용
-                    
-                    if response.status != 200 or result.get('code', 0) != 0:
-                        raise HTTPException(
-                            status_code=400,
-                            detail=f"BingX API error: {result.get('msg', 'Unknown error')}"
-                        )
-                    
-                    return result
-                    
+                http_status, result = await self._send(method, path, params)
             except aiohttp.ClientError as e:
+                status = 'network_error'
+                traffic_recorder.record_exchange(
+                    self.api_key, self.exchange_type, method, path, params, started_at,
+                    (time.perf_counter() - started) * 1000, error=str(e)
+                )
                 raise HTTPException(
                     status_code=500,
                     detail=f"BingX API request failed: {str(e)}"
                 )
+            traffic_recorder.record_exchange(
+                self.api_key, self.exchange_type, method, path, params, started_at,
+                (time.perf_counter() - started) * 1000, http_status, result
+            )
+            
+            if http_status != 200 or result.get('code', 0) != 0:
+                rate_limited = http_status == 429 or result.get('code') in RATE_LIMIT_CODES
+                status = 'rate_limited' if rate_limited else 'api_error'
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"BingX API error: {result.get('msg', 'Unknown error')}"
+                )
+            
+            status = 'ok'
+            return result
+        finally:
+            exchange_type = self.exchange_type or 'default'
+            exchange_requests.inc(endpoint=path, exchange_type=exchange_type, status=status)
+            exchange_latency_ms.observe(
+                (time.perf_counter() - started) * 1000, endpoint=path, exchange_type=exchange_type
+            )
 
     async def get_balance(self) -> Dict:
         """계정 잔고를 조회합니다."""
         params = {}
         return await self._request('GET', '/openApi/swap/v2/user/balance', params)
 
+    async def get_account(self) -> Dict:
+        """계정 정보(총 잔고/사용 가능 잔고 등)를 조회합니다."""
+        params = {}
+        return await self._request('GET', '/openApi/swap/v2/user/account', params)
+
     async def get_positions(self, symbol: str = None) -> Dict:
         """포지션을 조회합니다. symbol이 None이면 모든 포지션을 조회합니다."""
         params = {}
         if symbol:
             params['symbol'] = symbol
-        return await self._request('GET', '/openApi/swap/v2/user/positions', params)
+        with tracing.span('get_positions'):
+            return await self._request('GET', '/openApi/swap/v2/user/positions', params)
 
     async def get_ticker(self, symbol: str) -> Dict:
         """현재 시장 가격을 조회합니다."""
         params = {'symbol': symbol}
-        return await self._request('GET', '/openApi/swap/v2/quote/price', params)
+        with tracing.span('get_ticker'):
+            return await self._request('GET', '/openApi/swap/v2/quote/price', params)
+
+    async def get_klines(self, symbol: str, interval: str, start_time: int = None, end_time: int = None,
+                         limit: int = 1440) -> Dict:
+        """캔들(K라인)을 조회합니다. 시각은 밀리초 단위입니다."""
+        params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+        if start_time is not None:
+            params['startTime'] = start_time
+        if end_time is not None:
+            params['endTime'] = end_time
+        return await self._request('GET', '/openApi/swap/v3/quote/klines', params)
 
     async def set_leverage(self, symbol: str, leverage: int, side: str) -> Dict:
         """레버리지를 설정합니다. (테스트 파일과 동일한 파라미터 순서)"""
@@ -106,14 +183,20 @@ class BingXClient:
             'side': side,
             'symbol': symbol
         }
-        print(f"레버리지 설정 파라미터: {params}")  # 디버깅용
-        return await self._request('POST', '/openApi/swap/v2/trade/leverage', params)
+        payload_logger.debug("레버리지 설정 파라미터: %s", params)
+        with tracing.span('set_leverage'):
+            return await self._request('POST', '/openApi/swap/v2/trade/leverage', params)
 
     async def place_order(self, **params) -> Dict:
         """주문을 생성합니다."""
-        # 디버깅용 출력
-        print(f"주문 파라미터: {params}")
-        return await self._request('POST', '/openApi/swap/v2/trade/order', params)
+        payload_logger.debug("주문 파라미터: %s", params)
+        with tracing.span('place_order'):
+            return await self._request('POST', '/openApi/swap/v2/trade/order', params)
+
+    async def get_order(self, symbol: str, order_id: str) -> Dict:
+        """주문 하나를 조회합니다. (체결가 avgPrice, 체결 시각 updateTime)"""
+        params = {'symbol': symbol, 'orderId': order_id}
+        return await self._request('GET', '/openApi/swap/v2/trade/order', params)
 
 # 싱글톤 인스턴스 생성
 bingx_client = BingXClient()
\ No newline at end of file
@@ -0,0 +1,176 @@
+import math
+import time
+import asyncio
+import logging
+import numpy as np
+from typing import Dict, Any, Optional, Set, Tuple
+from app.core.config import get_settings
+from app.services.bingx import BingXClient
+from app.services.candle_store import candle_store
+from app.services.coordination_service import coordination_service
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# 여러 워커 중 한 곳에서만 캔들을 갱신하도록 사용하는 리스 키
+UPDATER_LEASE_KEY = "candle_updater"
+
+# 캔들 간격 (초)
+INTERVAL_SECONDS = {
+    '1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800,
+    '1h': 3600, '2h': 7200, '4h': 14400, '6h': 21600, '12h': 43200, '1d': 86400,
+}
+
+# BingX K라인 요청당 최대 개수
+KLINES_PAGE_SIZE = 1440
+
+CANDLE_FIELDS = ('ts', 'open', 'high', 'low', 'close', 'volume')
+
+
+def empty_candles() -> Dict[str, np.ndarray]:
+    return {
+        'ts': np.array([], dtype=np.int64),
+        **{name: np.array([], dtype=np.float64) for name in CANDLE_FIELDS[1:]},
+    }
+
+
+async def fetch_candles(symbol: str, interval: str, start: float, end: float,
+                        client: Optional[BingXClient] = None) -> Dict[str, np.ndarray]:
+    """BingX에서 [start, end) 구간 캔들을 페이지 단위로 받아 컬럼 배열로 반환
+
+    ts는 캔들 시작 시각(초)이며 오름차순, 중복 없이 정렬됩니다.
+    """
+    if interval not in INTERVAL_SECONDS:
+        raise ValueError(f"지원하지 않는 캔들 간격입니다: {interval}")
+    client = client or BingXClient()
+    step = INTERVAL_SECONDS[interval]
+    rows: Dict[int, tuple] = {}
+    cursor = int(start // step) * step
+    end = math.ceil(end)
+    while cursor < end:
+        page_end = min(cursor + step * KLINES_PAGE_SIZE, end)
+        result = await client.get_klines(
+            symbol, interval, start_time=cursor * 1000, end_time=page_end * 1000 - 1, limit=KLINES_PAGE_SIZE
+        )
+        for kline in result.get('data') or []:
+            ts = int(kline['time']) // 1000
+            if cursor <= ts < page_end:
+                rows[ts] = (ts, float(kline['open']), float(kline['high']), float(kline['low']),
+                            float(kline['close']), float(kline.get('volume', 0) or 0))
+        cursor = page_end
+
+    if not rows:
+        return empty_candles()
+    table = np.array([rows[ts] for ts in sorted(rows)], dtype=np.float64)
+    candles = {name: table[:, index] for index, name in enumerate(CANDLE_FIELDS)}
+    candles['ts'] = candles['ts'].astype(np.int64)
+    logger.info(f"캔들 조회 완료: {symbol} {interval} {len(rows)}개")
+    return candles
+
+
+# 받아 봤지만 거래소에도 캔들이 없던 구간 (점검 시간 등, 같은 프로세스에서 다시 요청하지 않음)
+_empty_gaps: Set[Tuple[str, str, int, int]] = set()
+
+
+async def update_candles(symbol: str, interval: str, start: Optional[float] = None, end: Optional[float] = None,
+                         client: Optional[BingXClient] = None) -> int:
+    """저장소의 빠진 구간(앞/중간/끝)을 BingX에서 받아 채움. 저장한 캔들 수 반환
+
+    아직 마감되지 않은 현재 캔들은 저장하지 않습니다. 저장소가 비어 있고 start가 없으면
+    candle_store_backfill_days만큼 과거부터 받습니다.
+    """
+    if interval not in INTERVAL_SECONDS:
+        raise ValueError(f"지원하지 않는 캔들 간격입니다: {interval}")
+    step = INTERVAL_SECONDS[interval]
+    closed_end = int(time.time() // step) * step
+    end = closed_end if end is None else min(math.ceil(end), closed_end)
+    if start is None and await asyncio.to_thread(candle_store.bounds, symbol, interval) is None:
+        start = end - settings.candle_store_backfill_days * 86400
+
+    written = 0
+    gaps = await asyncio.to_thread(candle_store.find_gaps, symbol, interval, step, start, end)
+    for gap_start, gap_end in gaps:
+        gap_key = (symbol, interval, gap_start, gap_end)
+        if gap_key in _empty_gaps:
+            continue
+        candles = await fetch_candles(symbol, interval, gap_start, gap_end, client=client)
+        if len(candles['ts']) == 0:
+            _empty_gaps.add(gap_key)
+            continue
+        written += await asyncio.to_thread(candle_store.write, symbol, interval, candles)
+    if written:
+        logger.info(f"캔들 저장소 갱신: {symbol} {interval} {written}개")
+    return written
+
+
+async def get_candles(symbol: str, interval: str, start: float, end: float,
+                      update: bool = True) -> Dict[str, np.ndarray]:
+    """[start, end) 캔들을 저장소에서 읽음 (메모리 매핑 뷰)
+
+    update가 True면 먼저 빠진 구간을 받아 채우고, 거래소에 연결할 수 없으면 저장된 데이터만 사용합니다.
+    """
+    if update:
+        try:
+            await update_candles(symbol, interval, start, end)
+        except Exception as e:
+            logger.warning(f"캔들 갱신 실패, 저장된 데이터만 사용: {symbol} {interval} ({str(e)})")
+    return await asyncio.to_thread(candle_store.read, symbol, interval, start, end)
+
+
+class CandleUpdater:
+    """설정된 심볼/간격의 캔들 저장소를 주기적으로 최신 상태로 유지하는 백그라운드 작업"""
+
+    def __init__(self):
+        self.interval_seconds = settings.candle_update_interval_seconds
+        self.targets = [
+            (symbol.strip(), interval.strip())
+            for symbol in settings.candle_store_symbols.split(',') if symbol.strip()
+            for interval in settings.candle_store_intervals.split(',') if interval.strip()
+        ]
+        self._task: Optional[asyncio.Task] = None
+        self._lease_token: Optional[str] = None
+        self.last_cycle: Dict[str, Any] = {}
+
+    def start(self) -> None:
+        if self.targets and self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"🕯️ 캔들 저장소 갱신 시작: {self.targets}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # 리스를 가진 워커만 갱신 (가진 리스는 토큰으로 연장)
+                self._lease_token = coordination_service.acquire_lease(
+                    UPDATER_LEASE_KEY, ttl_seconds=self.interval_seconds * 2, token=self._lease_token
+                )
+                if self._lease_token:
+                    await self.update_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ 캔들 저장소 갱신 오류: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def update_once(self) -> Dict[str, Any]:
+        started = time.time()
+        written: Dict[str, int] = {}
+        for symbol, interval in self.targets:
+            try:
+                written[f"{symbol}:{interval}"] = await update_candles(symbol, interval)
+            except Exception as e:
+                logger.error(f"❌ 캔들 갱신 실패 {symbol} {interval}: {str(e)}")
+        self.last_cycle = {"started_at": started, "duration_seconds": round(time.time() - started, 3), "written": written}
+        return self.last_cycle
+
+# 전역 갱신 작업 인스턴스
+candle_updater = CandleUpdater()
@@ -0,0 +1,183 @@
+import os
+import csv
+import re
+import uuid
+import fcntl
+import logging
+import threading
+from contextlib import contextmanager
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# 캔들 한 건의 고정 길이 레코드 (48바이트, little-endian)
+CANDLE_DTYPE = np.dtype([
+    ('ts', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+
+_SAFE_NAME = re.compile(r'[^A-Za-z0-9_-]')
+
+
+class CandleStore:
+    """심볼/간격별 고정 길이 바이너리 캔들 파일 저장소
+
+    파일은 ts 오름차순으로 정렬된 CANDLE_DTYPE 레코드의 연속이며 헤더가 없습니다.
+    읽기는 np.memmap으로 매핑한 뒤 ts에 대한 이진 탐색으로 구간을 잘라 복사 없이 반환합니다.
+    끝에 이어지는 캔들은 파일 끝에 덧붙이고, 중간 구간이 바뀌면 임시 파일에 병합해 원자적으로 교체합니다.
+    (교체 전에 열린 매핑은 이전 파일을 계속 읽으므로 읽는 쪽은 잠금이 필요 없습니다.)
+    쓰기는 스레드 잠금과 파일 잠금(.lock)을 함께 잡아 여러 워커 프로세스가 같은 파일을 동시에 바꾸지 않게 합니다.
+    모든 메서드는 동기 파일 I/O이므로 이벤트 루프에서는 asyncio.to_thread로 호출합니다.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.candle_store_dir
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, f"{_SAFE_NAME.sub('_', symbol)}_{_SAFE_NAME.sub('_', interval)}.bin")
+
+    def _lock(self, path: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    @contextmanager
+    def _write_lock(self, path: str):
+        """같은 프로세스의 스레드와 다른 프로세스 모두에 대한 파일별 쓰기 잠금"""
+        with self._lock(path), open(f"{path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _map(self, path: str) -> np.ndarray:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        # 덧붙이기 도중 중단되어 남은 불완전 레코드는 무시
+        count = size // CANDLE_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        return np.memmap(path, dtype=CANDLE_DTYPE, mode='r', shape=(count,))
+
+    def read(self, symbol: str, interval: str, start: Optional[float] = None,
+             end: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """[start, end) 구간 캔들을 컬럼별 배열로 반환 (메모리 매핑 뷰, 복사 없음, 읽기 전용)"""
+        records = self._map(self.path(symbol, interval))
+        ts = records['ts']
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side='left'))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, end, side='left'))
+        window = records[lo:hi]
+        return {name: window[name] for name in CANDLE_DTYPE.names}
+
+    def bounds(self, symbol: str, interval: str) -> Optional[Tuple[int, int, int]]:
+        """(첫 캔들 ts, 마지막 캔들 ts, 개수). 저장된 캔들이 없으면 None"""
+        ts = self._map(self.path(symbol, interval))['ts']
+        if len(ts) == 0:
+            return None
+        return int(ts[0]), int(ts[-1]), len(ts)
+
+    def find_gaps(self, symbol: str, interval: str, step: int, start: Optional[float] = None,
+                  end: Optional[float] = None) -> List[Tuple[int, int]]:
+        """[start, end) 안의 빠진 구간 [(gap_start, gap_end), ...] (끝은 미포함)"""
+        # start가 캔들 경계가 아니면 start를 포함하는 캔들부터 확인
+        aligned = int(start // step) * step if start is not None else None
+        ts = self.read(symbol, interval, aligned, end)['ts']
+        first = aligned if aligned is not None else (int(ts[0]) if len(ts) else None)
+        last = int(end) if end is not None else (int(ts[-1]) + step if len(ts) else None)
+        if first is None or last is None or first >= last:
+            return []
+        if len(ts) == 0:
+            return [(first, last)]
+
+        gaps = []
+        if ts[0] > first:
+            gaps.append((first, int(ts[0])))
+        holes = np.flatnonzero(np.diff(ts) > step)
+        gaps.extend((int(ts[i]) + step, int(ts[i + 1])) for i in holes)
+        if int(ts[-1]) + step < last:
+            gaps.append((int(ts[-1]) + step, last))
+        return gaps
+
+    def write(self, symbol: str, interval: str, candles: Dict[str, np.ndarray]) -> int:
+        """캔들 병합 저장 (같은 ts는 새 값으로 덮어씀). 저장한 캔들 수 반환"""
+        count = len(candles['ts'])
+        if count == 0:
+            return 0
+        new = np.empty(count, dtype=CANDLE_DTYPE)
+        for name in CANDLE_DTYPE.names:
+            new[name] = candles[name]
+        new = new[np.argsort(new['ts'], kind='stable')]
+        # 같은 배치 안의 중복 ts는 마지막 값 사용
+        keep = np.append(new['ts'][1:] != new['ts'][:-1], True)
+        new = new[keep]
+
+        path = self.path(symbol, interval)
+        os.makedirs(self.root, exist_ok=True)
+        with self._write_lock(path):
+            existing = self._map(path)
+            if len(existing) == 0 or new['ts'][0] > existing['ts'][-1]:
+                # 끝에 이어지는 캔들은 덧붙이기 (불완전 레코드가 남아 있으면 먼저 잘라냄)
+                with open(path, 'ab') as f:
+                    f.truncate(len(existing) * CANDLE_DTYPE.itemsize)
+                    f.write(new.tobytes())
+            else:
+                # 기존 값 중 새 값과 겹치는 ts를 빼고 합친 뒤 임시 파일로 교체
+                merged = np.concatenate([existing[~np.isin(existing['ts'], new['ts'])], new])
+                merged = merged[np.argsort(merged['ts'], kind='stable')]
+                tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+                try:
+                    merged.tofile(tmp_path)
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+        return len(new)
+
+    def import_csv(self, symbol: str, interval: str, csv_path: str) -> int:
+        """CSV(ts 또는 time, open, high, low, close[, volume]) 캔들 가져오기
+
+        ts가 밀리초면 초로 바꿉니다. 오프라인 데이터 적재용입니다.
+        """
+        rows = []
+        with open(csv_path, newline='') as f:
+            for row in csv.DictReader(f):
+                ts = int(float(row.get('ts') or row['time']))
+                if ts > 10 ** 11:
+                    ts //= 1000
+                rows.append((ts, float(row['open']), float(row['high']), float(row['low']),
+                             float(row['close']), float(row.get('volume') or 0)))
+        if not rows:
+            return 0
+        table = np.array(rows, dtype=np.float64)
+        candles = {name: table[:, index] for index, name in enumerate(CANDLE_DTYPE.names)}
+        candles['ts'] = table[:, 0].astype(np.int64)
+        written = self.write(symbol, interval, candles)
+        logger.info(f"캔들 CSV 가져오기: {symbol} {interval} {written}개 ({csv_path})")
+        return written
+
+# 전역 저장소 인스턴스
+candle_store = CandleStore()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="캔들 저장소 CSV 가져오기")
+    parser.add_argument("symbol")
+    parser.add_argument("interval")
+    parser.add_argument("csv_path")
+    args = parser.parse_args()
+    print(f"{candle_store.import_csv(args.symbol, args.interval, args.csv_path)}개 저장")
@@ -0,0 +1,145 @@
+import os
+import time
+import asyncio
+import uuid
+import socket
+import json
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+from app.core.config import get_settings
+from app.core.sqlite_database import sqlite_db
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# 신호 중복 키에 쓰는 알림/바 시각 필드 (TradingView {{timenow}}, {{time}} 등)
+SIGNAL_TIME_FIELDS = ('alert_time', 'timenow', 'time', 'bar_time')
+
+class CoordinationService:
+    """여러 uvicorn 워커가 같은 신호/계정을 중복 처리하지 않도록 조정하는 서비스"""
+
+    def __init__(self):
+        self.db = sqlite_db
+        self._instance_tag = uuid.uuid4().hex[:8]
+
+    @property
+    def worker_id(self) -> str:
+        """현재 워커 식별자 (호스트:PID:인스턴스)"""
+        return f"{socket.gethostname()}:{os.getpid()}:{self._instance_tag}"
+
+    def make_signal_key(self, body: bytes, action: str, symbol: str, strategy: str, data: Dict[str, Any]) -> str:
+        """신호 중복 키 생성
+
+        알림/바 시각 필드(alert_time, timenow, time, bar_time)가 있으면 파싱한 (액션, 심볼, 전략)과 시각으로
+        키를 만들어, 같은 알림의 재전송만 중복으로 보고 다음 바에서 다시 울린 같은 알림은 새 신호로 처리합니다.
+        시각 필드가 하나도 없으면 재전송과 구분할 수 없어 웹훅 원문 해시를 쓰므로, 중복 창 안에 같은 본문으로
+        온 두 번째 알림은 재전송으로 보고 건너뜁니다.
+        """
+        times = [(name, str(data[name])) for name in SIGNAL_TIME_FIELDS if data.get(name) not in (None, '')]
+        if not times:
+            return hashlib.sha256(body).hexdigest()
+        key = json.dumps([action, symbol, strategy, times], ensure_ascii=False)
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def make_account_key(self, api_key: str, exchange_type: str) -> str:
+        """API 키 + 거래소 타입으로 계정 키 생성 (API 키 원문은 저장하지 않음)"""
+        return hashlib.sha256(f"{api_key}:{exchange_type}".encode('utf-8')).hexdigest()
+
+    def claim_signal(self, signal_key: str, window_seconds: Optional[float] = None) -> bool:
+        """신호 선점. 중복 창 안에서 다른 워커가 먼저 선점했으면 False"""
+        window = settings.signal_dedup_window_seconds if window_seconds is None else window_seconds
+        now = time.time()
+        try:
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+
+                # 만료된 선점 기록 정리
+                cursor.execute("DELETE FROM signal_claims WHERE expires_at <= ?", (now,))
+
+                cursor.execute('''
+                    INSERT INTO signal_claims (signal_key, owner, claimed_at, expires_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(signal_key) DO UPDATE SET
+                        owner = excluded.owner,
+                        claimed_at = excluded.claimed_at,
+                        expires_at = excluded.expires_at
+                    WHERE signal_claims.expires_at <= excluded.claimed_at
+                ''', (signal_key, self.worker_id, now, now + window))
+                claimed = cursor.rowcount == 1
+
+                conn.commit()
+                return claimed
+
+        except Exception as e:
+            # 조정 계층 장애로 매매가 멈추지 않도록 선점 성공으로 처리
+            logger.error(f"신호 선점 오류: {str(e)}")
+            return True
+
+    def acquire_lease(self, account_key: str, ttl_seconds: Optional[float] = None,
+                      token: Optional[str] = None) -> Optional[str]:
+        """계정 실행 리스 획득. 성공하면 리스 토큰, 다른 소유자가 유효한 리스를 가지고 있으면 None
+
+        리스는 획득마다 토큰(워커 ID + UUID)을 새로 발급해 같은 워커의 동시 요청끼리도 배타적입니다.
+        이미 가진 리스를 연장하려면 받은 토큰을 token으로 넘깁니다.
+        """
+        ttl = settings.execution_lease_ttl_seconds if ttl_seconds is None else ttl_seconds
+        owner = token or f"{self.worker_id}:{uuid.uuid4().hex}"
+        now = time.time()
+        try:
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO execution_leases (account_key, owner, acquired_at, expires_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(account_key) DO UPDATE SET
+                        owner = excluded.owner,
+                        acquired_at = excluded.acquired_at,
+                        expires_at = excluded.expires_at
+                    WHERE execution_leases.expires_at <= excluded.acquired_at
+                       OR execution_leases.owner = excluded.owner
+                ''', (account_key, owner, now, now + ttl))
+                acquired = cursor.rowcount == 1
+
+                conn.commit()
+                return owner if acquired else None
+
+        except Exception as e:
+            # 리스를 확인할 수 없으면 다른 워커와 같은 계정을 동시에 매매하지 않도록 획득 실패로 처리
+            logger.error(f"계정 리스 획득 오류: {str(e)}")
+            return None
+
+    async def wait_for_lease(self, account_key: str, timeout: Optional[float] = None) -> Optional[str]:
+        """계정 실행 리스를 얻을 때까지 재시도 (기본 최대 리스 TTL 동안). 리스 토큰 반환, 끝내 못 얻으면 None"""
+        timeout = settings.execution_lease_ttl_seconds if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while True:
+            token = self.acquire_lease(account_key)
+            if token:
+                return token
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, 1.0)
+
+    def release_lease(self, account_key: str, token: str) -> bool:
+        """acquire_lease로 받은 토큰의 계정 리스 해제 (그 사이 다른 소유자가 가져간 리스는 건드리지 않음)"""
+        try:
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "DELETE FROM execution_leases WHERE account_key = ? AND owner = ?",
+                    (account_key, token)
+                )
+                conn.commit()
+                return True
+
+        except Exception as e:
+            logger.error(f"계정 리스 해제 오류: {str(e)}")
+            return False
+
+# 전역 서비스 인스턴스
+coordination_service = CoordinationService()
@@ -0,0 +1,171 @@
+import time
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional
+from app.core.config import get_settings
+from app.core.metrics import registry
+from app.services.balance_service import balance_service
+from app.services.coordination_service import coordination_service
+from app.services.equity_snapshot_service import equity_snapshot_service
+from app.services.sqlite_session_service import sqlite_session_service
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# 여러 워커 중 한 곳에서만 폴링하도록 사용하는 리스 키
+POLLER_LEASE_KEY = "equity_poller"
+
+# 보관 기간 정리 주기 (초)
+RETENTION_INTERVAL_SECONDS = 3600
+
+# 계정 하나를 샘플링할 때 보내는 거래소 요청 수 (잔고 + 포지션)
+REQUESTS_PER_ACCOUNT = 2
+
+# 폴링 대상 세션 조회 컬럼
+POLL_SESSION_COLUMNS = ('session_id', 'api_key', 'secret_key', 'exchange_type', 'initial_balance')
+
+rate_limit_wait_ms = registry.histogram(
+    "rate_limit_wait_ms", "Time spent waiting to stay under exchange request rate limits (ms)", ("component",)
+)
+
+class EquityPoller:
+    """활성 세션의 잔고/포지션을 일정 속도로 분산 샘플링해 스냅샷으로 일괄 저장하는 백그라운드 작업"""
+
+    def __init__(self):
+        self.interval_seconds = settings.equity_poll_interval_seconds
+        self.max_requests_per_second = settings.equity_poll_max_requests_per_second
+        self.batch_size = settings.equity_snapshot_batch_size
+        # 폴러 리스 TTL (주기의 2배). 요청 속도 제한으로 주기가 길어져도 계정마다 갱신하므로 만료되지 않음
+        self.lease_ttl_seconds = self.interval_seconds * 2
+        self._task: Optional[asyncio.Task] = None
+        self._lease_token: Optional[str] = None
+        self._buffer: List[Dict[str, Any]] = []
+        self.last_cycle: Dict[str, Any] = {}
+        self._last_retention = 0.0
+
+    def start(self) -> None:
+        if settings.equity_poll_enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("📈 자산 스냅샷 폴러 시작")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._flush()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            try:
+                # 리스를 가진 워커만 폴링 (매 주기 획득, 폴링 중에는 계정마다 갱신)
+                if self._renew_lease():
+                    await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ 자산 스냅샷 폴링 오류: {str(e)}")
+            await asyncio.sleep(max(0.0, self.interval_seconds - (loop.time() - started)))
+
+    def _renew_lease(self) -> bool:
+        self._lease_token = coordination_service.acquire_lease(
+            POLLER_LEASE_KEY, ttl_seconds=self.lease_ttl_seconds, token=self._lease_token
+        )
+        return self._lease_token is not None
+
+    async def _flush(self) -> None:
+        """버퍼의 스냅샷 일괄 저장 (SQLite 쓰기와 롤업은 이벤트 루프를 막지 않도록 스레드에서 실행)"""
+        if self._buffer:
+            snapshots, self._buffer = self._buffer, []
+            await asyncio.to_thread(equity_snapshot_service.save_snapshots, snapshots)
+
+    async def poll_once(self) -> Dict[str, Any]:
+        """활성 세션 전체를 한 주기 동안 고르게 나눠 샘플링"""
+        sessions = await asyncio.to_thread(sqlite_session_service.get_active_sessions, columns=POLL_SESSION_COLUMNS)
+
+        # 같은 계정을 쓰는 세션은 한 번만 조회
+        accounts: Dict[str, List[Dict[str, Any]]] = {}
+        for session in sessions:
+            if not session.get('api_key') or not session.get('secret_key'):
+                continue
+            account_key = coordination_service.make_account_key(session['api_key'], session['exchange_type'])
+            accounts.setdefault(account_key, []).append(session)
+
+        # 주기 전체에 분산하되 초당 최대 요청 수를 넘지 않도록 간격 설정 (계정마다 요청 2건)
+        spacing = 0.0
+        rate_limited = False
+        if accounts:
+            rate_floor = REQUESTS_PER_ACCOUNT / self.max_requests_per_second
+            spacing = max(self.interval_seconds / len(accounts), rate_floor)
+            # 요청 속도 제한 때문에 간격이 늘어난 경우에만 대기 시간으로 기록
+            rate_limited = rate_floor > self.interval_seconds / len(accounts)
+
+        sampled = 0
+        failed = 0
+        lease_lost = False
+        for index, group in enumerate(accounts.values()):
+            if index:
+                await asyncio.sleep(spacing)
+                if rate_limited:
+                    rate_limit_wait_ms.observe(spacing * 1000, component='equity_poller')
+                # 계정 수가 많아 주기가 리스 TTL보다 길어져도 다른 워커가 중복 폴링하지 않도록 갱신
+                if not self._renew_lease():
+                    lease_lost = True
+                    logger.warning("⚠️ 자산 스냅샷 폴러 리스를 잃어 이번 주기를 중단합니다.")
+                    break
+            first = group[0]
+            try:
+                state = await balance_service.get_account_state(
+                    first['api_key'], first['secret_key'], first['exchange_type']
+                )
+            except Exception as e:
+                failed += 1
+                logger.warning(f"⚠️ 세션 {first['session_id']} 자산 샘플링 실패: {str(e)}")
+                continue
+
+            sampled += 1
+            ts = time.time()
+            balance = state['balance']
+            for session in group:
+                self._buffer.append({
+                    'session_id': session['session_id'],
+                    'ts': ts,
+                    'total_balance': balance['total_balance'],
+                    'available_balance': balance['available_balance'],
+                    'unrealized_pnl': state['unrealized_pnl'],
+                    'equity': balance['total_balance'] + state['unrealized_pnl'],
+                    'positions': state['positions'],
+                })
+                # 초기자산이 없으면 첫 스냅샷으로 기록
+                if session.get('initial_balance') is None:
+                    await asyncio.to_thread(
+                        sqlite_session_service.update_initial_balance, session['session_id'], balance['total_balance']
+                    )
+
+            if len(self._buffer) >= self.batch_size:
+                await self._flush()
+
+        await self._flush()
+        
+        if time.time() - self._last_retention >= RETENTION_INTERVAL_SECONDS:
+            self._last_retention = time.time()
+            await asyncio.to_thread(equity_snapshot_service.enforce_retention)
+        
+        self.last_cycle = {
+            'finished_at': time.time(),
+            'accounts': len(accounts),
+            'sampled': sampled,
+            'failed': failed,
+            'spacing_seconds': round(spacing, 3),
+            'lease_lost': lease_lost,
+        }
+        return self.last_cycle
+
+# 전역 폴러 인스턴스
+equity_poller = EquityPoller()
@@ -0,0 +1,213 @@
+import json
+import time
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+from app.core.config import get_settings
+from app.core.sqlite_database import sqlite_db
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# 롤업 해상도별 버킷 크기 (초)
+ROLLUP_RESOLUTIONS = {'1m': 60, '1h': 3600, '1d': 86400}
+
+def _merge_points(points: List[Dict[str, Any]], stride: int) -> List[Dict[str, Any]]:
+    """연속된 stride개 포인트를 OHLC 규칙으로 하나로 합쳐 다운샘플"""
+    merged = []
+    for start in range(0, len(points), stride):
+        chunk = points[start:start + stride]
+        merged.append({
+            'ts': chunk[0]['ts'],
+            'open': chunk[0]['open'],
+            'high': max(point['high'] for point in chunk),
+            'low': min(point['low'] for point in chunk),
+            'close': chunk[-1]['close'],
+            'unrealized_pnl': chunk[-1]['unrealized_pnl'],
+            'samples': sum(point['samples'] for point in chunk),
+        })
+    return merged
+
+class EquitySnapshotService:
+    """세션별 자산 스냅샷 저장/조회"""
+
+    def __init__(self):
+        self.db = sqlite_db
+
+    def save_snapshots(self, snapshots: List[Dict[str, Any]]) -> bool:
+        """스냅샷 여러 건과 1m/1h/1d 롤업 갱신을 한 트랜잭션으로 저장"""
+        if not snapshots:
+            return True
+        try:
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.executemany('''
+                    INSERT INTO equity_snapshots (
+                        session_id, ts, total_balance, available_balance,
+                        unrealized_pnl, equity, position_count, positions
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [(
+                    snapshot['session_id'], snapshot['ts'], snapshot['total_balance'],
+                    snapshot.get('available_balance'), snapshot.get('unrealized_pnl', 0),
+                    snapshot['equity'], len(snapshot.get('positions', [])),
+                    json.dumps(snapshot.get('positions', []), separators=(',', ':'))
+                ) for snapshot in snapshots])
+                
+                # 버킷별 OHLC 갱신 (SET 식은 모두 갱신 전 값을 참조)
+                cursor.executemany('''
+                    INSERT INTO equity_rollups (
+                        session_id, resolution, bucket_ts, open, high, low, close,
+                        unrealized_pnl, samples, first_ts, last_ts
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?)
+                    ON CONFLICT(session_id, resolution, bucket_ts) DO UPDATE SET
+                        open = CASE WHEN excluded.first_ts < equity_rollups.first_ts
+                                    THEN excluded.open ELSE equity_rollups.open END,
+                        high = MAX(equity_rollups.high, excluded.high),
+                        low = MIN(equity_rollups.low, excluded.low),
+                        close = CASE WHEN excluded.last_ts >= equity_rollups.last_ts
+                                     THEN excluded.close ELSE equity_rollups.close END,
+                        unrealized_pnl = CASE WHEN excluded.last_ts >= equity_rollups.last_ts
+                                              THEN excluded.unrealized_pnl ELSE equity_rollups.unrealized_pnl END,
+                        samples = equity_rollups.samples + 1,
+                        first_ts = MIN(equity_rollups.first_ts, excluded.first_ts),
+                        last_ts = MAX(equity_rollups.last_ts, excluded.last_ts)
+                ''', [(
+                    snapshot['session_id'], resolution, int(snapshot['ts'] // size) * size,
+                    snapshot['equity'], snapshot['equity'], snapshot['equity'], snapshot['equity'],
+                    snapshot.get('unrealized_pnl', 0), snapshot['ts'], snapshot['ts']
+                ) for snapshot in snapshots for resolution, size in ROLLUP_RESOLUTIONS.items()])
+                
+                conn.commit()
+                return True
+
+        except Exception as e:
+            logger.error(f"자산 스냅샷 저장 오류: {str(e)}")
+            return False
+
+    def get_latest_snapshot(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """세션의 가장 최근 스냅샷 조회"""
+        try:
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT session_id, ts, total_balance, available_balance, unrealized_pnl,
+                           equity, position_count, positions
+                    FROM equity_snapshots WHERE session_id = ? ORDER BY ts DESC LIMIT 1
+                ''', (session_id,))
+                row = cursor.fetchone()
+
+                if row:
+                    snapshot = dict(row)
+                    snapshot['positions'] = json.loads(snapshot['positions'] or '[]')
+                    return snapshot
+                return None
+
+        except Exception as e:
+            logger.error(f"자산 스냅샷 조회 오류: {str(e)}")
+            return None
+
+    def get_latest_snapshots(self, session_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """여러 세션의 가장 최근 스냅샷 조회 (연결 하나로 세션별 인덱스 조회)"""
+        snapshots: Dict[str, Dict[str, Any]] = {}
+        try:
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                for session_id in session_ids:
+                    cursor.execute('''
+                        SELECT session_id, ts, total_balance, available_balance, unrealized_pnl,
+                               equity, position_count, positions
+                        FROM equity_snapshots WHERE session_id = ? ORDER BY ts DESC LIMIT 1
+                    ''', (session_id,))
+                    row = cursor.fetchone()
+                    if row:
+                        snapshot = dict(row)
+                        snapshot['positions'] = json.loads(snapshot['positions'] or '[]')
+                        snapshots[session_id] = snapshot
+            return snapshots
+
+        except Exception as e:
+            logger.error(f"자산 스냅샷 일괄 조회 오류: {str(e)}")
+            return snapshots
+
+    def enforce_retention(self, now: Optional[float] = None) -> Dict[str, int]:
+        """보관 기간이 지난 원본 스냅샷/롤업 삭제. 해상도별 삭제 건수 반환"""
+        now = time.time() if now is None else now
+        retention_days = {
+            'raw': settings.equity_retention_raw_days,
+            '1m': settings.equity_retention_1m_days,
+            '1h': settings.equity_retention_1h_days,
+            '1d': settings.equity_retention_1d_days,
+        }
+        deleted: Dict[str, int] = {}
+        try:
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                for resolution, days in retention_days.items():
+                    if days <= 0:
+                        continue
+                    cutoff = now - days * 86400
+                    if resolution == 'raw':
+                        cursor.execute("DELETE FROM equity_snapshots WHERE ts < ?", (cutoff,))
+                    else:
+                        cursor.execute(
+                            "DELETE FROM equity_rollups WHERE resolution = ? AND bucket_ts < ?",
+                            (resolution, cutoff)
+                        )
+                    deleted[resolution] = cursor.rowcount
+                conn.commit()
+                
+            if any(deleted.values()):
+                logger.info(f"자산 시계열 보관 기간 정리: {deleted}")
+            return deleted
+            
+        except Exception as e:
+            logger.error(f"자산 시계열 보관 기간 정리 오류: {str(e)}")
+            return deleted
+    
+    def _choose_resolution(self, start: float, end: float, max_points: int) -> str:
+        """요청 구간을 max_points 이하로 표현할 수 있는 가장 세밀한 해상도 선택"""
+        span = max(end - start, 0)
+        if span / max(settings.equity_poll_interval_seconds, 1) <= max_points:
+            return 'raw'
+        for resolution, size in ROLLUP_RESOLUTIONS.items():
+            if span / size <= max_points:
+                return resolution
+        return '1d'
+    
+    def query_range(self, session_id: str, start: float, end: float, resolution: str = 'auto',
+                    max_points: int = 1000) -> Tuple[str, List[Dict[str, Any]]]:
+        """구간 조회. (사용한 해상도, 포인트 목록) 반환
+        
+        롤업 해상도는 (session_id, resolution, bucket_ts) 기본키 범위 읽기 한 번으로 조회하고,
+        결과가 max_points를 넘으면 인접 버킷을 합쳐 다운샘플합니다.
+        """
+        if resolution == 'auto':
+            resolution = self._choose_resolution(start, end, max_points)
+        if resolution != 'raw' and resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"지원하지 않는 해상도입니다: {resolution}")
+        
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            if resolution == 'raw':
+                cursor.execute('''
+                    SELECT ts, equity AS open, equity AS high, equity AS low, equity AS close,
+                           unrealized_pnl, 1 AS samples
+                    FROM equity_snapshots WHERE session_id = ? AND ts >= ? AND ts < ? ORDER BY ts
+                ''', (session_id, start, end))
+            else:
+                size = ROLLUP_RESOLUTIONS[resolution]
+                cursor.execute('''
+                    SELECT bucket_ts AS ts, open, high, low, close, unrealized_pnl, samples
+                    FROM equity_rollups
+                    WHERE session_id = ? AND resolution = ? AND bucket_ts >= ? AND bucket_ts < ?
+                    ORDER BY bucket_ts
+                ''', (session_id, resolution, int(start // size) * size, end))
+            points = [dict(row) for row in cursor.fetchall()]
+        
+        if len(points) > max_points:
+            stride = -(-len(points) // max_points)
+            points = _merge_points(points, stride)
+        return resolution, points
+
+# 전역 서비스 인스턴스
+equity_snapshot_service = EquitySnapshotService()
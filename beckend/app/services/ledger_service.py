@@ -0,0 +1,306 @@
+import json
+import time
+import queue
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+from app.core.config import get_settings
+from app.core.logging_pipeline import redact_fields
+from app.core.metrics import registry
+from app.core.sqlite_database import sqlite_db
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# 원장 조회 최대 건수
+MAX_LEDGER_PAGE_SIZE = 1000
+
+# 배치 기록 시도 횟수와 첫 재시도 대기 (이후 2배씩). 끝내 실패하면 한 행씩 기록
+LEDGER_WRITE_ATTEMPTS = 3
+LEDGER_RETRY_BACKOFF_SECONDS = 0.2
+
+ledger_rows_dropped = registry.counter(
+    "ledger_rows_dropped_total", "Ledger rows that could not be written even one at a time by kind "
+    "(signal, signal_done, trades, fill)", ("kind",)
+)
+
+def extract_order(response: Optional[Dict[str, Any]]) -> Tuple[Optional[str], Optional[float], Optional[float]]:
+    """주문 응답(주문 조회 응답 포함)에서 거래소 주문 ID, 체결가, 체결 시각(epoch 초) 추출
+
+    체결가가 아직 없으면 체결가/체결 시각은 None. 체결 시각은 응답의 updateTime (없으면 None)
+    """
+    if not response:
+        return None, None, None
+    order = (response.get('data') or {}).get('order') or {}
+    order_id = order.get('orderId')
+    try:
+        fill_price = float(order.get('avgPrice') or 0) or None
+    except (TypeError, ValueError):
+        fill_price = None
+    filled_at = None
+    if fill_price is not None:
+        try:
+            filled_at = float(order.get('updateTime') or 0) / 1000 or None
+        except (TypeError, ValueError):
+            filled_at = None
+    return (str(order_id) if order_id is not None else None), fill_price, filled_at
+
+
+class LedgerService:
+    """신호/주문 원장. 기록은 큐에 넣고 별도 스레드가 배치 트랜잭션으로 저장"""
+
+    def __init__(self):
+        self.db = sqlite_db
+        self.batch_size = settings.ledger_batch_size
+        self.flush_interval = settings.ledger_flush_interval_seconds
+        self._queue: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    # ---- 기록 (핫패스에서 호출, 큐에 넣기만 함) ----
+
+    def _enqueue(self, kind: str, item: Any) -> None:
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="ledger-writer", daemon=True)
+                    self._thread.start()
+        self._queue.put((kind, item))
+
+    def record_signal(self, signal: Dict[str, Any], symbol: str, strategy: str, action: str,
+                      payload: Dict[str, Any]) -> None:
+        """신호 수신 기록 (웹훅 원문은 passphrase 등 비밀값을 가린 뒤 저장)"""
+        self._enqueue('signal', (
+            signal['signal_id'], signal['received_at'], symbol, strategy, action,
+            json.dumps(redact_fields(payload), ensure_ascii=False)
+        ))
+
+    def complete_signal(self, signal_id: str, session_count: int) -> None:
+        """신호 처리 완료 시각과 처리 세션 수 기록"""
+        self._enqueue('signal_done', (session_count, time.time(), signal_id))
+
+    def record_session_orders(self, signal: Dict[str, Any], session_id: str, symbol: str, action: str,
+                              exchange_type: str, orders: List[Dict[str, Any]], result: Dict[str, Any],
+                              fanout_position: Optional[int] = None) -> List[str]:
+        """세션 하나의 주문 내역 기록. 주문이 없었으면 처리 결과만 no_order로 기록
+
+        fanout_position: 이 신호에서 이 세션이 실행된 순서 (0부터)
+        반환: 응답에 체결가가 없어 주문 조회로 보완해야 할 거래소 주문 ID 목록
+        """
+        received_at = signal.get('received_at')
+        signal_price = signal.get('signal_price')
+        rows = []
+        unfilled = []
+        for order in orders:
+            params = order.get('params', {})
+            order_id, fill_price, filled_at = extract_order(order.get('response'))
+            kind = order['kind']
+            # 진입 신호에서 발생한 청산은 반대 포지션 전환
+            if kind == 'close' and action != 'CLOSE':
+                kind = 'reverse_close'
+            requested_at = order.get('requested_at')
+            acked_at = order.get('acked_at')
+            fill_source = None
+            if fill_price is not None:
+                fill_source = 'response'
+                # 응답에 체결 시각이 없으면 응답 수신 시각
+                filled_at = filled_at or acked_at
+            elif order_id is not None and 'error' not in order:
+                unfilled.append(order_id)
+            rows.append((
+                signal['signal_id'], session_id, exchange_type, symbol, action, kind,
+                params.get('side'), params.get('positionSide'), float(params.get('quantity') or 0),
+                'failed' if 'error' in order else 'success', order_id, fill_price, order.get('error'),
+                received_at, requested_at, acked_at,
+                (acked_at - requested_at) * 1000 if acked_at and requested_at else None,
+                (acked_at - received_at) * 1000 if acked_at and received_at else None,
+                signal_price, order.get('sizing_price'), order.get('sized_at'), filled_at, fill_source,
+                fanout_position,
+            ))
+
+        if not rows:
+            # 지연 보호 등으로 진입을 건너뛴 경우는 skipped
+            if result.get('skipped'):
+                status = 'skipped'
+            else:
+                status = 'no_order' if result.get('success', True) else 'failed'
+            rows.append((
+                signal['signal_id'], session_id, exchange_type, symbol, action, 'none',
+                None, None, None, status, None, None,
+                result.get('message') or result.get('error'), received_at, time.time(), None, None, None,
+                signal_price, None, None, None, None, fanout_position,
+            ))
+        self._enqueue('trades', rows)
+        return unfilled
+
+    def record_fill(self, signal_id: str, order_id: str, fill_price: float, filled_at: float) -> None:
+        """주문 조회로 확인한 체결가/체결 시각 보완"""
+        self._enqueue('fill', (fill_price, filled_at, signal_id, order_id))
+
+    # ---- 배치 기록 스레드 ----
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._write_batch(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write_batch(self, batch: List[Tuple[str, Any]]) -> None:
+        """배치를 한 트랜잭션으로 기록. 잠금 등으로 실패하면 간격을 늘려 재시도하고,
+        끝내 실패하면 한 행씩 기록해 잘못된 행만 버림 (버린 행은 ledger_rows_dropped로 집계)"""
+        delay = LEDGER_RETRY_BACKOFF_SECONDS
+        for attempt in range(1, LEDGER_WRITE_ATTEMPTS + 1):
+            try:
+                self._write_items(batch)
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ 원장 배치 기록 실패 ({attempt}/{LEDGER_WRITE_ATTEMPTS}, {len(batch)}건): {str(e)}")
+            if attempt < LEDGER_WRITE_ATTEMPTS:
+                time.sleep(delay)
+                delay *= 2
+
+        # 같은 큐 순서대로 한 행씩 (신호 행이 주문/체결 행보다 먼저 기록됨)
+        for kind, item in batch:
+            rows = [[row] for row in item] if kind == 'trades' else [item]
+            for row in rows:
+                try:
+                    self._write_items([(kind, row)])
+                except Exception as e:
+                    ledger_rows_dropped.inc(kind=kind)
+                    logger.error(f"❌ 원장 기록 누락 ({kind}): {str(e)} - {row}")
+
+    def _write_items(self, batch: List[Tuple[str, Any]]) -> None:
+        signals = [item for kind, item in batch if kind == 'signal']
+        completions = [item for kind, item in batch if kind == 'signal_done']
+        trades = [row for kind, item in batch if kind == 'trades' for row in item]
+        fills = [item for kind, item in batch if kind == 'fill']
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            if signals:
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO signals (signal_id, received_at, symbol, strategy, action, raw_payload)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', signals)
+            if trades:
+                cursor.executemany('''
+                    INSERT INTO trades (
+                        signal_id, session_id, exchange_type, symbol, action, order_kind,
+                        side, position_side, quantity, status, exchange_order_id, fill_price, error,
+                        signal_received_at, requested_at, acked_at, order_latency_ms, signal_latency_ms,
+                        signal_price, sizing_price, sized_at, filled_at, fill_source, fanout_position
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', trades)
+            # 주문 행은 같은 큐에서 먼저 들어오므로 이 배치 또는 이전 배치에 이미 있음
+            if fills:
+                cursor.executemany(
+                    "UPDATE trades SET fill_price = ?, filled_at = ?, fill_source = 'query' "
+                    "WHERE signal_id = ? AND exchange_order_id = ?",
+                    fills
+                )
+            if completions:
+                cursor.executemany(
+                    "UPDATE signals SET session_count = ?, completed_at = ? WHERE signal_id = ?",
+                    completions
+                )
+            conn.commit()
+
+    def flush(self) -> None:
+        """큐에 쌓인 기록이 모두 저장될 때까지 대기 (종료 시)"""
+        if self._thread is not None:
+            self._queue.join()
+
+    # ---- 조회 ----
+
+    def get_signals(self, limit: int = 100, before: Optional[float] = None) -> List[Dict[str, Any]]:
+        """최근 신호 조회 (received_at 내림차순)"""
+        try:
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                query = "SELECT signal_id, received_at, symbol, strategy, action, session_count, completed_at FROM signals"
+                params: List[Any] = []
+                if before is not None:
+                    query += " WHERE received_at < ?"
+                    params.append(before)
+                cursor.execute(query + " ORDER BY received_at DESC LIMIT ?", (*params, min(limit, MAX_LEDGER_PAGE_SIZE)))
+                return [dict(row) for row in cursor.fetchall()]
+
+        except Exception as e:
+            logger.error(f"신호 조회 오류: {str(e)}")
+            return []
+
+    def get_signal(self, signal_id: str) -> Optional[Dict[str, Any]]:
+        """신호 하나와 연결된 세션별 주문 조회"""
+        try:
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT * FROM signals WHERE signal_id = ?", (signal_id,))
+                row = cursor.fetchone()
+                if not row:
+                    return None
+                signal = dict(row)
+                signal['raw_payload'] = json.loads(signal['raw_payload'] or '{}')
+                cursor.execute("SELECT * FROM trades WHERE signal_id = ? ORDER BY id", (signal_id,))
+                signal['trades'] = [dict(trade) for trade in cursor.fetchall()]
+                return signal
+
+        except Exception as e:
+            logger.error(f"신호 상세 조회 오류: {str(e)}")
+            return None
+
+    def get_signal_series(self, strategy: str, symbol: str, start: float, end: float) -> List[Tuple[float, str]]:
+        """전략/심볼의 구간 내 신호 (received_at, action) 목록 (시간순, 백테스트용)"""
+        try:
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT received_at, action FROM signals "
+                    "WHERE strategy = ? AND symbol = ? AND received_at >= ? AND received_at < ? ORDER BY received_at",
+                    (strategy, symbol, start, end)
+                )
+                return [(row['received_at'], row['action']) for row in cursor.fetchall()]
+
+        except Exception as e:
+            logger.error(f"신호 구간 조회 오류: {str(e)}")
+            return []
+
+    def get_trades(self, session_id: Optional[str] = None, symbol: Optional[str] = None,
+                   limit: int = 100, before: Optional[float] = None) -> List[Dict[str, Any]]:
+        """세션/심볼별 주문 조회 (requested_at 내림차순, 인덱스 사용)"""
+        conditions = []
+        params: List[Any] = []
+        if before is not None:
+            conditions.append("requested_at < ?")
+            params.append(before)
+        if session_id:
+            conditions.append("session_id = ?")
+            params.append(session_id)
+        if symbol:
+            conditions.append("symbol = ?")
+            params.append(symbol)
+        try:
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+                cursor.execute(
+                    f"SELECT * FROM trades{where} ORDER BY requested_at DESC LIMIT ?",
+                    (*params, min(limit, MAX_LEDGER_PAGE_SIZE))
+                )
+                return [dict(row) for row in cursor.fetchall()]
+
+        except Exception as e:
+            logger.error(f"주문 원장 조회 오류: {str(e)}")
+            return []
+
+# 전역 서비스 인스턴스
+ledger_service = LedgerService()
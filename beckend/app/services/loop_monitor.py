@@ -0,0 +1,168 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+from typing import Dict, Any, List, Optional
+from app.core.config import get_settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+loop_lag_ms = registry.histogram("event_loop_lag_ms", "Event loop scheduling lag (ms)")
+loop_lag_last_ms = registry.gauge("event_loop_lag_last_ms", "Most recent event loop scheduling lag (ms)")
+loop_blocks = registry.counter(
+    "event_loop_blocks_total", "Event loop stalls over the threshold by blocking code site", ("site",)
+)
+loop_block_ms = registry.histogram("event_loop_block_ms", "Duration of event loop stalls over the threshold (ms)")
+
+# 차단 위치로 보고할 애플리케이션 코드 경로 (app 패키지)
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+def _blocking_site(stack: traceback.StackSummary) -> str:
+    """스택에서 가장 안쪽의 애플리케이션 코드 위치 (없으면 가장 안쪽 프레임)"""
+    for frame in reversed(stack):
+        if frame.filename.startswith(_APP_ROOT):
+            return f"{os.path.relpath(frame.filename, os.path.dirname(_APP_ROOT))}:{frame.lineno} {frame.name}"
+    frame = stack[-1]
+    return f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+
+
+class LoopLagMonitor:
+    """이벤트 루프 스케줄링 지연 측정과 루프를 막는 코드 추적
+
+    루프 안의 측정 작업은 일정 주기로 잠들었다 깨어나면서 예정보다 늦은 만큼을 지연으로 기록하고
+    마지막으로 깨어난 시각(heartbeat)을 남깁니다. 별도 감시 스레드는 heartbeat가 임계값 이상
+    멈추면 그 순간 루프 스레드의 스택을 캡처해 차단 위치를 집계하고, heartbeat가 다시 움직이면
+    실제로 멈춘 시간을 기록합니다. 경고 로그는 일정 간격으로 제한합니다.
+    """
+
+    def __init__(self):
+        self.interval_seconds = settings.loop_lag_interval_seconds
+        self.threshold_ms = settings.loop_block_threshold_ms
+        self.log_interval_seconds = settings.loop_block_log_interval_seconds
+        self.events: deque = deque(maxlen=settings.loop_block_events_kept)
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = 0.0
+        self._last_log = 0.0
+        self._suppressed = 0
+
+    def start(self) -> None:
+        if self.interval_seconds <= 0 or self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+        if self.threshold_ms > 0:
+            self._stop.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+        logger.info("⏱️ 이벤트 루프 지연 측정 시작")
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval_seconds
+            await asyncio.sleep(self.interval_seconds)
+            self._heartbeat = time.monotonic()
+            lag_ms = max(0.0, (loop.time() - expected) * 1000)
+            loop_lag_ms.observe(lag_ms)
+            loop_lag_last_ms.set(round(lag_ms, 3))
+
+    def _watch(self) -> None:
+        """감시 스레드: heartbeat가 (주기 + 임계값) 이상 멈추면 멈춘 구간마다 한 번 스택 캡처,
+        heartbeat가 다시 움직이면 그 구간의 실제 차단 시간 기록"""
+        check_seconds = max(min(self.interval_seconds, self.threshold_ms / 1000) / 2, 0.005)
+        # 진행 중인 차단: (멈춘 heartbeat, 이벤트, 스택)
+        blocked = None
+        while not self._stop.wait(check_seconds):
+            beat = self._heartbeat
+            if blocked is not None and beat != blocked[0]:
+                self._finish_block(blocked[0], beat, blocked[1], blocked[2])
+                blocked = None
+            stalled_ms = (time.monotonic() - beat - self.interval_seconds) * 1000
+            if stalled_ms < self.threshold_ms or blocked is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            blocked = (beat, self._record_block(stalled_ms, stack), stack)
+
+    def _record_block(self, stalled_ms: float, stack: traceback.StackSummary) -> Dict[str, Any]:
+        """임계값을 넘은 순간의 차단 위치 기록 (차단 시간은 루프가 다시 돌면 갱신)"""
+        site = _blocking_site(stack)
+        loop_blocks.inc(site=site)
+        event = {
+            'ts': time.time(),
+            'stalled_ms': round(stalled_ms, 3),
+            'ongoing': True,
+            'site': site,
+            'stack': [f"{frame.filename}:{frame.lineno} {frame.name}" for frame in stack[-15:]],
+        }
+        self.events.append(event)
+        return event
+
+    def _finish_block(self, beat: float, resumed_beat: float, event: Dict[str, Any],
+                      stack: traceback.StackSummary) -> None:
+        """루프가 다시 돈 시점에 실제 차단 시간으로 이벤트를 갱신하고 경고 로그"""
+        stalled_ms = max(0.0, (resumed_beat - beat - self.interval_seconds) * 1000)
+        event['stalled_ms'] = round(stalled_ms, 3)
+        event['ongoing'] = False
+        loop_block_ms.observe(stalled_ms)
+        site = event['site']
+
+        # 로그는 간격 제한 (그 사이 건수는 다음 로그에 합산)
+        now = time.monotonic()
+        if now - self._last_log < self.log_interval_seconds:
+            self._suppressed += 1
+            return
+        suppressed, self._suppressed = self._suppressed, 0
+        self._last_log = now
+        logger.warning(
+            f"🐢 이벤트 루프 {stalled_ms:.0f}ms 차단: {site}"
+            + (f" (직전 로그 이후 {suppressed}건 생략)" if suppressed else "")
+            + "\n" + "".join(traceback.format_list(stack[-8:]))
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """지연 백분위/최대값, 차단 시간 분포, 차단 위치별 횟수, 최근 차단 이벤트"""
+        lag = loop_lag_ms.get().snapshot()
+        blocks = loop_block_ms.get().snapshot()
+        sites: List[Dict[str, Any]] = sorted(
+            ({'site': labels['site'], 'count': int(count)} for labels, count in loop_blocks.samples()),
+            key=lambda item: item['count'], reverse=True
+        )
+        return {
+            'interval_seconds': self.interval_seconds,
+            'threshold_ms': self.threshold_ms,
+            'lag_ms': {key: lag[key] for key in ('count', 'avg', 'p50', 'p95', 'p99', 'max')},
+            'block_ms': {key: blocks[key] for key in ('count', 'avg', 'p50', 'p95', 'p99', 'max')},
+            'blocking_sites': sites,
+            'recent_blocks': list(self.events),
+        }
+
+# 전역 모니터 인스턴스
+loop_lag_monitor = LoopLagMonitor()
@@ -0,0 +1,413 @@
+import csv
+import json
+import math
+import time
+import random
+import asyncio
+import bisect
+import logging
+import itertools
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Any, List, Optional, Tuple
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# BingX 오류 코드 (모의 거래소에서 같은 코드로 응답)
+ERROR_INSUFFICIENT_MARGIN = 101204
+ERROR_NO_POSITION = 101205
+ERROR_INVALID_PARAM = 109400
+ERROR_SIMULATED = 100500
+
+
+class PriceFeed:
+    """심볼별 가격 피드
+
+    ticks_path의 CSV(timestamp,symbol,price)에 있는 심볼은 기록된 틱을 피드 시작 시점부터
+    실제 시간 간격대로 반복 재생하고, 나머지 심볼은 기하 브라운 운동으로 합성합니다.
+    """
+
+    def __init__(self, ticks_path: str = "", initial_price: float = 100.0,
+                 volatility_per_second: float = 0.0005, seed: Optional[int] = None):
+        self.initial_price = initial_price
+        self.volatility = volatility_per_second
+        self.random = random.Random(seed)
+        self.started_at = time.time()
+        # 심볼 -> (틱 시각 오프셋 목록, 가격 목록)
+        self.recorded: Dict[str, Tuple[List[float], List[float]]] = {}
+        # 심볼 -> [가격, 갱신 시각]
+        self.synthetic: Dict[str, List[float]] = {}
+        if ticks_path:
+            self._load_ticks(ticks_path)
+
+    def _load_ticks(self, path: str) -> None:
+        series: Dict[str, List[Tuple[float, float]]] = {}
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                series.setdefault(row['symbol'], []).append((float(row['timestamp']), float(row['price'])))
+        for symbol, ticks in series.items():
+            ticks.sort()
+            origin = ticks[0][0]
+            self.recorded[symbol] = ([ts - origin for ts, _ in ticks], [price for _, price in ticks])
+        logger.info(f"모의 거래소 틱 로드: {path} ({len(self.recorded)}개 심볼)")
+
+    def set_price(self, symbol: str, price: float) -> None:
+        """합성 가격을 지정값으로 설정 (시나리오 테스트용)"""
+        self.synthetic[symbol] = [price, time.time()]
+
+    def price(self, symbol: str, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        recorded = self.recorded.get(symbol)
+        if recorded:
+            offsets, prices = recorded
+            span = offsets[-1] or 1.0
+            index = bisect.bisect_right(offsets, (now - self.started_at) % span) - 1
+            return prices[max(index, 0)]
+
+        state = self.synthetic.get(symbol)
+        if state is None:
+            state = self.synthetic[symbol] = [self.initial_price, now]
+        elapsed = now - state[1]
+        if elapsed > 0:
+            sigma = self.volatility * math.sqrt(elapsed)
+            state[0] *= math.exp(sigma * self.random.gauss(0.0, 1.0) - sigma * sigma / 2)
+            state[1] = now
+        return state[0]
+
+
+@dataclass
+class PaperPosition:
+    symbol: str
+    side: str
+    amount: float = 0.0
+    entry_price: float = 0.0
+    leverage: int = 1
+    realised: float = 0.0
+    take_profit: Optional[float] = None
+    stop_loss: Optional[float] = None
+
+    def unrealized(self, price: float) -> float:
+        direction = 1.0 if self.side == 'LONG' else -1.0
+        return (price - self.entry_price) * self.amount * direction
+
+    def margin(self) -> float:
+        return self.entry_price * self.amount / max(self.leverage, 1)
+
+
+@dataclass
+class PaperAccount:
+    wallet: float
+    positions: Dict[Tuple[str, str], PaperPosition] = field(default_factory=dict)
+    leverage: Dict[Tuple[str, str], int] = field(default_factory=dict)
+    # 최근 체결 (익절/손절 발동 포함)과 주문 ID별 주문 조회용 기록. 둘 다 paper_max_fills_per_account개까지만 보관
+    fills: Deque[Dict[str, Any]] = field(
+        default_factory=lambda: deque(maxlen=settings.paper_max_fills_per_account)
+    )
+    orders: "OrderedDict[str, Dict[str, Any]]" = field(default_factory=OrderedDict)
+
+    def record_fill(self, record: Dict[str, Any]) -> None:
+        self.fills.append(record)
+        order_id = record.get('orderId')
+        if order_id is not None:
+            self.orders[str(order_id)] = record
+            if len(self.orders) > settings.paper_max_fills_per_account:
+                self.orders.popitem(last=False)
+
+
+class PaperExchange:
+    """BingX 무기한 선물 API를 흉내 내는 모의 거래소
+
+    BingXClient가 사용하는 잔고/계정/포지션/현재가/레버리지/주문 엔드포인트를 같은 응답 형식으로
+    제공합니다. 시장가 주문은 현재가에 슬리피지를 더해 즉시 체결하고, 주문에 붙은
+    TAKE_PROFIT_MARKET/STOP_MARKET은 해당 계정 요청이 들어올 때마다 가격을 확인해 발동합니다.
+    응답 지연과 오류율은 설정값으로 조절합니다.
+    """
+
+    def __init__(self, feed: Optional[PriceFeed] = None):
+        self.feed = feed or PriceFeed(
+            ticks_path=settings.paper_ticks_path,
+            initial_price=settings.paper_initial_price,
+            volatility_per_second=settings.paper_price_volatility_per_second,
+            seed=settings.paper_seed,
+        )
+        self.random = random.Random(settings.paper_seed)
+        self.accounts: Dict[str, PaperAccount] = {}
+        self._order_ids = itertools.count(int(time.time() * 1000))
+        self.request_count = 0
+        self.error_count = 0
+        self._routes = {
+            ('GET', '/openApi/swap/v2/user/balance'): self._get_balance,
+            ('GET', '/openApi/swap/v2/user/account'): self._get_account,
+            ('GET', '/openApi/swap/v2/user/positions'): self._get_positions,
+            ('GET', '/openApi/swap/v2/quote/price'): self._get_price,
+            ('POST', '/openApi/swap/v2/trade/leverage'): self._set_leverage,
+            ('POST', '/openApi/swap/v2/trade/order'): self._place_order,
+            ('GET', '/openApi/swap/v2/trade/order'): self._get_order,
+        }
+
+    def reset(self) -> None:
+        """모든 모의 계정 초기화"""
+        self.accounts.clear()
+        self.request_count = 0
+        self.error_count = 0
+
+    def _account(self, api_key: str) -> PaperAccount:
+        account = self.accounts.get(api_key)
+        if account is None:
+            account = self.accounts[api_key] = PaperAccount(wallet=settings.paper_initial_balance)
+        return account
+
+    def _latency(self) -> float:
+        """응답 지연 (초): 기본 지연 + 지수분포 지터"""
+        jitter = self.random.expovariate(1 / settings.paper_latency_jitter_ms) if settings.paper_latency_jitter_ms > 0 else 0.0
+        return (settings.paper_latency_ms + jitter) / 1000
+
+    async def request(self, api_key: str, method: str, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """BingX 형식({'code', 'msg', 'data'}) 응답 반환"""
+        self.request_count += 1
+        delay = self._latency()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if settings.paper_error_rate > 0 and self.random.random() < settings.paper_error_rate:
+            self.error_count += 1
+            return {'code': ERROR_SIMULATED, 'msg': 'simulated exchange error'}
+
+        handler = self._routes.get((method.upper(), path))
+        if handler is None:
+            return {'code': ERROR_INVALID_PARAM, 'msg': f'unsupported endpoint: {method} {path}'}
+        account = self._account(api_key)
+        self._check_triggers(account)
+        try:
+            return handler(account, params)
+        except (KeyError, TypeError, ValueError) as e:
+            return {'code': ERROR_INVALID_PARAM, 'msg': f'invalid parameter: {str(e)}'}
+
+    # ---- 체결 ----
+
+    def _fill_price(self, symbol: str, side: str) -> float:
+        """시장가 체결가 (매수는 위로, 매도는 아래로 슬리피지)"""
+        slippage = settings.paper_slippage_bps / 10000
+        price = self.feed.price(symbol)
+        return price * (1 + slippage) if side == 'BUY' else price * (1 - slippage)
+
+    def _close(self, account: PaperAccount, position: PaperPosition, quantity: float, price: float) -> float:
+        # 포지션 조회 응답의 소수점 반올림 오차는 전량 종료로 처리
+        if quantity >= position.amount - 1e-8:
+            quantity = position.amount
+        direction = 1.0 if position.side == 'LONG' else -1.0
+        pnl = (price - position.entry_price) * quantity * direction
+        fee = price * quantity * settings.paper_taker_fee_rate
+        account.wallet += pnl - fee
+        position.realised += pnl - fee
+        position.amount -= quantity
+        if position.amount <= 0:
+            del account.positions[(position.symbol, position.side)]
+        return quantity
+
+    def _check_triggers(self, account: PaperAccount) -> None:
+        """익절/손절 조건 확인 후 발동된 포지션 시장가 종료"""
+        for position in list(account.positions.values()):
+            if position.take_profit is None and position.stop_loss is None:
+                continue
+            price = self.feed.price(position.symbol)
+            is_long = position.side == 'LONG'
+            hit_tp = position.take_profit is not None and (price >= position.take_profit if is_long else price <= position.take_profit)
+            hit_sl = position.stop_loss is not None and (price <= position.stop_loss if is_long else price >= position.stop_loss)
+            if hit_tp or hit_sl:
+                close_side = 'SELL' if is_long else 'BUY'
+                fill = self._fill_price(position.symbol, close_side)
+                quantity = self._close(account, position, position.amount, fill)
+                account.record_fill({
+                    'symbol': position.symbol, 'side': close_side, 'positionSide': position.side,
+                    'type': 'TAKE_PROFIT_MARKET' if hit_tp else 'STOP_MARKET',
+                    'quantity': quantity, 'price': fill, 'time': time.time(),
+                })
+
+    # ---- 엔드포인트 ----
+
+    def _summary(self, account: PaperAccount) -> Dict[str, float]:
+        unrealized = sum(p.unrealized(self.feed.price(p.symbol)) for p in account.positions.values())
+        used_margin = sum(p.margin() for p in account.positions.values())
+        return {
+            'wallet': account.wallet,
+            'unrealized': unrealized,
+            'used_margin': used_margin,
+            'available': account.wallet + min(unrealized, 0.0) - used_margin,
+        }
+
+    def _get_account(self, account: PaperAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        summary = self._summary(account)
+        return {'code': 0, 'msg': '', 'data': {
+            'asset': 'VST',
+            'totalWalletBalance': f"{summary['wallet']:.8f}",
+            'availableBalance': f"{summary['available']:.8f}",
+            'frozenBalance': '0',
+            'usedMargin': f"{summary['used_margin']:.8f}",
+            'unrealizedProfit': f"{summary['unrealized']:.8f}",
+            'equity': f"{summary['wallet'] + summary['unrealized']:.8f}",
+        }}
+
+    def _get_balance(self, account: PaperAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        summary = self._summary(account)
+        return {'code': 0, 'msg': '', 'data': {'balance': {
+            'asset': 'VST',
+            'balance': f"{summary['wallet']:.8f}",
+            'equity': f"{summary['wallet'] + summary['unrealized']:.8f}",
+            'unrealizedProfit': f"{summary['unrealized']:.8f}",
+            'availableMargin': f"{summary['available']:.8f}",
+            'usedMargin': f"{summary['used_margin']:.8f}",
+            'freezedMargin': '0',
+        }}}
+
+    def _get_positions(self, account: PaperAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        symbol = params.get('symbol')
+        data = []
+        for position in account.positions.values():
+            if symbol and position.symbol != symbol:
+                continue
+            price = self.feed.price(position.symbol)
+            data.append({
+                'symbol': position.symbol,
+                'positionSide': position.side,
+                'isolated': False,
+                'positionAmt': f"{position.amount:.8f}",
+                'availableAmt': f"{position.amount:.8f}",
+                'avgPrice': f"{position.entry_price:.8f}",
+                'entryPrice': f"{position.entry_price:.8f}",
+                'markPrice': f"{price:.8f}",
+                'unrealizedProfit': f"{position.unrealized(price):.8f}",
+                'realisedProfit': f"{position.realised:.8f}",
+                'initialMargin': f"{position.margin():.8f}",
+                'leverage': position.leverage,
+            })
+        return {'code': 0, 'msg': '', 'data': data}
+
+    def _get_price(self, account: PaperAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        symbol = params['symbol']
+        return {'code': 0, 'msg': '', 'data': {
+            'symbol': symbol,
+            'price': f"{self.feed.price(symbol):.8f}",
+            'time': int(time.time() * 1000),
+        }}
+
+    def _set_leverage(self, account: PaperAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        symbol, side, leverage = params['symbol'], params['side'], int(params['leverage'])
+        if leverage < 1:
+            raise ValueError('leverage must be >= 1')
+        account.leverage[(symbol, side)] = leverage
+        return {'code': 0, 'msg': '', 'data': {'symbol': symbol, 'side': side, 'leverage': leverage}}
+
+    def _place_order(self, account: PaperAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        symbol, side, position_side = params['symbol'], params['side'], params['positionSide']
+        quantity = float(params['quantity'])
+        if params.get('type', 'MARKET') != 'MARKET':
+            return {'code': ERROR_INVALID_PARAM, 'msg': 'only MARKET orders are supported'}
+        if quantity <= 0 or side not in ('BUY', 'SELL') or position_side not in ('LONG', 'SHORT'):
+            raise ValueError('quantity/side/positionSide')
+
+        fill = self._fill_price(symbol, side)
+        position = account.positions.get((symbol, position_side))
+        is_open = (side == 'BUY') == (position_side == 'LONG')
+
+        if is_open:
+            leverage = account.leverage.get((symbol, position_side), 1)
+            fee = fill * quantity * settings.paper_taker_fee_rate
+            if self._summary(account)['available'] < fill * quantity / leverage + fee:
+                return {'code': ERROR_INSUFFICIENT_MARGIN, 'msg': 'Insufficient margin'}
+            if position is None:
+                position = account.positions[(symbol, position_side)] = PaperPosition(symbol, position_side)
+            total = position.amount + quantity
+            position.entry_price = (position.entry_price * position.amount + fill * quantity) / total
+            position.amount = total
+            position.leverage = leverage
+            account.wallet -= fee
+            position.realised -= fee
+            if params.get('takeProfit'):
+                position.take_profit = float(json.loads(params['takeProfit'])['stopPrice'])
+            if params.get('stopLoss'):
+                position.stop_loss = float(json.loads(params['stopLoss'])['stopPrice'])
+        else:
+            if position is None:
+                return {'code': ERROR_NO_POSITION, 'msg': 'No position to close'}
+            quantity = self._close(account, position, quantity, fill)
+
+        order_id = next(self._order_ids)
+        record = {
+            'orderId': order_id, 'symbol': symbol, 'side': side, 'positionSide': position_side,
+            'type': 'MARKET', 'origQty': params['quantity'], 'quantity': quantity, 'price': fill,
+            'time': time.time(),
+        }
+        account.record_fill(record)
+        return {'code': 0, 'msg': '', 'data': {'order': self._order_view(record)}}
+
+    def _get_order(self, account: PaperAccount, params: Dict[str, Any]) -> Dict[str, Any]:
+        order_id = str(params['orderId'])
+        record = account.orders.get(order_id)
+        if record is not None:
+            return {'code': 0, 'msg': '', 'data': {'order': self._order_view(record)}}
+        return {'code': ERROR_INVALID_PARAM, 'msg': f'order not found: {order_id}'}
+
+    @staticmethod
+    def _order_view(record: Dict[str, Any]) -> Dict[str, Any]:
+        """체결 기록 -> BingX 주문 응답 형식"""
+        return {
+            'orderId': record['orderId'],
+            'symbol': record['symbol'],
+            'side': record['side'],
+            'positionSide': record['positionSide'],
+            'type': record['type'],
+            'origQty': record['origQty'],
+            'executedQty': f"{record['quantity']:.8f}",
+            'avgPrice': f"{record['price']:.8f}",
+            'status': 'FILLED',
+            'updateTime': int(record['time'] * 1000),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'accounts': len(self.accounts),
+            'open_positions': sum(len(account.positions) for account in self.accounts.values()),
+            'requests': self.request_count,
+            'simulated_errors': self.error_count,
+        }
+
+
+def create_app():
+    """모의 거래소를 BingX와 같은 경로의 HTTP 서버로 제공 (여러 프로세스가 같은 모의 계정을 공유할 때)
+
+    실행: python -m app.services.paper_exchange --port 8700
+    서버 측에서는 paper_exchange_url을 비워 두고, 앱 쪽에서 paper_exchange_url을 이 주소로 설정합니다.
+    """
+    from fastapi import FastAPI, Request
+
+    app = FastAPI(title="Paper BingX")
+
+    @app.api_route("/openApi/{path:path}", methods=["GET", "POST"])
+    async def handle(path: str, request: Request) -> Dict[str, Any]:
+        params = {key: value for key, value in request.query_params.items() if key not in ('timestamp', 'signature')}
+        return await paper_exchange.request(
+            request.headers.get('X-BX-APIKEY', ''), request.method, f"/openApi/{path}", params
+        )
+
+    @app.get("/paper/stats")
+    async def get_stats() -> Dict[str, Any]:
+        return paper_exchange.stats()
+
+    return app
+
+# 전역 모의 거래소 인스턴스
+paper_exchange = PaperExchange()
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="모의 BingX 거래소 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8700)
+    args = parser.parse_args()
+    uvicorn.run(create_app(), host=args.host, port=args.port)
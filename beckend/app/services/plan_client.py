@@ -0,0 +1,51 @@
+import time
+from typing import Dict, Any, List, Optional
+
+
+class PlanClient:
+    """드라이런(plan) 모드용 BingXClient 대체 클라이언트
+
+    현재가/포지션 조회는 미리 주어진 캐시 값으로 응답하고, 레버리지 설정과 주문은 거래소로 보내지 않고
+    calls에 기록만 합니다. 응답 형식은 BingX와 같아서 웹훅/매매 로직을 그대로 실행할 수 있습니다.
+    """
+
+    dry_run = True
+
+    def __init__(self, prices: Dict[str, float], positions: Optional[List[Dict[str, Any]]] = None):
+        self.prices = prices
+        self.positions = positions or []
+        self.calls: List[Dict[str, Any]] = []
+
+    async def get_ticker(self, symbol: str) -> Dict:
+        if symbol not in self.prices:
+            raise Exception(f"{symbol} 캐시 가격이 없습니다.")
+        return {'code': 0, 'msg': '', 'data': {'symbol': symbol, 'price': str(self.prices[symbol])}}
+
+    async def get_positions(self, symbol: str = None) -> Dict:
+        data = [position for position in self.positions if not symbol or position.get('symbol') == symbol]
+        return {'code': 0, 'msg': '', 'data': data}
+
+    async def set_leverage(self, symbol: str, leverage: int, side: str) -> Dict:
+        self.calls.append({'type': 'set_leverage', 'symbol': symbol, 'leverage': leverage, 'side': side})
+        return {'code': 0, 'msg': '', 'data': {'symbol': symbol, 'leverage': leverage, 'side': side}}
+
+    async def place_order(self, **params) -> Dict:
+        self.calls.append({'type': 'order', 'params': params, 'planned_at': time.time()})
+        return {'code': 0, 'msg': '', 'data': {'order': {**params, 'orderId': None, 'status': 'PLANNED'}}}
+
+
+def positions_from_snapshot(snapshot: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """자산 스냅샷의 포지션 목록을 BingX 포지션 조회 응답 형식으로 변환"""
+    if not snapshot:
+        return []
+    return [
+        {
+            'symbol': position.get('symbol'),
+            'positionSide': position.get('side'),
+            'positionAmt': str(abs(float(position.get('size') or 0))),
+            'avgPrice': str(position.get('entry_price') or 0),
+            'unrealizedProfit': str(position.get('unrealized_pnl') or 0),
+            'leverage': position.get('leverage'),
+        }
+        for position in snapshot.get('positions') or []
+    ]
@@ -0,0 +1,234 @@
+import io
+import os
+import sys
+import time
+import uuid
+import pstats
+import cProfile
+import asyncio
+import logging
+import marshal
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# 다운로드 형식별 (미디어 타입, 파일 확장자)
+ARTIFACT_FORMATS = {
+    'pstats': ('application/octet-stream', 'prof'),
+    'text': ('text/plain; charset=utf-8', 'txt'),
+    'collapsed': ('text/plain; charset=utf-8', 'collapsed.txt'),
+}
+
+
+class ProfilerBusyError(Exception):
+    """이미 프로파일링이 진행 중"""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class ProfilerService:
+    """운영 중 켜고 끄는 프로파일러 (한 번에 하나)
+
+    - requests: 다음 N개 웹훅 요청이 처리되는 동안 이벤트 루프 스레드에 cProfile 적용
+      (첫 요청 시작 ~ N번째 요청 완료 구간. 그 사이 같은 루프에서 돈 다른 작업도 포함). 결과는 pstats/text
+    - sample: T초 동안 별도 스레드가 일정 간격으로 루프 스레드의 스택을 수집. 결과는 collapsed stack
+      (flamegraph.pl / speedscope 입력 형식)
+
+    꺼져 있을 때 웹훅 경로의 비용은 armed 속성 확인 한 번이고, 샘플링은 웹훅 코드를 건드리지 않습니다.
+    샤드 워커 프로세스에서 실행되는 세션 매매는 포함되지 않습니다.
+    """
+
+    def __init__(self):
+        self.max_requests = settings.profile_max_requests
+        self.max_seconds = settings.profile_max_seconds
+        self.artifacts: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.armed = False
+        self._current: Optional[Dict[str, Any]] = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._remaining = 0
+        self._in_flight = 0
+        self._timeout: Optional[asyncio.TimerHandle] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # 샘플링 결과는 샘플링 스레드에서 저장하므로 결과 목록 접근은 락으로 보호
+        self._lock = threading.Lock()
+
+    # ---- 시작 ----
+
+    def _begin(self, mode: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        if self._current is not None:
+            raise ProfilerBusyError(f"프로파일링이 이미 진행 중입니다: {self._current['id']}")
+        self._current = {
+            'id': uuid.uuid4().hex[:12], 'mode': mode, 'params': params,
+            'started_at': time.time(), 'finished_at': None,
+        }
+        return self._current
+
+    def start_requests(self, count: int) -> Dict[str, Any]:
+        """다음 count개 웹훅 요청 프로파일링 (max_seconds 안에 다 오지 않으면 그때까지 결과로 종료)"""
+        count = max(1, min(count, self.max_requests))
+        current = self._begin('requests', {'count': count})
+        current['requests'] = 0
+        self._profile = cProfile.Profile()
+        self._remaining = count
+        self._in_flight = 0
+        self._timeout = asyncio.get_running_loop().call_later(self.max_seconds, self._finish_requests)
+        self.armed = True
+        logger.info(f"🔬 웹훅 요청 프로파일링 시작: 다음 {count}건 ({current['id']})")
+        return self.status()
+
+    def start_sampling(self, seconds: float, interval_ms: float) -> Dict[str, Any]:
+        """seconds초 동안 루프 스레드 스택 샘플링 (현재 스레드가 루프 스레드여야 함)"""
+        seconds = max(0.1, min(seconds, self.max_seconds))
+        interval = max(interval_ms, 1.0) / 1000
+        current = self._begin('sample', {'seconds': seconds, 'interval_ms': interval * 1000})
+        current['samples'] = 0
+        self._stop.clear()
+        self._sampler = threading.Thread(
+            target=self._sample, args=(threading.get_ident(), seconds, interval), name="profile-sampler", daemon=True
+        )
+        self._sampler.start()
+        logger.info(f"🔬 루프 스택 샘플링 시작: {seconds}초, {interval * 1000:.1f}ms 간격 ({current['id']})")
+        return self.status()
+
+    def cancel(self) -> None:
+        """진행 중인 프로파일링을 지금까지의 결과로 종료"""
+        if self._current is None:
+            return
+        if self._current['mode'] == 'requests':
+            self._finish_requests()
+        else:
+            self._stop.set()
+            self._sampler.join(timeout=5)
+
+    # ---- 요청 모드 (웹훅 핸들러에서 호출) ----
+
+    def begin_request(self) -> Optional[cProfile.Profile]:
+        """이번 요청을 프로파일링하면 프로파일 객체 반환 (end_request에 그대로 넘김)"""
+        if not self.armed or self._remaining <= 0:
+            return None
+        self._remaining -= 1
+        if self._remaining == 0:
+            self.armed = False
+        if self._in_flight == 0:
+            self._profile.enable()
+        self._in_flight += 1
+        return self._profile
+
+    def end_request(self, profile: cProfile.Profile) -> None:
+        # 시간 초과/취소로 이미 끝난 프로파일링이면 무시
+        if profile is not self._profile:
+            return
+        self._in_flight -= 1
+        self._current['requests'] += 1
+        if self._in_flight == 0:
+            self._profile.disable()
+            if self._remaining == 0:
+                self._finish_requests()
+
+    def _finish_requests(self) -> None:
+        if self._current is None or self._current['mode'] != 'requests':
+            return
+        self.armed = False
+        if self._timeout is not None:
+            self._timeout.cancel()
+            self._timeout = None
+        profile, self._profile = self._profile, None
+        current = self._current
+        try:
+            profile.create_stats()
+            if not profile.stats:
+                # 웹훅 요청이 오기 전에 시간 초과/취소된 경우 (pstats.Stats는 빈 프로파일을 받지 않음)
+                self._store({'text': "프로파일링 구간에 처리된 웹훅 요청이 없습니다.\n".encode('utf-8')})
+                return
+            text = io.StringIO()
+            stats = pstats.Stats(profile, stream=text)
+            stats.sort_stats('cumulative').print_stats(60)
+            # pstats.Stats.dump_stats와 같은 형식 (python -m pstats, snakeviz 등으로 열 수 있음)
+            self._store({'pstats': marshal.dumps(stats.stats), 'text': text.getvalue().encode('utf-8')})
+        except Exception as e:
+            logger.error(f"프로파일링 결과 생성 실패: {e}")
+        finally:
+            self._release(current)
+
+    # ---- 샘플링 모드 (샘플링 스레드) ----
+
+    def _sample(self, thread_id: int, seconds: float, interval: float) -> None:
+        current = self._current
+        try:
+            stacks: Counter = Counter()
+            deadline = time.monotonic() + seconds
+            samples = 0
+            while not self._stop.wait(interval) and time.monotonic() < deadline:
+                frame = sys._current_frames().get(thread_id)
+                labels: List[str] = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                if labels:
+                    stacks[';'.join(reversed(labels))] += 1
+                    samples += 1
+                    self._current['samples'] = samples
+            collapsed = '\n'.join(f"{stack} {count}" for stack, count in stacks.most_common())
+            self._store({'collapsed': (collapsed + '\n').encode('utf-8')})
+        except Exception as e:
+            logger.error(f"루프 스택 샘플링 실패: {e}")
+        finally:
+            self._release(current)
+
+    # ---- 결과 ----
+
+    def _store(self, data: Dict[str, bytes]) -> None:
+        with self._lock:
+            current, self._current = self._current, None
+            current['finished_at'] = time.time()
+            current['formats'] = list(data)
+            self.artifacts[current['id']] = {**current, 'data': data}
+            while len(self.artifacts) > settings.profile_artifacts_kept:
+                self.artifacts.popitem(last=False)
+        logger.info(f"🔬 프로파일링 완료: {current['id']} ({current['mode']})")
+
+    def _release(self, current: Optional[Dict[str, Any]]) -> None:
+        """결과 저장에 실패했어도 다음 프로파일링을 시작할 수 있도록 진행 상태 해제 (그 사이 새로 시작한 것은 유지)"""
+        with self._lock:
+            if self._current is current:
+                self._current = None
+
+    def get_artifact(self, profile_id: str, output: Optional[str] = None) -> Optional[Tuple[bytes, str, str]]:
+        """(내용, 미디어 타입, 파일 이름). 형식을 지정하지 않으면 첫 형식"""
+        with self._lock:
+            artifact = self.artifacts.get(profile_id)
+        if artifact is None:
+            return None
+        output = output or artifact['formats'][0]
+        if output not in artifact['data']:
+            return None
+        media_type, extension = ARTIFACT_FORMATS[output]
+        return artifact['data'][output], media_type, f"profile-{profile_id}.{extension}"
+
+    def status(self) -> Dict[str, Any]:
+        """진행 중인 프로파일링과 내려받을 수 있는 결과 목록"""
+        with self._lock:
+            current = None
+            if self._current is not None:
+                current = {key: value for key, value in self._current.items() if key != 'finished_at'}
+                if current['mode'] == 'requests':
+                    current['remaining'] = self._remaining
+            artifacts = [
+                {key: value for key, value in artifact.items() if key != 'data'}
+                for artifact in reversed(self.artifacts.values())
+            ]
+        return {'active': current, 'artifacts': artifacts}
+
+
+# 전역 프로파일러 인스턴스
+profiler_service = ProfilerService()
@@ -0,0 +1,326 @@
+import os
+import json
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Set, Tuple
+from app.core.config import get_settings
+from app.core.logging_pipeline import setup_logging
+from app.services.bingx import BingXClient
+from app.services.ledger_service import ledger_service
+from app.services.traffic_recorder import traffic_recorder
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# IPC 메시지 헤더: 본문 길이(4바이트, big-endian)
+_HEADER_SIZE = 4
+
+# 종료 시 워커가 진행 중인 작업과 원장 기록을 마칠 때까지 기다리는 최대 시간 (초)
+SHARD_DRAIN_TIMEOUT_SECONDS = 30.0
+
+# 응답을 받지 못한 작업의 원장 확인 간격 (초, 최대 shard_request_timeout_seconds 동안)
+SHARD_RECONCILE_INTERVAL_SECONDS = 5.0
+
+
+class ShardResultUnknown(Exception):
+    """요청은 워커에 전달됐지만 응답을 받지 못함 (주문 실행 여부 알 수 없음)"""
+
+async def _write_message(writer: asyncio.StreamWriter, message: Dict[str, Any]) -> None:
+    """길이 접두 JSON 메시지 전송"""
+    payload = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    writer.write(len(payload).to_bytes(_HEADER_SIZE, 'big') + payload)
+    await writer.drain()
+
+async def _read_message(reader: asyncio.StreamReader) -> Optional[Dict[str, Any]]:
+    """길이 접두 JSON 메시지 수신 (연결 종료 시 None)"""
+    try:
+        header = await reader.readexactly(_HEADER_SIZE)
+        payload = await reader.readexactly(int.from_bytes(header, 'big'))
+    except asyncio.IncompleteReadError:
+        return None
+    return json.loads(payload.decode('utf-8'))
+
+
+class ConsistentHashRing:
+    """계정 키를 샤드 번호에 고르게 배정하는 일관 해시 링"""
+
+    def __init__(self, shard_count: int, replicas: int = 100):
+        self._ring: List[int] = []
+        self._owners: Dict[int, int] = {}
+        for shard_index in range(shard_count):
+            for replica in range(replicas):
+                point = self._hash(f"shard-{shard_index}#{replica}")
+                self._owners[point] = shard_index
+                self._ring.append(point)
+        self._ring.sort()
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+    def get_shard(self, key: str) -> int:
+        """키가 속한 샤드 번호 반환"""
+        index = bisect.bisect(self._ring, self._hash(key)) % len(self._ring)
+        return self._owners[self._ring[index]]
+
+
+class ShardWorker:
+    """샤드 워커 프로세스: 배정된 계정의 클라이언트와 계정별 실행 레인을 소유"""
+
+    def __init__(self, shard_index: int, socket_path: str):
+        self.shard_index = shard_index
+        self.socket_path = socket_path
+        # 계정 키 -> (시크릿 키 해시, 클라이언트)
+        self.clients: Dict[str, Tuple[str, BingXClient]] = {}
+        self.lanes: Dict[str, asyncio.Lock] = {}
+        self._jobs: Set[asyncio.Task] = set()
+        self._shutdown = asyncio.Event()
+        self._drained = asyncio.Event()
+
+    def _get_client(self, account_key: str, user_settings: Dict[str, Any]) -> BingXClient:
+        """계정별 BingX 클라이언트 (워커 수명 동안 재사용, 시크릿 키가 바뀌면 새로 만듦)"""
+        secret_hash = hashlib.sha256(user_settings['secretKey'].encode('utf-8')).hexdigest()
+        cached = self.clients.get(account_key)
+        if cached is not None and cached[0] == secret_hash:
+            return cached[1]
+        client = BingXClient()
+        client.set_credentials(
+            api_key=user_settings['apiKey'],
+            secret_key=user_settings['secretKey'],
+            exchange_type=user_settings.get('exchangeType', 'demo')
+        )
+        self.clients[account_key] = (secret_hash, client)
+        return client
+
+    async def _run_job(self, symbol: str, action: str, job: Dict[str, Any],
+                       signal: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """세션 하나의 매매 실행 (같은 계정은 레인 락으로 순차 처리)"""
+        from app.api.webhook import execute_trade_for_session
+
+        account_key = job['account_key']
+        client = self._get_client(account_key, job['user_settings'])
+        lane = self.lanes.setdefault(account_key, asyncio.Lock())
+        async with lane:
+            result = await execute_trade_for_session(
+                job['session_id'], symbol, action, job['user_settings'], client=client, signal=signal,
+                fanout_position=job.get('fanout_position')
+            )
+        return {'session_id': job['session_id'], 'result': result}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await _read_message(reader)
+                if request is None:
+                    break
+                if request.get('type') == 'shutdown':
+                    # 진행 중인 작업과 원장 기록을 마친 뒤 응답
+                    self._shutdown.set()
+                    await self._drained.wait()
+                    await _write_message(writer, {'drained': True})
+                    break
+                task = asyncio.ensure_future(asyncio.gather(*[
+                    self._run_job(request['symbol'], request['action'], job, request.get('signal'))
+                    for job in request['jobs']
+                ]))
+                self._jobs.add(task)
+                task.add_done_callback(self._jobs.discard)
+                results = await task
+                await _write_message(writer, {'results': results})
+        except Exception as e:
+            logger.error(f"❌ 샤드 {self.shard_index} 요청 처리 중 오류: {str(e)}")
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        logger.info(f"✅ 샤드 워커 {self.shard_index} 시작: {self.socket_path}")
+        async with server:
+            await self._shutdown.wait()
+            # 새 연결은 받지 않고, 진행 중인 작업이 끝나면 큐에 남은 원장/트래픽 기록을 저장
+            server.close()
+            if self._jobs:
+                await asyncio.wait(list(self._jobs))
+            await asyncio.to_thread(ledger_service.flush)
+            await asyncio.to_thread(traffic_recorder.flush)
+            logger.info(f"✅ 샤드 워커 {self.shard_index} 종료 (진행 중 작업/원장 기록 완료)")
+            self._drained.set()
+            # 종료 응답을 보낼 시간
+            await asyncio.sleep(0.1)
+
+
+def _shard_worker_main(shard_index: int, socket_path: str) -> None:
+    """샤드 워커 프로세스 진입점"""
+    setup_logging()
+    asyncio.run(ShardWorker(shard_index, socket_path).serve())
+
+
+class ShardDispatcher:
+    """웹훅 세션을 계정 기준으로 샤드 워커 프로세스에 분배하고 결과를 모으는 디스패처"""
+
+    def __init__(self, shard_count: int = 0):
+        self.shard_count = shard_count
+        self.ring = ConsistentHashRing(shard_count) if shard_count > 0 else None
+        self.socket_paths: List[str] = []
+        self.processes: List[multiprocessing.Process] = []
+        self._reconcile_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.processes)
+
+    async def start(self, startup_timeout: float = 10.0) -> None:
+        """샤드 워커 프로세스 시작 (소켓이 열릴 때까지 대기)"""
+        if self.shard_count <= 0 or self.processes:
+            return
+
+        os.makedirs(settings.shard_socket_dir, mode=0o700, exist_ok=True)
+        context = multiprocessing.get_context('spawn')
+        for shard_index in range(self.shard_count):
+            # 여러 uvicorn 워커가 각자 풀을 띄워도 소켓이 겹치지 않도록 PID 포함
+            socket_path = os.path.join(settings.shard_socket_dir, f"shard-{os.getpid()}-{shard_index}.sock")
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            process = context.Process(
+                target=_shard_worker_main, args=(shard_index, socket_path), daemon=True
+            )
+            process.start()
+            self.socket_paths.append(socket_path)
+            self.processes.append(process)
+
+        deadline = asyncio.get_running_loop().time() + startup_timeout
+        while not all(os.path.exists(path) for path in self.socket_paths):
+            if asyncio.get_running_loop().time() > deadline:
+                logger.error("❌ 샤드 워커 시작 시간 초과")
+                await self.stop()
+                raise RuntimeError("샤드 워커가 시간 내에 시작되지 않았습니다.")
+            await asyncio.sleep(0.05)
+        logger.info(f"✅ 샤드 워커 {self.shard_count}개 시작 완료")
+
+    async def _drain(self, shard_index: int) -> None:
+        """워커에 종료를 요청하고 진행 중인 작업과 원장 기록이 끝날 때까지 대기"""
+        reader, writer = await asyncio.open_unix_connection(self.socket_paths[shard_index])
+        try:
+            await _write_message(writer, {'type': 'shutdown'})
+            await asyncio.wait_for(_read_message(reader), timeout=SHARD_DRAIN_TIMEOUT_SECONDS)
+        finally:
+            writer.close()
+
+    async def stop(self) -> None:
+        """샤드 워커 프로세스 종료 (진행 중인 작업과 큐에 남은 원장 기록을 마친 뒤 종료, 응답이 없으면 강제 종료)"""
+        outcomes = await asyncio.gather(
+            *[self._drain(shard_index) for shard_index in range(len(self.socket_paths))], return_exceptions=True
+        )
+        for shard_index, outcome in enumerate(outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"⚠️ 샤드 {shard_index} 정리 종료 실패, 강제 종료합니다: {str(outcome) or type(outcome).__name__}")
+        for process in self.processes:
+            await asyncio.to_thread(process.join, 5)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=5)
+        for path in self.socket_paths:
+            if os.path.exists(path):
+                os.unlink(path)
+        self.processes = []
+        self.socket_paths = []
+
+    async def _send(self, shard_index: int, request: Dict[str, Any]) -> Dict[str, Any]:
+        reader, writer = await asyncio.open_unix_connection(self.socket_paths[shard_index])
+        try:
+            await _write_message(writer, request)
+            # 요청을 보낸 뒤에는 워커가 주문을 냈을 수 있으므로 응답이 없으면 실패가 아니라 결과 미확인
+            try:
+                response = await asyncio.wait_for(
+                    _read_message(reader), timeout=settings.shard_request_timeout_seconds
+                )
+            except asyncio.TimeoutError:
+                raise ShardResultUnknown(f"{settings.shard_request_timeout_seconds:.0f}초 안에 응답이 없습니다.")
+            except (ConnectionError, OSError) as e:
+                raise ShardResultUnknown(f"응답 수신 중 연결 오류: {str(e)}")
+            if response is None:
+                raise ShardResultUnknown("응답 전에 샤드 워커 연결이 끊어졌습니다.")
+            return response
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    async def dispatch(self, symbol: str, action: str, jobs: List[Dict[str, Any]],
+                       signal: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """세션 작업을 샤드별로 묶어 동시에 전송하고 원래 순서대로 결과 반환
+
+        jobs 항목: {'session_id', 'account_key', 'user_settings', 'fanout_position'}
+        signal: 신호 컨텍스트 (워커에서 원장 기록에 사용)
+        """
+        by_shard: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for job in jobs:
+            by_shard[self.ring.get_shard(job['account_key'])].append(job)
+
+        shard_items = list(by_shard.items())
+        outcomes = await asyncio.gather(*[
+            self._send(shard_index, {'symbol': symbol, 'action': action, 'jobs': shard_jobs, 'signal': signal})
+            for shard_index, shard_jobs in shard_items
+        ], return_exceptions=True)
+
+        results_by_session: Dict[str, Dict[str, Any]] = {}
+        for (shard_index, shard_jobs), outcome in zip(shard_items, outcomes):
+            if isinstance(outcome, ShardResultUnknown):
+                logger.error(f"❌ 샤드 {shard_index} 결과 미확인 ({str(outcome)}) - 원장에서 확인합니다.")
+                for job in shard_jobs:
+                    results_by_session[job['session_id']] = {
+                        'session_id': job['session_id'],
+                        'result': {
+                            'success': False,
+                            'pending': True,
+                            'reason': 'shard_result_unknown',
+                            'message': f"샤드 {shard_index} 응답 없음: 주문 결과를 확인 중입니다 ({str(outcome)})"
+                        }
+                    }
+                if signal is not None:
+                    task = asyncio.create_task(
+                        self._reconcile(shard_index, signal['signal_id'], [job['session_id'] for job in shard_jobs])
+                    )
+                    self._reconcile_tasks.add(task)
+                    task.add_done_callback(self._reconcile_tasks.discard)
+                continue
+            if isinstance(outcome, Exception):
+                logger.error(f"❌ 샤드 {shard_index} 전송 실패: {str(outcome)}")
+                for job in shard_jobs:
+                    results_by_session[job['session_id']] = {
+                        'session_id': job['session_id'],
+                        'result': {'success': False, 'message': f"샤드 {shard_index} 처리 오류: {str(outcome)}"}
+                    }
+                continue
+            for item in outcome['results']:
+                results_by_session[item['session_id']] = item
+
+        return [results_by_session[job['session_id']] for job in jobs]
+
+    async def _reconcile(self, shard_index: int, signal_id: str, session_ids: List[str]) -> None:
+        """응답을 받지 못한 세션의 실제 주문 결과를 워커가 남긴 원장에서 확인해 기록"""
+        remaining = set(session_ids)
+        deadline = asyncio.get_running_loop().time() + settings.shard_request_timeout_seconds
+        while remaining:
+            await asyncio.sleep(SHARD_RECONCILE_INTERVAL_SECONDS)
+            signal = await asyncio.to_thread(ledger_service.get_signal, signal_id)
+            for trade in (signal or {}).get('trades', []):
+                if trade['session_id'] in remaining:
+                    remaining.discard(trade['session_id'])
+                    logger.info(
+                        f"🧾 샤드 {shard_index} 미확인 결과 확인: 세션 {trade['session_id']} 신호 {signal_id} "
+                        f"{trade['kind']} {trade['status']}"
+                    )
+            if asyncio.get_running_loop().time() > deadline:
+                break
+        for session_id in remaining:
+            logger.error(f"❌ 샤드 {shard_index} 결과 확인 실패: 세션 {session_id} 신호 {signal_id} 원장 기록 없음")
+
+# 전역 디스패처 인스턴스
+shard_dispatcher = ShardDispatcher(settings.webhook_shard_workers)
@@ -1,68 +1,127 @@
 import sqlite3
+import json
+import base64
 import logging
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterator, Sequence, Tuple
 from app.core.sqlite_database import sqlite_db
+from app.core.metrics import cache_requests
 
 logger = logging.getLogger(__name__)
 
+# 일괄 업데이트로 변경 가능한 컬럼 (자동매매 on/off 및 리스크 설정)
+BULK_UPDATABLE_COLUMNS = ('is_auto_trading_enabled', 'investment', 'leverage', 'take_profit', 'stop_loss')
+
+# 세션 목록 응답용 컬럼 (API 키/시크릿 제외)
+SESSION_SUMMARY_COLUMNS = (
+    'session_id', 'exchange_type', 'indicator', 'is_auto_trading_enabled',
+    'current_symbol', 'created_at', 'last_activity'
+)
+
+# 웹훅 매매에 필요한 컬럼
+SESSION_TRADING_COLUMNS = (
+    'session_id', 'api_key', 'secret_key', 'exchange_type', 'investment', 'leverage',
+    'take_profit', 'stop_loss', 'indicator', 'is_auto_trading_enabled', 'current_symbol'
+)
+
+def encode_session_cursor(created_at: str, session_id: str) -> str:
+    """키셋 페이지네이션 커서 생성 (created_at, session_id)"""
+    raw = json.dumps([created_at, session_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_session_cursor(cursor: str) -> Tuple[str, str]:
+    """커서 해석 (형식이 잘못되면 ValueError)"""
+    try:
+        created_at, session_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return str(created_at), str(session_id)
+    except Exception:
+        raise ValueError("잘못된 커서입니다.")
+
 class SQLiteSessionService:
     def __init__(self):
         self.db = sqlite_db
+        # 웹훅용 전체 세션 캐시 (user_sessions 테이블 버전이 바뀌면 무효화)
+        self._all_sessions_cache: Optional[List[Dict[str, Any]]] = None
+        self._all_sessions_version: Optional[int] = None
     
     def save_session(self, session_data: Dict[str, Any]) -> bool:
-        """세션 저장 또는 업데이트"""
+        """세션 저장 또는 업데이트 (INSERT ... ON CONFLICT 단일 구문)"""
         try:
             with self.db.get_connection() as conn:
                 cursor = conn.cursor()
+                now = datetime.now()
                 
-                # 기존 세션 확인
-                cursor.execute(
-                    "SELECT session_id FROM user_sessions WHERE session_id = ?",
-                    (session_data['session_id'],)
-                )
-                existing = cursor.fetchone()
-                
-                if existing:
-                    # 기존 세션 업데이트
-                    cursor.execute('''
-                        UPDATE user_sessions SET
-                            api_key = ?, secret_key = ?, exchange_type = ?,
-                            investment = ?, leverage = ?, take_profit = ?, stop_loss = ?,
-                            indicator = ?, is_auto_trading_enabled = ?, current_symbol = ?,
-                            last_activity = ?
-                        WHERE session_id = ?
-                    ''', (
-                        session_data['api_key'], session_data['secret_key'], session_data['exchange_type'],
-                        session_data['investment'], session_data['leverage'], session_data['take_profit'],
-                        session_data['stop_loss'], session_data['indicator'], session_data['is_auto_trading_enabled'],
-                        session_data.get('current_symbol'), datetime.now(), session_data['session_id']
-                    ))
-                    logger.info(f"세션 업데이트: {session_data['session_id']}")
-                else:
-                    # 새 세션 생성
-                    cursor.execute('''
-                        INSERT INTO user_sessions (
-                            session_id, user_email, api_key, secret_key, exchange_type,
-                            investment, leverage, take_profit, stop_loss, indicator,
-                            is_auto_trading_enabled, current_symbol, created_at, last_activity
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        session_data['session_id'], session_data['user_email'], session_data['api_key'],
-                        session_data['secret_key'], session_data['exchange_type'], session_data['investment'],
-                        session_data['leverage'], session_data['take_profit'], session_data['stop_loss'],
-                        session_data['indicator'], session_data['is_auto_trading_enabled'],
-                        session_data.get('current_symbol'), datetime.now(), datetime.now()
-                    ))
-                    logger.info(f"새 세션 생성: {session_data['session_id']}")
+                # 기존 세션이면 user_email/created_at은 유지하고 나머지만 갱신
+                cursor.execute('''
+                    INSERT INTO user_sessions (
+                        session_id, user_email, api_key, secret_key, exchange_type,
+                        investment, leverage, take_profit, stop_loss, indicator,
+                        is_auto_trading_enabled, current_symbol, created_at, last_activity
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(session_id) DO UPDATE SET
+                        api_key = excluded.api_key, secret_key = excluded.secret_key,
+                        exchange_type = excluded.exchange_type, investment = excluded.investment,
+                        leverage = excluded.leverage, take_profit = excluded.take_profit,
+                        stop_loss = excluded.stop_loss, indicator = excluded.indicator,
+                        is_auto_trading_enabled = excluded.is_auto_trading_enabled,
+                        current_symbol = excluded.current_symbol, last_activity = excluded.last_activity
+                ''', (
+                    session_data['session_id'], session_data.get('user_email', 'unknown'), session_data['api_key'],
+                    session_data['secret_key'], session_data['exchange_type'], session_data['investment'],
+                    session_data['leverage'], session_data['take_profit'], session_data['stop_loss'],
+                    session_data['indicator'], session_data['is_auto_trading_enabled'],
+                    session_data.get('current_symbol'), now, now
+                ))
                 
                 conn.commit()
+                logger.info(f"세션 저장: {session_data['session_id']}")
                 return True
                 
         except Exception as e:
             logger.error(f"세션 저장 오류: {str(e)}")
             return False
     
+    def bulk_update_sessions(self, updates: Dict[str, Any], session_ids: Optional[List[str]] = None,
+                             indicator: Optional[str] = None) -> List[Dict[str, Any]]:
+        """여러 세션의 설정을 하나의 트랜잭션으로 일괄 업데이트하고 행별 결과 반환
+        
+        session_ids가 주어지면 해당 세션만, indicator가 주어지면 그 지표의 모든 세션을 대상으로 합니다.
+        하나라도 실패하면 전체가 롤백되고 예외가 발생합니다.
+        """
+        columns = [column for column in updates if column in BULK_UPDATABLE_COLUMNS]
+        if not columns or len(columns) != len(updates):
+            raise ValueError(f"업데이트할 수 없는 필드입니다: {sorted(set(updates) - set(BULK_UPDATABLE_COLUMNS))}")
+        if session_ids is None and indicator is None:
+            raise ValueError("session_ids 또는 indicator가 필요합니다.")
+        
+        set_clause = ", ".join(f"{column} = ?" for column in columns) + ", last_activity = ?"
+        values = [updates[column] for column in columns] + [datetime.now()]
+        
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            results = []
+            
+            if session_ids is not None:
+                for session_id in session_ids:
+                    cursor.execute(
+                        f"UPDATE user_sessions SET {set_clause} WHERE session_id = ?",
+                        (*values, session_id)
+                    )
+                    results.append({
+                        'session_id': session_id,
+                        'status': 'updated' if cursor.rowcount else 'not_found'
+                    })
+            else:
+                cursor.execute(
+                    f"UPDATE user_sessions SET {set_clause} WHERE indicator = ? RETURNING session_id",
+                    (*values, indicator)
+                )
+                results = [{'session_id': row['session_id'], 'status': 'updated'} for row in cursor.fetchall()]
+            
+            conn.commit()
+            logger.info(f"세션 일괄 업데이트: {len(results)}건, 필드={columns}")
+            return results
+    
     def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
         """세션 조회"""
         try:
@@ -157,13 +216,14 @@ class SQLiteSessionService:
             logger.error(f"세션 삭제 오류: {str(e)}")
             return False
     
-    def get_active_sessions(self) -> List[Dict[str, Any]]:
-        """활성 자동매매 세션 조회"""
+    def get_active_sessions(self, columns: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """활성 자동매매 세션 조회 (columns를 주면 해당 컬럼만, 생략하면 전체 컬럼)"""
+        selected = ', '.join(columns) if columns else '*'
         try:
             with self.db.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    "SELECT * FROM user_sessions WHERE is_auto_trading_enabled = TRUE"
+                    f"SELECT {selected} FROM user_sessions WHERE is_auto_trading_enabled = TRUE"
                 )
                 rows = cursor.fetchall()
                 
@@ -174,20 +234,98 @@ class SQLiteSessionService:
             return []
 
     def get_all_sessions(self) -> List[Dict[str, Any]]:
-        """모든 세션 조회 (웹훅용)"""
+        """모든 세션 조회 (웹훅용)
+        
+        다른 워커를 포함해 user_sessions가 바뀌지 않았다면 캐시된 결과를 반환합니다.
+        (신호 선점/리스/원장 등 다른 테이블 쓰기로는 무효화되지 않음)
+        """
         try:
+            # 조회 전에 버전을 읽어야 조회 도중의 변경을 놓치지 않음
+            version = self.db.table_version('user_sessions')
+            if self._all_sessions_cache is not None and version == self._all_sessions_version:
+                cache_requests.inc(cache='sessions', result='hit')
+                return self._all_sessions_cache
+            cache_requests.inc(cache='sessions', result='miss')
+            
             with self.db.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    "SELECT * FROM user_sessions ORDER BY created_at DESC"
+                    f"SELECT {', '.join(SESSION_TRADING_COLUMNS)} FROM user_sessions ORDER BY created_at DESC"
                 )
                 rows = cursor.fetchall()
                 
-                return [dict(row) for row in rows]
+                sessions = [dict(row) for row in rows]
+                self._all_sessions_cache = sessions
+                self._all_sessions_version = version
+                return sessions
                 
         except Exception as e:
             logger.error(f"모든 세션 조회 오류: {str(e)}")
             return []
 
+    def _build_list_query(self, columns: Sequence[str], active_only: bool,
+                          after: Optional[Tuple[str, str]]) -> Tuple[str, List[Any]]:
+        """키셋 페이지네이션 조회문 생성 (created_at DESC, session_id DESC)"""
+        conditions = []
+        params: List[Any] = []
+        if active_only:
+            conditions.append("is_auto_trading_enabled = TRUE")
+        if after is not None:
+            conditions.append("(created_at, session_id) < (?, ?)")
+            params.extend(after)
+        
+        query = f"SELECT {', '.join(columns)} FROM user_sessions"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC, session_id DESC"
+        return query, params
+    
+    def list_sessions_page(self, limit: Optional[int] = None, cursor: Optional[str] = None, active_only: bool = True,
+                           columns: Sequence[str] = SESSION_SUMMARY_COLUMNS) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """세션 목록 한 페이지 조회. (세션 목록, 다음 페이지 커서) 반환
+        
+        limit이 없으면 커서 이후 전체를 반환합니다. 커서 형식이 잘못되면 ValueError가 발생합니다.
+        """
+        after = decode_session_cursor(cursor) if cursor else None
+        query, params = self._build_list_query(columns, active_only, after)
+        
+        with self.db.get_connection() as conn:
+            if limit is None:
+                rows = conn.execute(query, params).fetchall()
+            else:
+                # 다음 페이지 존재 여부 확인을 위해 한 행 더 조회
+                rows = conn.execute(query + " LIMIT ?", (*params, limit + 1)).fetchall()
+        
+        sessions = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            last = sessions[-1]
+            next_cursor = encode_session_cursor(last['created_at'], last['session_id'])
+        return sessions, next_cursor
+    
+    def count_sessions(self, active_only: bool = True) -> int:
+        """세션 수 (active_only면 자동매매 활성 세션만)"""
+        query = "SELECT COUNT(*) FROM user_sessions"
+        if active_only:
+            query += " WHERE is_auto_trading_enabled = TRUE"
+        with self.db.get_connection() as conn:
+            return conn.execute(query).fetchone()[0]
+    
+    def iter_sessions(self, active_only: bool = True, columns: Sequence[str] = SESSION_SUMMARY_COLUMNS,
+                      batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """세션을 batch_size 단위로 읽어 하나씩 반환 (내보내기용, 전체를 메모리에 올리지 않음)"""
+        query, params = self._build_list_query(columns, active_only, None)
+        conn = self.db.get_connection()
+        try:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            conn.close()
+
 # 전역 서비스 인스턴스
 sqlite_session_service = SQLiteSessionService()
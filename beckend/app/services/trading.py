@@ -1,21 +1,87 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Any
 import json
+import time
+import logging
 
-from app.services.bingx import bingx_client
+from app.services.bingx import BingXClient, bingx_client
 from fastapi import HTTPException
 
+logger = logging.getLogger(__name__)
+# 포지션/주문 파라미터 상세는 별도 카테고리(DEBUG)
+detail_logger = logging.getLogger(f"{__name__}.detail")
+
+def build_tp_sl_params(side: str, current_price: float, take_profit_percentage: Optional[float],
+                       stop_loss_percentage: Optional[float]) -> Dict[str, str]:
+    """진입 주문에 붙일 익절/손절 파라미터 (takeProfit/stopLoss JSON 문자열)"""
+    params = {}
+    if take_profit_percentage:
+        # LONG: 현재가 * (1 + tp%), SHORT: 현재가 * (1 - tp%)
+        tp_multiplier = (1 + take_profit_percentage/100) if side == "LONG" else (1 - take_profit_percentage/100)
+        tp_price = round(current_price * tp_multiplier, 4)
+        tp_params = {
+            "type": "TAKE_PROFIT_MARKET",
+            "stopPrice": tp_price,
+            "price": tp_price,
+            "workingType": "MARK_PRICE"
+        }
+        params["takeProfit"] = json.dumps(tp_params, separators=(',', ':'))
+
+    if stop_loss_percentage:
+        # LONG: 현재가 * (1 - sl%), SHORT: 현재가 * (1 + sl%)
+        sl_multiplier = (1 - stop_loss_percentage/100) if side == "LONG" else (1 + stop_loss_percentage/100)
+        sl_price = round(current_price * sl_multiplier, 4)
+        sl_params = {
+            "type": "STOP_MARKET",
+            "stopPrice": sl_price,
+            "price": sl_price,
+            "workingType": "MARK_PRICE"
+        }
+        params["stopLoss"] = json.dumps(sl_params, separators=(',', ':'))
+    return params
+
 class TradingService:
-    def __init__(self):
-        self.client = bingx_client
+    def __init__(self, client: Optional[BingXClient] = None, record_orders: bool = False):
+        # 세션별 클라이언트가 주어지지 않으면 전역 클라이언트 사용
+        self.client = client or bingx_client
+        # 이 서비스로 실행한 주문 기록 (원장 기록용). 세션 실행마다 새로 만드는 인스턴스만 기록하고
+        # 모듈 전역 인스턴스는 계속 쌓이지 않도록 기록하지 않음
+        self.record_orders = record_orders
+        self.orders: List[Dict[str, Any]] = []
+        # 주문 수량 계산에 쓴 가격과 조회 시각 (이후 주문 기록에 함께 남김, 슬리피지 분석용)
+        self.sizing_price: Optional[float] = None
+        self.sized_at: Optional[float] = None
+
+    def set_sizing_price(self, price: float) -> None:
+        """주문 수량 계산에 쓴 현재가 기록"""
+        self.sizing_price = price
+        self.sized_at = time.time()
+
+    async def _place_order(self, kind: str, params: Dict) -> Dict:
+        """주문 실행 및 요청/응답 시각 기록 (kind: 'open' 또는 'close')"""
+        record = {
+            'kind': kind, 'params': dict(params), 'requested_at': time.time(),
+            'sizing_price': self.sizing_price, 'sized_at': self.sized_at,
+        }
+        if self.record_orders:
+            self.orders.append(record)
+        try:
+            result = await self.client.place_order(**params)
+            record['response'] = result
+            return result
+        except Exception as e:
+            record['error'] = str(e)
+            raise
+        finally:
+            record['acked_at'] = time.time()
 
     async def get_current_price(self, symbol: str) -> float:
         """현재가 조회"""
         try:
             ticker = await self.client.get_ticker(symbol)
-            print(f"현재가 응답: {ticker}")
+            detail_logger.debug("현재가 응답: %s", ticker)
             return float(ticker['data']['price'])
         except Exception as e:
-            print(f"현재가 조회 실패: {e}")
+            logger.warning(f"현재가 조회 실패: {e}")
             raise
 
     async def execute_trade(
@@ -49,11 +115,11 @@ class TradingService:
 
     async def _close_all_positions(self, symbol: str) -> Dict:
         """해당 심볼의 모든 포지션 자동 종료 (테스트 파일과 동일한 로직)"""
-        print(f"=== {symbol} 모든 포지션 자동 종료 시작 ===")
+        logger.info(f"=== {symbol} 모든 포지션 자동 종료 시작 ===")
         
         # 1. 현재 포지션 조회
         positions_result = await self.client.get_positions(symbol)
-        print(f"포지션 조회 결과: {positions_result}")
+        detail_logger.debug("포지션 조회 결과: %s", positions_result)
         
         if positions_result.get('code') != 0:
             raise Exception(f"포지션 조회 실패: {positions_result.get('msg')}")
@@ -72,15 +138,14 @@ class TradingService:
             entry_price = position.get('entryPrice', '0')
             unrealized_profit = position.get('unrealizedProfit', '0')
             
-            print(f"\n--- 포지션 정보 ---")
-            print(f"방향: {position_side}")
-            print(f"수량: {position_amt}")
-            print(f"진입가: {entry_price}")
-            print(f"미실현손익: {unrealized_profit}")
+            detail_logger.debug(
+                "포지션 정보: 방향=%s 수량=%s 진입가=%s 미실현손익=%s",
+                position_side, position_amt, entry_price, unrealized_profit
+            )
             
             # 포지션 수량이 0이면 건너뛰기
             if position_amt == 0:
-                print(f"{position_side} 포지션 수량이 0입니다. 건너뛰기.")
+                detail_logger.debug("%s 포지션 수량이 0입니다. 건너뛰기.", position_side)
                 continue
             
             # 3. 포지션 종료 주문 실행
@@ -91,9 +156,9 @@ class TradingService:
                     "quantity": abs(position_amt),
                     "result": close_result
                 })
-                print(f"{position_side} 포지션 종료 성공")
+                logger.info(f"{position_side} 포지션 종료 성공")
             except Exception as e:
-                print(f"{position_side} 포지션 종료 실패: {e}")
+                logger.warning(f"{position_side} 포지션 종료 실패: {e}")
                 close_results.append({
                     "position_side": position_side,
                     "quantity": abs(position_amt),
@@ -124,10 +189,10 @@ class TradingService:
             "quantity": str(quantity)
         }
         
-        print(f"종료 주문 파라미터: {params}")
+        detail_logger.debug("종료 주문 파라미터: %s", params)
         
         # 주문 실행
-        order_result = await self.client.place_order(**params)
+        order_result = await self._place_order('close', params)
         return order_result
 
     async def _open_position(
@@ -158,39 +223,12 @@ class TradingService:
         # 4. 익절/손절 설정
         if take_profit_percentage or stop_loss_percentage:
             current_price = await self.get_current_price(symbol)
-            print(f"현재가: {current_price}")
-
-            if take_profit_percentage:
-                # LONG: 현재가 * (1 + tp%), SHORT: 현재가 * (1 - tp%)
-                tp_multiplier = (1 + take_profit_percentage/100) if side == "LONG" else (1 - take_profit_percentage/100)
-                tp_price = str(round(current_price * tp_multiplier, 4))
-                print(f"익절가: {tp_price}")
-
-                tp_params = {
-                    "type": "TAKE_PROFIT_MARKET",
-                    "stopPrice": float(tp_price),
-                    "price": float(tp_price),
-                    "workingType": "MARK_PRICE"
-                }
-                params["takeProfit"] = json.dumps(tp_params, separators=(',', ':'))
-
-            if stop_loss_percentage:
-                # LONG: 현재가 * (1 - sl%), SHORT: 현재가 * (1 + sl%)
-                sl_multiplier = (1 - stop_loss_percentage/100) if side == "LONG" else (1 + stop_loss_percentage/100)
-                sl_price = str(round(current_price * sl_multiplier, 4))
-                print(f"손절가: {sl_price}")
-
-                sl_params = {
-                    "type": "STOP_MARKET",
-                    "stopPrice": float(sl_price),
-                    "price": float(sl_price),
-                    "workingType": "MARK_PRICE"
-                }
-                params["stopLoss"] = json.dumps(sl_params, separators=(',', ':'))
+            params.update(build_tp_sl_params(side, current_price, take_profit_percentage, stop_loss_percentage))
+            detail_logger.debug("현재가: %s, 익절/손절: %s", current_price, params)
 
         # 5. 주문 실행
-        print(f"진입 주문 파라미터: {params}")
-        order_result = await self.client.place_order(**params)
+        detail_logger.debug("진입 주문 파라미터: %s", params)
+        order_result = await self._place_order('open', params)
         return order_result
 
 # 싱글톤 인스턴스 생성
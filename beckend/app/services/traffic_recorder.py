@@ -0,0 +1,185 @@
+import gzip
+import json
+import os
+import time
+import queue
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple, Iterator
+
+from app.core.config import get_settings
+from app.core.logging_pipeline import redact_fields
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# 기록 파일 형식 버전 (레코드 필드가 바뀌면 올림)
+TRACE_VERSION = 1
+
+# 세션 스냅샷에 남기는 매매 설정 컬럼 (키 제외, 거래 심볼은 신호마다 바뀌므로 제외)
+SESSION_FIELDS = (
+    'exchange_type', 'investment', 'leverage', 'take_profit', 'stop_loss',
+    'indicator', 'is_auto_trading_enabled'
+)
+
+traffic_records = registry.counter(
+    "traffic_records_total", "Recorded traffic trace entries by kind and outcome (queued, dropped)",
+    ("kind", "outcome")
+)
+
+
+def anonymize(value: str) -> str:
+    """세션 ID/API 키 대신 기록할 식별자 (원문 복원 불가, 같은 값은 같은 식별자)"""
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()[:16]
+
+
+def account_ref(api_key: str, exchange_type: Optional[str]) -> str:
+    """거래소 계정 식별자 (API 키 + 거래소 타입)"""
+    return anonymize(f"{api_key}:{exchange_type}")
+
+
+def read_trace(path: str) -> Iterator[Dict[str, Any]]:
+    """기록 파일 레코드를 순서대로 반환 (.gz로 압축한 파일도 읽음)"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class TrafficRecorder:
+    """운영 트래픽 기록기: 웹훅 신호, 세션 설정 스냅샷, 신호가 일으킨 BingX 요청/응답을 JSONL로 저장
+
+    핫패스에서는 큐에 넣기만 하고, 비밀 값 가리기/JSON 변환/파일 쓰기는 기록 스레드가 합니다.
+    큐가 가득 차면 기다리지 않고 버립니다. 여러 프로세스(uvicorn/샤드 워커)가 같은 파일에
+    이어 쓰므로 줄 단위로 한 번에 씁니다. 레코드 종류(k):
+
+    - meta: 프로세스별 기록 시작 (v, pid)
+    - sessions: 세션 설정이 바뀔 때마다 세션 목록 (sid/acct는 익명 식별자)
+    - signal: 웹훅 원문 (ts = 수신 시각)
+    - x: 거래소 호출 (acct, m, p, q=파라미터, st=HTTP 상태, r=응답, ms=소요 시간, err=네트워크 오류)
+    """
+
+    def __init__(self, path: str = "", queue_size: int = 10000):
+        self.path = path
+        self._queue: "queue.Queue[Tuple[str, Any]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        # 마지막으로 넘겨받은 세션 목록 (get_all_sessions는 DB 변경이 없으면 같은 리스트 객체를 반환)
+        self._last_sessions: Optional[List[Dict[str, Any]]] = None
+        # 마지막으로 기록한 세션 행 (기록 스레드 전용, 원장 기록 등으로 목록만 다시 읽힌 경우는 생략)
+        self._last_session_rows: Optional[List[Dict[str, Any]]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    # ---- 기록 (핫패스에서 호출, 큐에 넣기만 함) ----
+
+    def _enqueue(self, kind: str, item: Any) -> None:
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="traffic-recorder", daemon=True)
+                    self._thread.start()
+                    self._queue.put_nowait(('meta', {'k': 'meta', 'v': TRACE_VERSION, 'pid': os.getpid(),
+                                                     'ts': time.time()}))
+        try:
+            self._queue.put_nowait((kind, item))
+            traffic_records.inc(kind=kind, outcome='queued')
+        except queue.Full:
+            traffic_records.inc(kind=kind, outcome='dropped')
+
+    def record_signal(self, received_at: float, payload: Dict[str, Any]) -> None:
+        """웹훅 신호 원문"""
+        if self.enabled:
+            self._enqueue('signal', (received_at, payload))
+
+    def record_sessions(self, sessions: List[Dict[str, Any]]) -> None:
+        """신호를 받은 시점의 세션 목록 (이전에 기록한 목록과 같으면 생략)"""
+        if not self.enabled or sessions is self._last_sessions:
+            return
+        self._last_sessions = sessions
+        self._enqueue('sessions', (time.time(), sessions))
+
+    def record_exchange(self, api_key: str, exchange_type: Optional[str], method: str, path: str,
+                        params: Dict[str, Any], started_at: float, duration_ms: float,
+                        http_status: Optional[int] = None, result: Any = None,
+                        error: Optional[str] = None) -> None:
+        """거래소 요청 하나와 응답"""
+        if self.enabled:
+            self._enqueue('x', (api_key, exchange_type, method, path, dict(params), started_at, duration_ms,
+                                http_status, result, error))
+
+    # ---- 기록 스레드 ----
+
+    def _to_entry(self, kind: str, item: Any) -> Optional[Dict[str, Any]]:
+        if kind == 'meta':
+            return item
+        if kind == 'signal':
+            received_at, payload = item
+            return {'k': 'signal', 'ts': round(received_at, 6), 'body': redact_fields(payload)}
+        if kind == 'sessions':
+            recorded_at, sessions = item
+            rows = [
+                {
+                    'sid': anonymize(session['session_id']),
+                    'acct': account_ref(session['api_key'], session.get('exchange_type')),
+                    **{field: session.get(field) for field in SESSION_FIELDS},
+                }
+                for session in sessions
+            ]
+            if rows == self._last_session_rows:
+                return None
+            self._last_session_rows = rows
+            return {'k': 'sessions', 'ts': round(recorded_at, 6), 'rows': rows}
+        api_key, exchange_type, method, path, params, started_at, duration_ms, http_status, result, error = item
+        # 서명용 timestamp는 재생에 필요 없으므로 제외
+        params.pop('timestamp', None)
+        entry = {
+            'k': 'x', 'ts': round(started_at, 6), 'acct': account_ref(api_key, exchange_type),
+            'm': method, 'p': path, 'q': redact_fields(params), 'ms': round(duration_ms, 3),
+        }
+        if error is not None:
+            entry['err'] = error
+        else:
+            entry['st'] = http_status
+            entry['r'] = redact_fields(result)
+        return entry
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                lines = []
+                for kind, item in batch:
+                    entry = self._to_entry(kind, item)
+                    if entry is not None:
+                        lines.append(json.dumps(entry, ensure_ascii=False, separators=(',', ':'), default=str))
+                # O_APPEND + 한 번의 write로 다른 프로세스의 기록과 줄이 섞이지 않게 함
+                if lines:
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write('\n'.join(lines) + '\n')
+            except Exception as e:
+                logger.error(f"트래픽 기록 실패: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self) -> None:
+        """큐에 남은 레코드를 모두 기록할 때까지 대기"""
+        if self._thread is not None:
+            self._queue.join()
+
+
+# 싱글톤 인스턴스 생성
+traffic_recorder = TrafficRecorder(settings.traffic_record_path, settings.traffic_record_queue_size)
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any, Deque, Tuple, Optional
+
+import aiohttp
+
+from app.core.config import get_settings
+from app.core.metrics import registry
+from app.services.traffic_recorder import read_trace
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+replay_requests = registry.counter(
+    "exchange_replay_requests_total",
+    "Replayed exchange calls by result (hit, reused = recorded responses exhausted, missing)", ("result",)
+)
+
+# 기록된 응답이 없는 호출에 돌려줄 응답
+MISSING_RESPONSE = {'code': -1, 'msg': 'replay: no recorded response', 'data': None}
+
+
+class ReplayExchange:
+    """기록 파일(traffic_recorder)의 거래소 응답을 돌려주는 재생 모드 거래소
+
+    (계정, 메서드, 경로)별로 기록된 응답을 순서대로 꺼내고, 기록된 소요 시간을 speed 배율로 줄여
+    기다린 뒤 응답합니다 (speed=0이면 기다리지 않음). 재생 모드에서는 세션의 API 키 자리에
+    기록 파일의 계정 식별자(acct)를 넣어 두므로 API 키가 곧 계정 식별자입니다.
+    같은 키의 기록이 바닥나면 마지막 응답을 다시 쓰고, 기록이 아예 없으면 오류 응답을 돌려줍니다.
+    계정별 순서만 보존하므로 같은 계정의 신호 처리가 기록 때와 다르게 겹치면 응답 순서가 어긋날 수 있습니다.
+    """
+
+    def __init__(self, path: str = "", speed: float = 1.0):
+        self.path = path
+        self.speed = speed
+        self._responses: Optional[Dict[Tuple[str, str, str], Deque[Dict[str, Any]]]] = None
+        self._last: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def scaled(self, seconds: float) -> float:
+        """재생 배속을 적용한 대기 시간"""
+        return seconds / self.speed if self.speed > 0 else 0.0
+
+    def load(self) -> None:
+        """기록 파일 읽기 (시작 단계에서 호출, 안 했으면 첫 요청 때 읽음)"""
+        responses: Dict[Tuple[str, str, str], Deque[Dict[str, Any]]] = {}
+        for entry in read_trace(self.path):
+            if entry.get('k') == 'x':
+                responses.setdefault((entry['acct'], entry['m'], entry['p']), deque()).append(entry)
+        self._responses = responses
+        self._last = {}
+        logger.info(f"🔁 거래소 응답 재생: {self.path} ({sum(len(items) for items in responses.values())}건)")
+
+    async def request(self, account: str, method: str, path: str) -> Tuple[int, Dict[str, Any]]:
+        """기록된 (HTTP 상태, 응답 JSON). 기록이 네트워크 오류였으면 그 오류를 다시 발생"""
+        if self._responses is None:
+            self.load()
+        key = (account, method, path)
+        recorded = self._responses.get(key)
+        if recorded:
+            entry = self._last[key] = recorded.popleft()
+            replay_requests.inc(result='hit')
+        elif key in self._last:
+            entry = self._last[key]
+            replay_requests.inc(result='reused')
+        else:
+            replay_requests.inc(result='missing')
+            return 404, MISSING_RESPONSE
+
+        if self.speed > 0:
+            await asyncio.sleep(self.scaled(entry.get('ms', 0) / 1000))
+        if 'err' in entry:
+            raise aiohttp.ClientError(entry['err'])
+        return entry.get('st', 200), entry.get('r') or {}
+
+
+# 싱글톤 인스턴스 생성
+replay_exchange = ReplayExchange(settings.exchange_replay_path, settings.exchange_replay_speed)
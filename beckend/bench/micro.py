@@ -0,0 +1,230 @@
+"""웹훅 경로 기본 연산 마이크로벤치마크
+
+신호마다 (또는 세션마다) 반복되는 연산의 1회당 시간을 재고 bench/baselines/micro.json의 기준값과
+비교합니다. 벤치마크별 허용 악화 비율을 넘으면 종료 코드 1로 끝납니다.
+
+실행 (beckend 디렉터리에서):
+    python -m bench.micro                       # 측정 후 기준값과 비교
+    python -m bench.micro --filter sessions     # 이름에 sessions가 들어간 것만
+    python -m bench.micro --update-baseline     # 현재 측정값을 기준값으로 저장
+    python -m bench.micro --session-rows 10     # 세션 DB 측정 행 수를 줄여 빠르게 확인
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import timeit
+import statistics
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Sequence, Tuple
+
+from bench.report import build_report, write_report
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "micro.json")
+
+# 기준 대비 허용 악화 비율 (%), 벤치마크별로 지정하지 않으면 이 값
+DEFAULT_THRESHOLD_PCT = 25.0
+
+# get_all_sessions 측정 행 수
+SESSION_ROW_COUNTS = (10, 1_000, 100_000)
+
+WEBHOOK_BODY = json.dumps({
+    'action': 'LONG', 'strategy': 'PREMIUM', 'symbol': 'XRPUSDT.P', 'price': 0.5234, 'time': '2025-01-01T00:00:00Z'
+}).encode('utf-8')
+
+
+class Benchmark:
+    def __init__(self, name: str, func: Callable[[], Any], threshold_pct: float = DEFAULT_THRESHOLD_PCT):
+        self.name = name
+        self.func = func
+        self.threshold_pct = threshold_pct
+
+
+def _run_coroutine(coroutine) -> Any:
+    """await 없이 끝나는 코루틴을 이벤트 루프 없이 실행 (루프 비용을 측정에서 제외)"""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("코루틴이 대기 상태가 되었습니다.")
+
+
+def _session_rows(count: int) -> List[Tuple]:
+    now = datetime.now()
+    return [(
+        f"micro-{index:06d}", f"user{index}@example.com", f"key-{index}", f"secret-{index}",
+        'demo' if index % 2 else 'live', 100.0 + index % 50, 5 + index % 10, 1.5, 0.8,
+        'PREMIUM' if index % 3 else 'CONBOL', index % 4 != 0, 'XRP-USDT', now, now
+    ) for index in range(count)]
+
+
+def _build_session_benchmarks(workdir: str, row_counts: Sequence[int]) -> List[Benchmark]:
+    """행 수별 임시 DB로 get_all_sessions 캐시 적중/미적중 측정"""
+    from app.core.sqlite_database import SQLiteDatabase
+    from app.services.sqlite_session_service import SQLiteSessionService
+
+    benchmarks = []
+    for count in row_counts:
+        db = SQLiteDatabase(os.path.join(workdir, f"sessions-{count}.db"))
+        with db.get_connection() as conn:
+            conn.executemany('''
+                INSERT INTO user_sessions (
+                    session_id, user_email, api_key, secret_key, exchange_type,
+                    investment, leverage, take_profit, stop_loss, indicator,
+                    is_auto_trading_enabled, current_symbol, created_at, last_activity
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', _session_rows(count))
+            conn.commit()
+        service = SQLiteSessionService()
+        service.db = db
+
+        def uncached(service=service):
+            service._all_sessions_cache = None
+            return service.get_all_sessions()
+
+        # 디스크/페이지 캐시 영향이 커서 DB 조회는 허용 폭을 넓게, 캐시 적중은 수 µs라 타이머 잡음 감안
+        benchmarks.append(Benchmark(f"get_all_sessions.uncached.{count}", uncached, threshold_pct=40.0))
+        benchmarks.append(Benchmark(f"get_all_sessions.cached.{count}", service.get_all_sessions, threshold_pct=50.0))
+    return benchmarks
+
+
+def build_benchmarks(workdir: str, session_row_counts: Sequence[int] = SESSION_ROW_COUNTS) -> List[Benchmark]:
+    from app.services.bingx import BingXClient
+    from app.services.trading import build_tp_sl_params
+    from app.api.webhook import calculate_order_quantity, _parse_signal, _build_user_settings
+
+    client = BingXClient()
+    client.set_credentials('micro-api-key', 'micro-secret-key-0123456789abcdef', 'demo')
+    order_params = {
+        'symbol': 'XRP-USDT', 'side': 'BUY', 'positionSide': 'LONG', 'type': 'MARKET', 'quantity': '955.3',
+        'takeProfit': '{"type":"TAKE_PROFIT_MARKET","stopPrice":0.5339,"price":0.5339,"workingType":"MARK_PRICE"}',
+        'stopLoss': '{"type":"STOP_MARKET","stopPrice":0.5192,"price":0.5192,"workingType":"MARK_PRICE"}',
+    }
+    session_rows = [
+        dict(zip(
+            ('session_id', 'user_email', 'api_key', 'secret_key', 'exchange_type', 'investment', 'leverage',
+             'take_profit', 'stop_loss', 'indicator', 'is_auto_trading_enabled', 'current_symbol'),
+            row[:12]
+        ))
+        for row in _session_rows(1_000)
+    ]
+
+    return [
+        Benchmark("bingx.generate_signature", lambda: client._generate_signature(order_params)),
+        Benchmark("webhook.calculate_order_quantity",
+                  lambda: _run_coroutine(calculate_order_quantity(100.0, 5, 0.5234))),
+        Benchmark("trading.build_tp_sl_params", lambda: build_tp_sl_params('LONG', 0.5234, 2.0, 0.8)),
+        Benchmark("webhook.parse_signal", lambda: _parse_signal(json.loads(WEBHOOK_BODY.decode('utf-8')))),
+        # 신호 하나가 세션 1,000개를 순회할 때의 설정 변환 비용
+        Benchmark("webhook.build_user_settings.1000",
+                  lambda: [_build_user_settings(session) for session in session_rows]),
+        *_build_session_benchmarks(workdir, session_row_counts),
+    ]
+
+
+def measure(benchmark: Benchmark, repeat: int, min_time: float) -> Dict[str, Any]:
+    """1회당 시간(ns): 반복 측정 중 최소값과 중앙값
+
+    한 번 측정에 min_time 초 이상 걸리도록 반복 횟수를 정하고 repeat번 잽니다.
+    """
+    timer = timeit.Timer(benchmark.func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.2))
+    runs = [timer.timeit(number) / number * 1e9 for _ in range(repeat)]
+    return {
+        'min_ns': round(min(runs), 1),
+        'median_ns': round(statistics.median(runs), 1),
+        'loops': number,
+        'repeat': repeat,
+        'threshold_pct': benchmark.threshold_pct,
+    }
+
+
+def _format_ns(value: float) -> str:
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('µs', 1e3)):
+        if value >= scale:
+            return f"{value / scale:.2f}{unit}"
+    return f"{value:.0f}ns"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="웹훅 경로 마이크로벤치마크")
+    parser.add_argument("--filter", default="", help="이름에 이 문자열이 들어간 벤치마크만 실행")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="측정 1회의 최소 시간 (초)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="측정값을 기준값으로 저장")
+    parser.add_argument("--output", help="보고서 JSON 저장 경로")
+    parser.add_argument("--session-rows", default=",".join(str(count) for count in SESSION_ROW_COUNTS),
+                        help="get_all_sessions 측정 행 수 (쉼표 구분)")
+    args = parser.parse_args()
+    session_row_counts = [int(count) for count in args.session_rows.split(',') if count]
+
+    workdir = tempfile.mkdtemp(prefix="bench-micro-")
+    # 앱 모듈이 만드는 기본 DB도 임시 디렉터리에 두고, 측정 중 로그 출력은 끔
+    os.environ['SQLITE_DB_PATH'] = os.path.join(workdir, "app.db")
+    os.environ['LOG_LEVEL'] = 'ERROR'
+    import logging
+    logging.disable(logging.WARNING)
+    try:
+        results: Dict[str, Any] = {}
+        for benchmark in build_benchmarks(workdir, session_row_counts):
+            if args.filter not in benchmark.name:
+                continue
+            results[benchmark.name] = measure(benchmark, args.repeat, args.min_time)
+            print(f"{benchmark.name:45s} {_format_ns(results[benchmark.name]['min_ns']):>10s}", file=sys.stderr)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    params = {'repeat': args.repeat, 'min_time': args.min_time}
+    report = build_report("micro", params, results)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        merged = dict(baseline['results']) if baseline else {}
+        merged.update(results)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(build_report("micro", params, merged), f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"기준값 저장: {args.baseline}", file=sys.stderr)
+        return
+
+    regressions = []
+    if baseline:
+        print(f"\n기준: {baseline.get('git_commit')} ({baseline.get('created_at')}, {baseline.get('platform')})",
+              file=sys.stderr)
+        if (baseline.get('python'), baseline.get('platform')) != (report['python'], report['platform']):
+            print(f"⚠️ 기준값과 실행 환경이 다릅니다 (python {baseline.get('python')} -> {report['python']}). "
+                  f"비교 결과는 참고만 하세요.", file=sys.stderr)
+        for name, current in results.items():
+            before = baseline['results'].get(name)
+            if not before:
+                continue
+            change_pct = (current['min_ns'] - before['min_ns']) / before['min_ns'] * 100
+            current['baseline_min_ns'] = before['min_ns']
+            current['change_pct'] = round(change_pct, 2)
+            current['regression'] = change_pct > current['threshold_pct']
+            if current['regression']:
+                regressions.append(name)
+            flag = "❌ 회귀" if current['regression'] else "  "
+            print(f"{flag} {name}: {_format_ns(before['min_ns'])} -> {_format_ns(current['min_ns'])} "
+                  f"({change_pct:+.1f}%, 허용 {current['threshold_pct']:.0f}%)", file=sys.stderr)
+
+    write_report(report, args.output)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
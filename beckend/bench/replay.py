@@ -0,0 +1,245 @@
+"""기록된 운영 트래픽 재생
+
+TRAFFIC_RECORD_PATH로 기록한 파일(app.services.traffic_recorder)의 세션 설정으로 임시 DB를 만들고,
+앱을 거래소 응답 재생 모드(EXCHANGE_REPLAY_PATH)로 띄운 뒤 기록된 웹훅 신호를 원래 간격대로
+(--speed로 배속) 다시 보냅니다. 거래소 응답과 응답 지연도 같은 배속으로 재생되므로 지연 사고를
+재현하거나 최적화 전후를 실제 트래픽 모양으로 비교할 수 있습니다. 보고서 형식은 webhook_load와 같습니다.
+
+실행 (beckend 디렉터리에서):
+    python -m bench.replay traffic.jsonl --output replay.json
+    python -m bench.replay traffic.jsonl.gz --speed 10 --compare replay.json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import secrets
+import tempfile
+import shutil
+import subprocess
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+import aiohttp
+
+from bench.report import percentiles, build_report, write_report, compare, print_comparison
+from bench.webhook_load import (
+    COMPARED_METRICS, _free_port, _start_process, _wait_ready, _send_signal, summarize
+)
+
+
+def load_trace(path: str, limit: Optional[int] = None) -> Dict[str, Any]:
+    """재생에 쓸 신호 목록, 첫 신호 시점의 세션 목록, 기록된 거래소 호출 통계"""
+    from app.services.traffic_recorder import read_trace
+
+    signals: List[Tuple[float, Dict[str, Any]]] = []
+    snapshots: List[Tuple[float, List[Dict[str, Any]]]] = []
+    exchange_ms: List[float] = []
+    for entry in read_trace(path):
+        kind = entry.get('k')
+        if kind == 'signal':
+            if limit is None or len(signals) < limit:
+                signals.append((entry['ts'], entry['body']))
+        elif kind == 'sessions':
+            snapshots.append((entry['ts'], entry['rows']))
+        elif kind == 'x':
+            exchange_ms.append(entry.get('ms', 0.0))
+    if not signals:
+        raise SystemExit(f"기록된 신호가 없습니다: {path}")
+    if not snapshots:
+        raise SystemExit(f"기록된 세션 목록이 없습니다: {path}")
+
+    # 첫 신호 직전(없으면 가장 이른) 세션 목록 기준으로 재생. 도중의 설정 변경은 재현하지 않음
+    first_signal = signals[0][0]
+    before = [rows for ts, rows in snapshots if ts <= first_signal]
+    sessions = before[-1] if before else snapshots[0][1]
+    if len({json.dumps(rows, sort_keys=True) for _, rows in snapshots}) > 1:
+        print("⚠️ 기록 중 세션 목록이 바뀌었습니다. 첫 신호 시점 목록으로 재생합니다.", file=sys.stderr)
+    return {
+        'signals': signals,
+        'sessions': sessions,
+        'recorded': {
+            'signals': len(signals),
+            'sessions': len(sessions),
+            'duration_seconds': round(signals[-1][0] - first_signal, 3),
+            'exchange_calls': len(exchange_ms),
+            'exchange_ms': percentiles(exchange_ms),
+        },
+    }
+
+
+def seed_sessions(db_path: str, sessions: List[Dict[str, Any]]) -> None:
+    """기록된 세션 목록을 임시 DB에 저장 (API 키 자리에 계정 식별자, 조회 순서 유지)"""
+    from app.core.sqlite_database import SQLiteDatabase
+
+    db = SQLiteDatabase(db_path)
+    # get_all_sessions는 created_at 내림차순이므로 기록 순서대로 1초씩 이전 시각
+    now = datetime.now()
+    with db.get_connection() as conn:
+        conn.executemany('''
+            INSERT INTO user_sessions (
+                session_id, user_email, api_key, secret_key, exchange_type,
+                investment, leverage, take_profit, stop_loss, indicator,
+                is_auto_trading_enabled, current_symbol, created_at, last_activity
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (
+                row['sid'], 'replay', row['acct'], 'replay', row.get('exchange_type') or 'demo',
+                row.get('investment'), row.get('leverage'), row.get('take_profit'), row.get('stop_loss'),
+                row.get('indicator'), row.get('is_auto_trading_enabled'), None,
+                now - timedelta(seconds=index), now
+            )
+            for index, row in enumerate(sessions)
+        ])
+        conn.commit()
+
+
+def _shift_alert_time(body: Dict[str, Any], recorded_at: float, send_at: float) -> Dict[str, Any]:
+    """알림 시각을 재생 시각 기준으로 옮김 (기록 당시 수신 지연은 유지)"""
+    from app.api.webhook import _parse_alert_time
+
+    for key in ('alert_time', 'timenow'):
+        alert_time = _parse_alert_time(body.get(key))
+        if alert_time is not None:
+            return {**body, key: int((send_at - (recorded_at - alert_time)) * 1000)}
+    return body
+
+
+async def fire_recorded(base_url: str, signals: List[Tuple[float, Dict[str, Any]]], speed: float,
+                        timeout: float) -> Dict[str, Any]:
+    """기록된 신호를 원래 간격 / speed로 보냄 (speed=0이면 앞 신호 응답을 받자마자 다음 신호)"""
+    loop = asyncio.get_running_loop()
+    connector = aiohttp.TCPConnector(limit=0)
+    first = signals[0][0]
+    url = f"{base_url}/api/webhook"
+    async with aiohttp.ClientSession(connector=connector) as http:
+        start = loop.time() + 0.1
+        started = loop.time()
+        # 이벤트 루프 시각 -> epoch 초 (알림 시각 보정용)
+        wall_offset = time.time() - loop.time()
+        if speed > 0:
+            responses = await asyncio.gather(*[
+                _send_signal(http, url, _shift_alert_time(body, ts, start + (ts - first) / speed + wall_offset),
+                             start + (ts - first) / speed, timeout)
+                for ts, body in signals
+            ])
+        else:
+            responses = []
+            for ts, body in signals:
+                send_at = loop.time()
+                responses.append(await _send_signal(
+                    http, url, _shift_alert_time(body, ts, send_at + wall_offset), send_at, timeout
+                ))
+        elapsed = loop.time() - started - 0.1
+    return {'responses': responses, 'elapsed_seconds': max(elapsed, 1e-9)}
+
+
+async def _replay_counts(app_url: str) -> Dict[str, int]:
+    """앱 /metrics의 재생 결과별 거래소 호출 수 (hit/reused/missing)"""
+    counts = {'hit': 0, 'reused': 0, 'missing': 0}
+    try:
+        async with aiohttp.ClientSession() as http:
+            async with http.get(f"{app_url}/metrics") as response:
+                text = await response.text()
+    except aiohttp.ClientError:
+        return counts
+    for line in text.splitlines():
+        if line.startswith('next_auto_exchange_replay_requests_total{'):
+            labels, value = line.rsplit(' ', 1)
+            result = labels.split('result="', 1)[1].split('"', 1)[0]
+            counts[result] = int(float(value))
+    return counts
+
+
+async def run(args: argparse.Namespace, trace: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    db_path = os.environ['SQLITE_DB_PATH']
+    app_port = _free_port()
+    process: Optional[subprocess.Popen] = None
+    try:
+        seed_sessions(db_path, trace['sessions'])
+        from app.core.config import get_settings
+        dedup_window = get_settings().signal_dedup_window_seconds
+
+        process = _start_process(
+            ['-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1', '--port', str(app_port),
+             '--log-level', 'warning', '--no-access-log'],
+            {
+                'SQLITE_DB_PATH': db_path,
+                'EXCHANGE_REPLAY_PATH': os.path.abspath(args.trace),
+                'EXCHANGE_REPLAY_SPEED': str(args.speed),
+                'TRAFFIC_RECORD_PATH': '',
+                # 배속 재생에서도 원래 간격 기준으로 중복 신호를 거르도록 중복 창도 같은 배율로 줄임
+                'SIGNAL_DEDUP_WINDOW_SECONDS': str(dedup_window / args.speed if args.speed > 0 else 0),
+                'ADMIN_TOKEN': secrets.token_hex(8),
+                'METRICS_TOKEN': '',
+                'EQUITY_POLL_ENABLED': 'false',
+                'CANDLE_STORE_SYMBOLS': '',
+                'WEBHOOK_SHARD_WORKERS': str(args.shards),
+                'SHARD_SOCKET_DIR': os.path.join(workdir, "shards"),
+                'LOG_LEVEL': 'WARNING',
+                'LOG_FILE': os.path.join(workdir, "app.log"),
+            },
+            os.path.join(workdir, "app.stdout.log")
+        )
+        app_url = f"http://127.0.0.1:{app_port}"
+        await _wait_ready(f"{app_url}/", process)
+
+        fired = await fire_recorded(app_url, trace['signals'], args.speed, args.timeout)
+        results = summarize(fired)
+        results['recorded'] = trace['recorded']
+        # 샤드 워커의 재생 호출은 워커 프로세스에서 집계되므로 샤드 모드에서는 비어 있음
+        results['replay_responses'] = await _replay_counts(app_url)
+        return results
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="기록된 웹훅/거래소 트래픽 재생")
+    parser.add_argument("trace", help="TRAFFIC_RECORD_PATH로 기록한 파일 (.jsonl 또는 .jsonl.gz)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="재생 배속 (신호 간격과 거래소 응답 지연에 적용, 0이면 지연 없이 신호를 하나씩 연달아)")
+    parser.add_argument("--limit", type=int, help="앞에서부터 재생할 신호 수")
+    parser.add_argument("--shards", type=int, default=0, help="웹훅 샤드 워커 수 (WEBHOOK_SHARD_WORKERS)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="신호 하나의 응답 대기 시간 (초)")
+    parser.add_argument("--output", help="보고서 JSON 저장 경로")
+    parser.add_argument("--compare", help="비교할 기준 보고서 JSON")
+    parser.add_argument("--threshold", type=float, default=10.0, help="회귀로 볼 악화 비율 (%%)")
+    parser.add_argument("--keep", action="store_true", help="임시 디렉터리(DB/로그) 유지")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-replay-")
+    # 앱 모듈을 import하기 전에 임시 DB로 지정 (설정은 처음 읽을 때 고정됨)
+    os.environ['SQLITE_DB_PATH'] = os.path.join(workdir, "replay.db")
+    try:
+        trace = load_trace(args.trace, args.limit)
+        results = asyncio.run(run(args, trace, workdir))
+    finally:
+        if args.keep:
+            print(f"작업 디렉터리 유지: {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    params = {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'keep')}
+    params['trace'] = os.path.basename(args.trace)
+    report = build_report("replay", params, results)
+    write_report(report, args.output)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('params') != params:
+            print("⚠️ 기준 보고서와 실행 조건이 다릅니다.", file=sys.stderr)
+        if print_comparison(compare(report, baseline, COMPARED_METRICS, args.threshold), baseline):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import platform
+import subprocess
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+# 벤치마크 보고서 형식 버전 (필드가 바뀌면 올림)
+REPORT_VERSION = 1
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/최대/평균 (밀리초 등 같은 단위 유지)"""
+    if not values:
+        return {'count': 0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0, 'avg': 0.0}
+    array = np.asarray(values, dtype=np.float64)
+    p50, p95, p99 = np.percentile(array, [50, 95, 99])
+    return {
+        'count': int(array.size),
+        'p50': round(float(p50), 3),
+        'p95': round(float(p95), 3),
+        'p99': round(float(p99), 3),
+        'max': round(float(array.max()), 3),
+        'avg': round(float(array.mean()), 3),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def build_report(name: str, params: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+    """커밋/환경 정보를 붙인 보고서 (커밋 간 비교용 JSON)"""
+    return {
+        'version': REPORT_VERSION,
+        'benchmark': name,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'params': params,
+        'results': results,
+    }
+
+
+def write_report(report: Dict[str, Any], path: Optional[str]) -> None:
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if path:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+def _lookup(results: Dict[str, Any], dotted: str) -> Optional[float]:
+    value: Any = results
+    for part in dotted.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], metrics: Dict[str, bool],
+            threshold_pct: float) -> List[Dict[str, Any]]:
+    """기준 보고서 대비 변화율. metrics: {'results 안 경로': 클수록 좋은지}
+
+    나빠진 방향으로 threshold_pct(%)를 넘으면 regression=True로 표시합니다.
+    """
+    rows = []
+    for path, higher_is_better in metrics.items():
+        now = _lookup(current['results'], path)
+        before = _lookup(baseline['results'], path)
+        if now is None or before is None:
+            continue
+        change_pct = (now - before) / before * 100 if before else 0.0
+        worse_pct = -change_pct if higher_is_better else change_pct
+        rows.append({
+            'metric': path,
+            'baseline': before,
+            'current': now,
+            'change_pct': round(change_pct, 2),
+            'regression': worse_pct > threshold_pct,
+        })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], baseline: Dict[str, Any]) -> bool:
+    """비교 결과 출력. 회귀가 있으면 True"""
+    print(f"\n기준: {baseline.get('git_commit')} ({baseline.get('created_at')})")
+    for row in rows:
+        flag = "❌ 회귀" if row['regression'] else "  "
+        print(f"{flag} {row['metric']}: {row['baseline']} -> {row['current']} ({row['change_pct']:+.2f}%)")
+    return any(row['regression'] for row in rows)
@@ -0,0 +1,325 @@
+"""웹훅 종단 간 부하 벤치마크
+
+로컬 모의 BingX 서버(지연/지터/오류율 설정)와 임시 SQLite DB로 앱을 띄우고, 세션 N개를 넣은 뒤
+웹훅 신호를 지정한 속도로 보내 신호 수신~마지막 주문 응답 지연, 처리량, 신호당 거래소 호출 수를
+JSON 보고서로 남깁니다. --compare로 이전 커밋의 보고서와 비교할 수 있습니다.
+
+실행 (beckend 디렉터리에서):
+    python -m bench.webhook_load --sessions 200 --signals 40 --rate 2 --output bench-webhook.json
+    python -m bench.webhook_load --sessions 200 --signals 40 --rate 2 --compare bench-webhook.json
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import secrets
+import tempfile
+import shutil
+import subprocess
+from typing import Dict, Any, List, Optional
+
+import aiohttp
+
+from bench.report import percentiles, build_report, write_report, compare, print_comparison
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 벤치마크 세션이 선택하는 지표 (신호의 strategy)
+STRATEGY = "BENCH"
+
+# 거래소 호출로 세는 트레이스 구간
+EXCHANGE_STAGES = ('get_ticker', 'get_positions', 'set_leverage', 'place_order')
+
+# 비교 대상 지표 (results 안 경로: 클수록 좋은지)
+COMPARED_METRICS = {
+    'latency_ms.signal_to_last_order.p50': False,
+    'latency_ms.signal_to_last_order.p95': False,
+    'latency_ms.signal_to_last_order.p99': False,
+    'latency_ms.http_round_trip.p95': False,
+    'throughput.signals_per_second': True,
+    'throughput.orders_per_second': True,
+    'exchange_calls_per_signal': False,
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _start_process(args: List[str], env: Dict[str, str], log_path: str) -> subprocess.Popen:
+    log = open(log_path, 'ab')
+    return subprocess.Popen(
+        [sys.executable, *args], cwd=BACKEND_DIR, env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT
+    )
+
+
+async def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as http:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"프로세스가 종료되었습니다: {url} (exit {process.returncode})")
+            try:
+                async with http.get(url) as response:
+                    if response.status < 500:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"시작 시간 초과: {url}")
+
+
+def seed_sessions(db_path: str, count: int) -> None:
+    """임시 DB에 모의 거래소 세션 count개 저장 (계정은 세션마다 별도)"""
+    os.environ['SQLITE_DB_PATH'] = db_path
+    from app.services.sqlite_session_service import sqlite_session_service
+
+    for index in range(count):
+        sqlite_session_service.save_session({
+            'session_id': f"bench-{index:06d}",
+            'user_email': f"bench{index}@example.com",
+            'api_key': f"bench-key-{index}",
+            'secret_key': f"bench-secret-{index}",
+            'exchange_type': 'paper',
+            'investment': 100,
+            'leverage': 5,
+            'take_profit': 1.0,
+            'stop_loss': 1.0,
+            'indicator': STRATEGY,
+            'is_auto_trading_enabled': True,
+        })
+
+
+async def _send_signal(http: aiohttp.ClientSession, url: str, payload: Dict[str, Any],
+                       send_at: float, timeout: float) -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    await asyncio.sleep(max(0.0, send_at - loop.time()))
+    started = time.perf_counter()
+    try:
+        async with http.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            body = await response.json()
+            status = response.status
+    except Exception as e:
+        return {'payload': payload, 'error': f"{type(e).__name__}: {e}",
+                'round_trip_ms': (time.perf_counter() - started) * 1000}
+    return {'payload': payload, 'status': status, 'body': body,
+            'round_trip_ms': (time.perf_counter() - started) * 1000}
+
+
+async def fire_signals(base_url: str, count: int, rate: float, actions: List[str], symbol: str,
+                       timeout: float) -> Dict[str, Any]:
+    """신호 count개를 초당 rate개(0이면 한꺼번에) 속도로 보냄 (응답을 기다리지 않는 개방형 부하)"""
+    loop = asyncio.get_running_loop()
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as http:
+        start = loop.time() + 0.1
+        started = time.perf_counter()
+        tasks = [
+            _send_signal(http, f"{base_url}/api/webhook", {
+                'action': actions[index % len(actions)],
+                'strategy': STRATEGY,
+                'symbol': symbol,
+                # 본문이 같으면 중복 신호로 걸러지므로 신호마다 다른 값
+                'bench_id': index,
+            }, start + (index / rate if rate > 0 else 0.0), timeout)
+            for index in range(count)
+        ]
+        responses = await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started - 0.1
+    return {'responses': responses, 'elapsed_seconds': max(elapsed, 1e-9)}
+
+
+def summarize(fired: Dict[str, Any]) -> Dict[str, Any]:
+    """신호별 응답과 세션 트레이스로 지연/처리량/호출 수 집계"""
+    last_order_ms: List[float] = []
+    webhook_ms: List[float] = []
+    round_trip_ms: List[float] = []
+    calls_per_signal: List[int] = []
+    errors = 0
+    orders = 0
+    sessions = {'processed': 0, 'failed': 0, 'skipped': 0}
+
+    for response in fired['responses']:
+        round_trip_ms.append(response['round_trip_ms'])
+        body = response.get('body') or {}
+        data = body.get('data') or {}
+        if response.get('error') or response.get('status') != 200 or not body.get('success'):
+            errors += 1
+            continue
+
+        for span in (data.get('trace') or {}).get('spans', []):
+            if span['stage'] == 'webhook':
+                webhook_ms.append(span['duration_ms'])
+
+        signal_last_order = None
+        signal_calls = 0
+        for item in data.get('processed_sessions', []):
+            result = item.get('result') or {}
+            if result.get('skipped'):
+                sessions['skipped'] += 1
+                continue
+            sessions['failed' if result.get('success') is False else 'processed'] += 1
+            for span in (result.get('trace') or {}).get('spans', []):
+                if span['stage'] not in EXCHANGE_STAGES:
+                    continue
+                signal_calls += 1
+                if span['stage'] == 'place_order':
+                    orders += 1
+                    acked_ms = span['start_ms'] + span['duration_ms']
+                    signal_last_order = acked_ms if signal_last_order is None else max(signal_last_order, acked_ms)
+        calls_per_signal.append(signal_calls)
+        if signal_last_order is not None:
+            last_order_ms.append(signal_last_order)
+
+    elapsed = fired['elapsed_seconds']
+    completed = len(fired['responses']) - errors
+    return {
+        'signals': len(fired['responses']),
+        'errors': errors,
+        'sessions': sessions,
+        'orders': orders,
+        'latency_ms': {
+            # 서버 수신 시각 ~ 신호의 마지막 주문 응답 (세션 트레이스 기준)
+            'signal_to_last_order': percentiles(last_order_ms),
+            'webhook_handler': percentiles(webhook_ms),
+            'http_round_trip': percentiles(round_trip_ms),
+        },
+        'throughput': {
+            'elapsed_seconds': round(elapsed, 3),
+            'signals_per_second': round(completed / elapsed, 3),
+            'orders_per_second': round(orders / elapsed, 3),
+        },
+        'exchange_calls_per_signal': round(sum(calls_per_signal) / len(calls_per_signal), 3) if calls_per_signal else 0.0,
+    }
+
+
+async def _fetch_json(url: str, headers: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+    try:
+        async with aiohttp.ClientSession() as http:
+            async with http.get(url, headers=headers or {}) as response:
+                return await response.json()
+    except Exception:
+        return None
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="bench-webhook-")
+    db_path = os.path.join(workdir, "bench.db")
+    admin_token = secrets.token_hex(8)
+    exchange_port = _free_port()
+    app_port = _free_port()
+    processes: List[subprocess.Popen] = []
+    try:
+        seed_sessions(db_path, args.sessions)
+
+        exchange = _start_process(
+            ['-m', 'app.services.paper_exchange', '--port', str(exchange_port)],
+            {
+                'PAPER_LATENCY_MS': str(args.latency_ms),
+                'PAPER_LATENCY_JITTER_MS': str(args.jitter_ms),
+                'PAPER_ERROR_RATE': str(args.error_rate),
+                'PAPER_SEED': str(args.seed),
+                'PAPER_EXCHANGE_URL': '',
+                'SQLITE_DB_PATH': os.path.join(workdir, "exchange.db"),
+                'LOG_LEVEL': 'WARNING',
+            },
+            os.path.join(workdir, "exchange.log")
+        )
+        processes.append(exchange)
+        exchange_url = f"http://127.0.0.1:{exchange_port}"
+        await _wait_ready(f"{exchange_url}/paper/stats", exchange)
+
+        app = _start_process(
+            ['-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1', '--port', str(app_port),
+             '--workers', str(args.workers), '--log-level', 'warning', '--no-access-log'],
+            {
+                'SQLITE_DB_PATH': db_path,
+                'PAPER_EXCHANGE_URL': exchange_url,
+                'ADMIN_TOKEN': admin_token,
+                'EQUITY_POLL_ENABLED': 'false',
+                'CANDLE_STORE_SYMBOLS': '',
+                'WEBHOOK_SHARD_WORKERS': str(args.shards),
+                'SHARD_SOCKET_DIR': os.path.join(workdir, "shards"),
+                'LOG_LEVEL': 'WARNING',
+                'LOG_FILE': os.path.join(workdir, "app.log"),
+                # 팬아웃이 길어도 세션을 건너뛰지 않도록 기본은 지연 예산 끔
+                'SIGNAL_LATENCY_BUDGET_MS': str(args.latency_budget_ms),
+            },
+            os.path.join(workdir, "app.stdout.log")
+        )
+        processes.append(app)
+        app_url = f"http://127.0.0.1:{app_port}"
+        await _wait_ready(f"{app_url}/", app)
+
+        before = await _fetch_json(f"{exchange_url}/paper/stats") or {}
+        fired = await fire_signals(app_url, args.signals, args.rate, args.actions.split(','), args.symbol, args.timeout)
+        after = await _fetch_json(f"{exchange_url}/paper/stats") or {}
+
+        results = summarize(fired)
+        # 모의 거래소가 실제로 받은 요청 수 (트레이스 집계와 교차 확인)
+        results['exchange_requests'] = after.get('requests', 0) - before.get('requests', 0)
+        latency = await _fetch_json(f"{app_url}/api/diagnostics/latency", {'X-Admin-Token': admin_token})
+        if latency and args.workers == 1:
+            # 워커가 여럿이면 요청을 받은 워커의 통계만 보이므로 단일 워커일 때만 포함
+            results['stages_ms'] = {
+                stage: {key: summary[key] for key in ('count', 'p50', 'p95', 'p99', 'max')}
+                for stage, by_exchange in latency['data']['stages'].items()
+                for summary in by_exchange.get('paper', by_exchange.get('all', {})).values()
+            }
+        return results
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if args.keep:
+            print(f"작업 디렉터리 유지: {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="웹훅 종단 간 부하 벤치마크")
+    parser.add_argument("--sessions", type=int, default=100, help="신호를 받을 세션(계정) 수")
+    parser.add_argument("--signals", type=int, default=20, help="보낼 신호 수")
+    parser.add_argument("--rate", type=float, default=1.0, help="초당 신호 수 (0이면 한꺼번에)")
+    parser.add_argument("--actions", default="LONG,CLOSE", help="순서대로 반복할 액션 (쉼표 구분)")
+    parser.add_argument("--symbol", default="BTCUSDT.P")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="모의 거래소 기본 응답 지연")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="모의 거래소 지연 지터 (지수분포 평균)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="모의 거래소 오류 응답 비율")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn 워커 수")
+    parser.add_argument("--shards", type=int, default=0, help="웹훅 샤드 워커 수 (WEBHOOK_SHARD_WORKERS)")
+    parser.add_argument("--latency-budget-ms", type=float, default=0.0,
+                        help="신호 지연 예산 (SIGNAL_LATENCY_BUDGET_MS, 0이면 끔)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="신호 하나의 응답 대기 시간 (초)")
+    parser.add_argument("--output", help="보고서 JSON 저장 경로")
+    parser.add_argument("--compare", help="비교할 기준 보고서 JSON")
+    parser.add_argument("--threshold", type=float, default=10.0, help="회귀로 볼 악화 비율 (%%)")
+    parser.add_argument("--keep", action="store_true", help="임시 디렉터리(DB/로그) 유지")
+    args = parser.parse_args()
+
+    params = {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'keep')}
+    report = build_report("webhook_load", params, asyncio.run(run(args)))
+    write_report(report, args.output)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('params') != params:
+            print("⚠️ 기준 보고서와 실행 조건이 다릅니다.", file=sys.stderr)
+        if print_comparison(compare(report, baseline, COMPARED_METRICS, args.threshold), baseline):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+
+# 앱 모듈을 import하기 전에 임시 DB와 테스트용 설정 지정 (설정은 처음 읽을 때 고정됨)
+_workdir = tempfile.mkdtemp(prefix="next-auto-tests-")
+os.environ.setdefault('SQLITE_DB_PATH', os.path.join(_workdir, "test.db"))
+os.environ.setdefault('LOG_FILE', os.path.join(_workdir, "app.log"))
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('EQUITY_POLL_ENABLED', 'false')
+os.environ.setdefault('ADMIN_TOKEN', 'test-admin-token')
+os.environ.setdefault('CANDLE_STORE_DIR', os.path.join(_workdir, "candles"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def session_row():
+    """save_session에 넘기는 세션 설정"""
+    def build(session_id: str, **overrides):
+        row = dict(
+            session_id=session_id, user_email='test@example.com', api_key=f'key-{session_id}',
+            secret_key=f'secret-{session_id}', exchange_type='paper', investment=100, leverage=5,
+            take_profit=2, stop_loss=1, indicator='PREMIUM', is_auto_trading_enabled=True
+        )
+        row.update(overrides)
+        return row
+    return build
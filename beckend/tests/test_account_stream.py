@@ -0,0 +1,50 @@
+import asyncio
+
+from app.core.config import get_settings
+from app.services.account_stream import AccountStreamHub, _AccountFeed
+from app.services.paper_exchange import paper_exchange
+
+settings = get_settings()
+
+
+def test_refresh_interval_is_floored_at_balance_cache_ttl():
+    assert AccountStreamHub(interval_seconds=1.0).interval_seconds == settings.balance_cache_ttl_seconds
+    assert AccountStreamHub(interval_seconds=30.0).interval_seconds == 30.0
+
+
+def test_refresh_reuses_cached_balance():
+    hub = AccountStreamHub(interval_seconds=1.0)
+    feed = _AccountFeed('stream-account', 'key-stream', 'secret-stream', 'paper')
+
+    async def fetch_twice():
+        await hub._fetch_state(feed)
+        before = paper_exchange.request_count
+        await hub._fetch_state(feed)
+        return paper_exchange.request_count - before
+
+    # 두 번째 갱신은 포지션만 조회하고 잔고는 캐시 사용
+    assert asyncio.run(fetch_twice()) == 1
+
+
+def test_change_during_fetch_triggers_another_refresh():
+    hub = AccountStreamHub(interval_seconds=30.0)
+    feed = _AccountFeed('stream-notify', 'key-notify', 'secret-notify', 'paper')
+    fetches = []
+
+    async def fetch_state(_feed):
+        fetches.append(len(fetches))
+        if len(fetches) == 1:
+            # 첫 조회 도중 체결 알림
+            feed.wakeup.set()
+        return {'fetch': len(fetches)}
+
+    hub._fetch_state = fetch_state
+
+    async def scenario():
+        task = asyncio.create_task(hub._refresh_loop(feed))
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert len(fetches) == 2
+    assert feed.last_event['fetch'] == 2
@@ -0,0 +1,161 @@
+import math
+import time
+
+import numpy as np
+import pytest
+
+from app.services.analytics_service import (
+    AnalyticsService, _distribution, _equity_metrics, _execution_metrics, _trade_metrics
+)
+from app.services.ledger_service import LedgerService
+
+
+def _trades(rows):
+    """(세션, 심볼, 진입 여부, 포지션 방향, 수량, 체결가, 시각) 행을 (세션, 심볼, 시각) 순으로 정렬한 배열"""
+    rows = sorted(rows, key=lambda row: (row[0], row[1], row[6]))
+    columns = list(zip(*rows))
+    return {
+        'session': np.array(columns[0], dtype=np.int64),
+        'symbol': np.array(columns[1], dtype=np.int64),
+        'is_open': np.array(columns[2], dtype=bool),
+        'position_side': np.array(columns[3], dtype=str),
+        'quantity': np.array(columns[4], dtype=float),
+        'fill_price': np.array(columns[5], dtype=float),
+        'time': np.array(columns[6], dtype=float),
+    }
+
+
+OPEN, CLOSE = True, False
+
+
+@pytest.mark.parametrize('rows, expected', [
+    # 롱 진입 100 x2, 청산 110: (110 - 100) * 2
+    ([(0, 0, OPEN, 'LONG', 2, 100, 1), (0, 0, CLOSE, 'LONG', 2, 110, 2)],
+     dict(trade_count=1, wins=1, realized_pnl=20, gross_profit=20, gross_loss=0, unmatched_opens=0, unmatched_closes=0)),
+    # 숏 진입 100 x3, 청산 90: (90 - 100) * 3 * -1
+    ([(0, 0, OPEN, 'SHORT', 3, 100, 1), (0, 0, CLOSE, 'SHORT', 3, 90, 2)],
+     dict(trade_count=1, wins=1, realized_pnl=30, gross_profit=30, gross_loss=0, unmatched_opens=0, unmatched_closes=0)),
+    # 두 번째 청산은 이미 쓴 진입과 다시 짝짓지 않음
+    ([(0, 0, OPEN, 'LONG', 1, 100, 1), (0, 0, CLOSE, 'LONG', 1, 110, 2), (0, 0, CLOSE, 'LONG', 1, 120, 3)],
+     dict(trade_count=1, wins=1, realized_pnl=10, gross_profit=10, gross_loss=0, unmatched_opens=0, unmatched_closes=1)),
+    # 첫 진입은 거래소 익절/손절로 청산되어 원장에 청산이 없음: 두 번째 진입만 (103 - 105)
+    ([(0, 0, OPEN, 'LONG', 1, 100, 1), (0, 0, OPEN, 'LONG', 1, 105, 2), (0, 0, CLOSE, 'LONG', 1, 103, 3)],
+     dict(trade_count=1, wins=0, realized_pnl=-2, gross_profit=0, gross_loss=2, unmatched_opens=1, unmatched_closes=0)),
+    # 반대 포지션 전환: 롱 +10, 숏 (120 - 110) * -1 = -10
+    ([(0, 0, OPEN, 'LONG', 1, 100, 1), (0, 0, CLOSE, 'LONG', 1, 110, 2),
+      (0, 0, OPEN, 'SHORT', 1, 110, 3), (0, 0, CLOSE, 'SHORT', 1, 120, 4)],
+     dict(trade_count=2, wins=1, realized_pnl=0, gross_profit=10, gross_loss=10, unmatched_opens=0, unmatched_closes=0)),
+    # 다른 심볼의 진입과는 짝짓지 않음
+    ([(0, 0, OPEN, 'LONG', 1, 100, 1), (0, 1, CLOSE, 'LONG', 1, 50, 2)],
+     dict(trade_count=0, wins=0, realized_pnl=0, gross_profit=0, gross_loss=0, unmatched_opens=0, unmatched_closes=1)),
+])
+def test_trade_pairing_and_pnl(rows, expected):
+    stats = _trade_metrics(_trades(rows), np.array([0]), 1, 0.0, 100.0)
+    assert {name: float(stats[name][0]) for name in expected} == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('rows, exposure', [
+    # 10초에 진입해 30초에 청산: 20 / (100 - 10)
+    ([(0, 0, OPEN, 'LONG', 1, 100, 10), (0, 0, CLOSE, 'LONG', 1, 101, 30)], 20 / 90),
+    # 원장 밖에서 청산된 첫 진입은 보유 시간을 추정하지 않음: 두 번째 진입 20~30초만
+    ([(0, 0, OPEN, 'LONG', 1, 100, 10), (0, 0, OPEN, 'LONG', 1, 100, 20), (0, 0, CLOSE, 'LONG', 1, 101, 30)], 10 / 90),
+    # 청산이 없으면 구간 끝까지 보유
+    ([(0, 0, OPEN, 'LONG', 1, 100, 40)], 60 / 60),
+])
+def test_exposure(rows, exposure):
+    stats = _trade_metrics(_trades(rows), np.array([0]), 1, 0.0, 100.0)
+    assert stats['exposure'][0] == pytest.approx(exposure)
+
+
+def test_trades_are_grouped_by_session_group():
+    rows = [(0, 0, OPEN, 'LONG', 1, 100, 1), (0, 0, CLOSE, 'LONG', 1, 110, 2),
+            (1, 0, OPEN, 'LONG', 1, 100, 1), (1, 0, CLOSE, 'LONG', 1, 95, 2),
+            (2, 0, OPEN, 'LONG', 1, 100, 1), (2, 0, CLOSE, 'LONG', 1, 101, 2)]
+    # 세션 0, 2는 그룹 0, 세션 1은 그룹 1
+    stats = _trade_metrics(_trades(rows), np.array([0, 1, 0]), 2, 0.0, 100.0)
+    assert list(stats['realized_pnl']) == [11, -5]
+    assert list(stats['trade_count']) == [2, 1]
+
+
+@pytest.mark.parametrize('closes, cumulative_pnl, max_drawdown, periods', [
+    # 수익률 +10%, -10%, +21.2%: 곡선 1.1 → 0.99 → 1.2, 최대낙폭 1 - 0.99 / 1.1
+    ([100, 110, 99, 120], 20, 0.1, 3),
+    # 계속 오르면 낙폭 0
+    ([100, 101, 102], 2, 0.0, 2),
+    # 100 → 50 → 75: 곡선 0.5 → 0.75, 최대낙폭 50%
+    ([100, 50, 75], -25, 0.5, 2),
+])
+def test_equity_drawdown(closes, cumulative_pnl, max_drawdown, periods):
+    equity = {
+        'session': np.zeros(len(closes), dtype=np.int64),
+        'bucket': np.arange(len(closes), dtype=np.int64) * 60,
+        'close': np.array(closes, dtype=float),
+    }
+    stats = _equity_metrics(equity, np.array([0]), 1, 365 * 1440)
+    assert stats['cumulative_pnl'][0] == pytest.approx(cumulative_pnl)
+    assert stats['max_drawdown'][0] == pytest.approx(max_drawdown)
+    assert stats['periods'][0] == periods
+
+
+def test_sharpe_needs_two_periods():
+    equity = {'session': np.zeros(2, dtype=np.int64), 'bucket': np.array([0, 60]), 'close': np.array([100.0, 110.0])}
+    assert math.isnan(_equity_metrics(equity, np.array([0]), 1, 365 * 1440)['sharpe'][0])
+
+
+@pytest.mark.parametrize('values, expected', [
+    # 선형 보간 백분위: p90 = 30 + 0.7 * 10, p99 = 30 + 0.97 * 10
+    ([10, 20, 30, 40, float('nan')], {'count': 4, 'mean': 25.0, 'p50': 25.0, 'p90': 37.0, 'p99': 39.7,
+                                      'min': 10.0, 'max': 40.0}),
+    ([5], {'count': 1, 'mean': 5.0, 'p50': 5.0, 'p90': 5.0, 'p99': 5.0, 'min': 5.0, 'max': 5.0}),
+    ([float('nan')], {'count': 0}),
+])
+def test_latency_distribution(values, expected):
+    assert _distribution(np.array(values, dtype=float)) == expected
+
+
+@pytest.mark.parametrize('side, fill_price, slippage_bps, sizing_slippage_bps', [
+    # 매수: 신호가 100보다 비싸게 체결되면 불리 (+), 현재가 101보다 싸게 체결되면 유리 (-)
+    ('BUY', 100.5, 50, -49.505),
+    # 매도: 신호가 100보다 싸게 체결되면 불리 (+)
+    ('SELL', 99.8, 20, 118.812),
+    ('SELL', 100.2, -20, 79.208),
+])
+def test_execution_slippage(side, fill_price, slippage_bps, sizing_slippage_bps):
+    fills = {
+        'side': np.array([side]), 'fill_price': np.array([fill_price]),
+        'signal_price': np.array([100.0]), 'sizing_price': np.array([101.0]),
+        'received_at': np.array([10.0]), 'requested_at': np.array([10.25]), 'filled_at': np.array([10.75]),
+    }
+    metrics = _execution_metrics(fills)
+    assert metrics['slippage_bps'][0] == pytest.approx(slippage_bps)
+    assert metrics['sizing_slippage_bps'][0] == pytest.approx(sizing_slippage_bps, abs=1e-3)
+    assert metrics['time_to_fill_ms'][0] == pytest.approx(750)
+    assert metrics['order_to_fill_ms'][0] == pytest.approx(500)
+
+
+def test_execution_report_from_ledger():
+    received = time.time() - 60
+    ledger = LedgerService()
+
+    def trade(session_id, status, fill_price, position):
+        # 신호가 100, 현재가 100, 주문 0.1초 뒤 요청, 체결은 순서마다 0.5초씩 늦게
+        filled_at = received + 0.5 * (position + 1) if fill_price is not None else None
+        return ('exec-report', session_id, 'paper', 'EXEC-USDT', 'LONG', 'open', 'BUY', 'LONG', 1.0, status,
+                None, fill_price, None, received, received + 0.1, None, None, None,
+                100.0, 100.0, None, filled_at, None, position)
+
+    ledger._write_items([
+        ('signal', ('exec-report', received, 'EXEC-USDT', 'PREMIUM', 'LONG', '{}')),
+        ('trades', [trade('exec-a', 'success', 100.1, 0), trade('exec-b', 'success', 100.2, 1),
+                    trade('exec-c', 'success', 100.3, 2), trade('exec-d', 'failed', None, 3)]),
+    ])
+
+    report = AnalyticsService().get_execution_report(days=1)
+    group = report['symbols']['EXEC-USDT']
+    # 실패한 주문은 체결 품질에서 제외
+    assert group['orders'] == 3
+    assert group['slippage_bps']['mean'] == pytest.approx(20)
+    assert group['slippage_bps']['min'] == pytest.approx(10)
+    assert group['slippage_bps']['max'] == pytest.approx(30)
+    assert group['time_to_fill_ms']['p50'] == pytest.approx(1000, abs=1)
+    assert group['order_to_fill_ms']['min'] == pytest.approx(400, abs=1)
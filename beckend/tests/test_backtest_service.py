@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from app.services.backtest_service import _first_hits, build_trades, run_sweep
+
+
+def _candles(opens, highs, lows, closes) -> dict:
+    n = len(opens)
+    return {'ts': np.arange(n, dtype=np.int64) * 60, 'open': np.asarray(opens, dtype=np.float64),
+            'high': np.asarray(highs, dtype=np.float64), 'low': np.asarray(lows, dtype=np.float64),
+            'close': np.asarray(closes, dtype=np.float64), 'volume': np.ones(n)}
+
+
+def _random_candles(n: int, seed: int = 7) -> dict:
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    opens = np.append(100.0, closes[:-1])
+    spread = np.abs(rng.normal(0, 0.01, n))
+    return _candles(opens, np.maximum(opens, closes) * (1 + spread), np.minimum(opens, closes) * (1 - spread), closes)
+
+
+def _brute_first_hits(candles, trades, levels, favorable: bool) -> np.ndarray:
+    hits = np.zeros((len(trades['entry_bar']), len(levels)), dtype=np.int64)
+    for t, (entry_bar, exit_bar) in enumerate(zip(trades['entry_bar'], trades['exit_bar'])):
+        entry = trades['entry_price'][t]
+        long = trades['direction'][t] > 0
+        for j, level in enumerate(levels):
+            hits[t, j] = exit_bar - entry_bar
+            for k, bar in enumerate(range(entry_bar, exit_bar)):
+                up = candles['high'][bar] / entry - 1.0
+                down = 1.0 - candles['low'][bar] / entry
+                excursion = (up if long else down) if favorable else (down if long else up)
+                if excursion >= level:
+                    hits[t, j] = k
+                    break
+    return hits
+
+
+def test_first_hits_matches_bar_by_bar_scan():
+    candles = _random_candles(400)
+    rng = np.random.default_rng(3)
+    times = np.sort(rng.choice(candles['ts'][:-1], 40, replace=False)).astype(np.float64)
+    signals = [(t, rng.choice(['LONG', 'SHORT', 'CLOSE'])) for t in times]
+    trades = build_trades(candles, signals)
+    levels = np.array([0.002, 0.01, 0.03, np.inf])
+
+    tp_hits, stop_hits = _first_hits(candles, trades, levels, levels)
+    np.testing.assert_array_equal(tp_hits, _brute_first_hits(candles, trades, levels, favorable=True))
+    np.testing.assert_array_equal(stop_hits, _brute_first_hits(candles, trades, levels, favorable=False))
+
+
+def test_trades_enter_and_exit_on_next_bar_open():
+    candles = _candles([100, 101, 102, 103, 104], [100] * 5, [100] * 5, [100, 101, 102, 103, 104.5])
+    trades = build_trades(candles, [(30, 'LONG'), (150, 'CLOSE'), (200, 'SHORT')])
+    assert trades['entry_bar'].tolist() == [1, 4]
+    assert trades['exit_bar'].tolist() == [3, 5]
+    assert trades['direction'].tolist() == [1.0, -1.0]
+    # 다음 신호가 없으면 마지막 종가로 청산
+    assert trades['hold_move'][1] == pytest.approx(-(104.5 / 104 - 1))
+
+
+def test_stop_wins_when_both_levels_touch_the_same_bar():
+    candles = _candles([100, 100, 100], [100, 103, 100], [100, 97, 100], [100, 100, 100])
+    result = run_sweep(candles, [(0, 'LONG')], [1], [2.0], [2.0], fee_rate=0.0)
+    best = result['results'][0]
+    assert best['stop_hits'] == 1 and best['take_profit_hits'] == 0
+    assert best['total_pnl'] == pytest.approx(-2.0)
+
+
+def test_liquidation_before_stop_loses_the_margin():
+    candles = _candles([100, 100, 100], [100, 100, 100], [100, 90, 100], [100, 100, 100])
+    result = run_sweep(candles, [(0, 'LONG')], [20], [0.0], [8.0], fee_rate=0.0)
+    best = result['results'][0]
+    assert best['liquidations'] == 1
+    assert best['total_pnl'] == pytest.approx(-100.0)
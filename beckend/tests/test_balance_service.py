@@ -0,0 +1,33 @@
+import asyncio
+
+from app.services.balance_service import BalanceService
+
+
+def test_concurrent_lookups_share_one_exchange_call():
+    service = BalanceService(ttl_seconds=5)
+
+    async def scenario():
+        results = await asyncio.gather(*[
+            service.get_account_data('key-coalesce', 'secret', 'paper') for _ in range(10)
+        ])
+        await service.get_account_data('key-coalesce', 'secret', 'paper')
+        return results
+
+    results = asyncio.run(scenario())
+    assert service.exchange_calls == 1
+    assert service.cache_hits == 10
+    assert all(result == results[0] for result in results)
+
+
+def test_invalidate_and_max_age_force_a_fresh_call():
+    service = BalanceService(ttl_seconds=5)
+
+    async def scenario():
+        await service.get_account_data('key-refresh', 'secret', 'paper')
+        service.invalidate('key-refresh', 'paper')
+        await service.get_account_data('key-refresh', 'secret', 'paper')
+        await asyncio.sleep(0.02)
+        await service.get_account_data('key-refresh', 'secret', 'paper', max_age=0.01)
+
+    asyncio.run(scenario())
+    assert service.exchange_calls == 3
@@ -0,0 +1,35 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_micro_benchmarks_smoke(tmp_path):
+    output = tmp_path / 'micro.json'
+    completed = subprocess.run(
+        [sys.executable, '-m', 'bench.micro', '--session-rows', '10', '--repeat', '1', '--min-time', '0.001',
+         '--baseline', str(tmp_path / 'no-baseline.json'), '--output', str(output)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=120
+    )
+    assert completed.returncode == 0, completed.stderr
+
+    report = json.loads(output.read_text(encoding='utf-8'))
+    assert report['benchmark'] == 'micro'
+    results = report['results']
+    assert {'bingx.generate_signature', 'webhook.parse_signal', 'get_all_sessions.cached.10'} <= set(results)
+    assert all(result['min_ns'] > 0 and result['loops'] >= 1 for result in results.values())
+
+
+def test_update_baseline_writes_merged_results(tmp_path):
+    baseline = tmp_path / 'baseline.json'
+    for name in ('parse_signal', 'generate_signature'):
+        completed = subprocess.run(
+            [sys.executable, '-m', 'bench.micro', '--filter', name, '--session-rows', '10', '--repeat', '1',
+             '--min-time', '0.001', '--baseline', str(baseline), '--update-baseline'],
+            cwd=BACKEND_DIR, capture_output=True, text=True, timeout=120
+        )
+        assert completed.returncode == 0, completed.stderr
+    saved = json.loads(baseline.read_text(encoding='utf-8'))['results']
+    assert set(saved) == {'webhook.parse_signal', 'bingx.generate_signature'}
@@ -0,0 +1,25 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_webhook_load_smoke(tmp_path):
+    output = tmp_path / 'webhook-load.json'
+    completed = subprocess.run(
+        [sys.executable, '-m', 'bench.webhook_load', '--sessions', '2', '--signals', '2', '--rate', '0',
+         '--latency-ms', '0', '--jitter-ms', '0', '--timeout', '30', '--output', str(output)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=120
+    )
+    assert completed.returncode == 0, completed.stderr
+
+    report = json.loads(output.read_text(encoding='utf-8'))
+    assert report['benchmark'] == 'webhook_load'
+    results = report['results']
+    assert results['signals'] == 2 and results['errors'] == 0
+    # LONG, CLOSE 신호가 세션 2개에 각각 처리됨
+    assert results['sessions']['processed'] == 4
+    assert results['exchange_requests'] > 0
+    assert results['latency_ms']['signal_to_last_order']['p50'] > 0
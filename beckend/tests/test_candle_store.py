@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+
+from app.services.candle_store import CandleStore
+
+
+def _candles(ts) -> dict:
+    ts = np.asarray(ts, dtype=np.int64)
+    prices = ts.astype(np.float64)
+    return {'ts': ts, 'open': prices, 'high': prices, 'low': prices, 'close': prices,
+            'volume': np.ones(len(ts))}
+
+
+def test_find_gaps_aligns_unaligned_start(tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.write('BTC-USDT', '1m', _candles([60, 120]))
+    assert store.find_gaps('BTC-USDT', '1m', 60, start=100.5, end=180) == []
+    assert store.find_gaps('BTC-USDT', '1m', 60, start=100.5, end=300) == [(180, 300)]
+
+
+def test_find_gaps_reports_leading_middle_and_trailing_holes(tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.write('BTC-USDT', '1m', _candles([120, 180, 360]))
+    assert store.find_gaps('BTC-USDT', '1m', 60, start=0, end=540) == [(0, 120), (240, 360), (420, 540)]
+    assert store.find_gaps('BTC-USDT', '1m', 60) == [(240, 360)]
+
+
+def test_find_gaps_on_empty_store(tmp_path):
+    store = CandleStore(str(tmp_path))
+    assert store.find_gaps('BTC-USDT', '1m', 60, start=30, end=180) == [(0, 180)]
+    assert store.find_gaps('BTC-USDT', '1m', 60) == []
+
+
+def test_merge_write_replaces_file_without_leftover_temp(tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.write('BTC-USDT', '1m', _candles([60, 180]))
+    store.write('BTC-USDT', '1m', _candles([120]))
+    assert store.read('BTC-USDT', '1m')['ts'].tolist() == [60, 120, 180]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
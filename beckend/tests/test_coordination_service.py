@@ -0,0 +1,89 @@
+import time
+import asyncio
+
+from app.services.coordination_service import CoordinationService, coordination_service
+
+
+def test_claim_signal_rejects_duplicates_within_window():
+    other = CoordinationService()
+    assert coordination_service.claim_signal('claim-dup', window_seconds=5)
+    assert not other.claim_signal('claim-dup', window_seconds=5)
+    assert not coordination_service.claim_signal('claim-dup', window_seconds=5)
+
+
+def test_claim_signal_allows_reclaim_after_window():
+    assert coordination_service.claim_signal('claim-expired', window_seconds=0.05)
+    time.sleep(0.1)
+    assert CoordinationService().claim_signal('claim-expired', window_seconds=5)
+
+
+def test_signal_key_uses_alert_time_when_present():
+    data = {'action': 'LONG', 'symbol': 'BTCUSDT.P', 'strategy': 'PREMIUM', 'time': '2024-01-01T00:00:00Z'}
+    key = coordination_service.make_signal_key(b'first', 'LONG', 'BTC-USDT', 'PREMIUM', data)
+    # 같은 바의 재전송은 본문 공백/필드 순서가 달라도 같은 키
+    assert coordination_service.make_signal_key(b'resent', 'LONG', 'BTC-USDT', 'PREMIUM', dict(data)) == key
+    next_bar = dict(data, time='2024-01-01T00:01:00Z')
+    assert coordination_service.make_signal_key(b'first', 'LONG', 'BTC-USDT', 'PREMIUM', next_bar) != key
+
+
+def test_signal_key_falls_back_to_body_without_times():
+    data = {'action': 'LONG', 'symbol': 'BTCUSDT.P'}
+    key = coordination_service.make_signal_key(b'body', 'LONG', 'BTC-USDT', 'PREMIUM', data)
+    assert key == coordination_service.make_signal_key(b'body', 'LONG', 'BTC-USDT', 'PREMIUM', data)
+    assert key != coordination_service.make_signal_key(b'other', 'LONG', 'BTC-USDT', 'PREMIUM', data)
+
+
+def test_lease_is_exclusive_per_acquisition():
+    other = CoordinationService()
+    token = other.acquire_lease('lease-exclusive', ttl_seconds=30)
+    assert token
+    assert not coordination_service.acquire_lease('lease-exclusive')
+    # 같은 워커라도 다른 요청은 얻지 못하고, 토큰을 가진 쪽만 연장 가능
+    assert not other.acquire_lease('lease-exclusive', ttl_seconds=30)
+    assert other.acquire_lease('lease-exclusive', ttl_seconds=30, token=token) == token
+    # 다른 토큰으로는 해제되지 않음
+    other.release_lease('lease-exclusive', 'someone-else')
+    assert not coordination_service.acquire_lease('lease-exclusive')
+    other.release_lease('lease-exclusive', token)
+    token = coordination_service.acquire_lease('lease-exclusive')
+    assert token
+    coordination_service.release_lease('lease-exclusive', token)
+
+
+def test_lease_can_be_taken_after_expiry():
+    other = CoordinationService()
+    assert other.acquire_lease('lease-expired', ttl_seconds=0.05)
+    time.sleep(0.1)
+    token = coordination_service.acquire_lease('lease-expired')
+    assert token
+    coordination_service.release_lease('lease-expired', token)
+
+
+def test_lease_is_not_granted_on_database_error(monkeypatch):
+    service = CoordinationService()
+
+    def broken_connection():
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(service.db, 'get_connection', broken_connection)
+    assert service.acquire_lease('lease-error') is None
+
+
+def test_wait_for_lease_retries_until_released():
+    other = CoordinationService()
+    assert other.acquire_lease('lease-wait', ttl_seconds=0.2)
+    started = time.monotonic()
+    token = asyncio.run(coordination_service.wait_for_lease('lease-wait', timeout=2))
+    assert token
+    assert time.monotonic() - started >= 0.1
+    coordination_service.release_lease('lease-wait', token)
+
+
+def test_wait_for_lease_gives_up_after_timeout():
+    other = CoordinationService()
+    token = other.acquire_lease('lease-timeout', ttl_seconds=30)
+    assert token
+    started = time.monotonic()
+    assert not asyncio.run(coordination_service.wait_for_lease('lease-timeout', timeout=0.2))
+    assert time.monotonic() - started < 1
+    other.release_lease('lease-timeout', token)
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+from app.services.coordination_service import CoordinationService, coordination_service
+from app.services.equity_poller import POLLER_LEASE_KEY, EquityPoller, rate_limit_wait_ms
+from app.services.equity_snapshot_service import equity_snapshot_service
+from app.services.sqlite_session_service import sqlite_session_service
+
+
+def _poller() -> EquityPoller:
+    poller = EquityPoller()
+    poller.interval_seconds = 0.01
+    poller.max_requests_per_second = 100.0
+    return poller
+
+
+def _release(poller: EquityPoller) -> None:
+    if poller._lease_token:
+        coordination_service.release_lease(POLLER_LEASE_KEY, poller._lease_token)
+
+
+def test_spacing_counts_balance_and_positions_requests(session_row):
+    sqlite_session_service.save_session(session_row('poll-a'))
+    sqlite_session_service.save_session(session_row('poll-b'))
+    poller = _poller()
+    cycle = asyncio.run(poller.poll_once())
+    _release(poller)
+    assert cycle['accounts'] >= 2
+    assert cycle['spacing_seconds'] == 0.02
+    assert cycle['sampled'] == cycle['accounts']
+    assert not cycle['lease_lost']
+
+
+def test_cycle_stops_when_lease_is_taken_over(session_row):
+    sqlite_session_service.save_session(session_row('poll-c'))
+    sqlite_session_service.save_session(session_row('poll-d'))
+    other = CoordinationService()
+    token = other.acquire_lease(POLLER_LEASE_KEY, ttl_seconds=30)
+    assert token
+    try:
+        cycle = asyncio.run(_poller().poll_once())
+    finally:
+        other.release_lease(POLLER_LEASE_KEY, token)
+    assert cycle['lease_lost']
+    assert cycle['sampled'] == 1
+
+
+def test_rate_limit_wait_recorded_only_when_rate_floor_binds(session_row):
+    sqlite_session_service.save_session(session_row('poll-e'))
+    sqlite_session_service.save_session(session_row('poll-f'))
+    waits = rate_limit_wait_ms.get(component='equity_poller')
+
+    spread = _poller()
+    spread.interval_seconds = 0.05
+    spread.max_requests_per_second = 1_000_000.0
+    before = waits.count
+    asyncio.run(spread.poll_once())
+    _release(spread)
+    assert waits.count == before
+
+    limited = _poller()
+    before = waits.count
+    cycle = asyncio.run(limited.poll_once())
+    _release(limited)
+    assert waits.count == before + cycle['accounts'] - 1
+
+
+def test_snapshots_are_written_off_the_event_loop(session_row, monkeypatch):
+    sqlite_session_service.save_session(session_row('poll-g'))
+    writer_threads = []
+    save = equity_snapshot_service.save_snapshots
+
+    def record_thread(snapshots):
+        writer_threads.append(threading.get_ident())
+        return save(snapshots)
+
+    monkeypatch.setattr(equity_snapshot_service, 'save_snapshots', record_thread)
+    poller = _poller()
+    asyncio.run(poller.poll_once())
+    _release(poller)
+    assert writer_threads
+    assert threading.get_ident() not in writer_threads
@@ -0,0 +1,25 @@
+from app.services.equity_snapshot_service import equity_snapshot_service
+
+
+def _snapshot(session_id: str, ts: float, equity: float) -> dict:
+    return {'session_id': session_id, 'ts': ts, 'total_balance': equity, 'available_balance': equity,
+            'unrealized_pnl': 0.0, 'equity': equity, 'positions': []}
+
+
+def test_rollups_keep_ohlc_regardless_of_arrival_order():
+    base = 1_700_000_000 // 3600 * 3600
+    snapshots = [_snapshot('rollup', base + offset, equity)
+                 for offset, equity in ((30, 105.0), (0, 100.0), (50, 95.0), (40, 110.0))]
+    assert equity_snapshot_service.save_snapshots(snapshots[:2])
+    assert equity_snapshot_service.save_snapshots(snapshots[2:])
+
+    resolution, points = equity_snapshot_service.query_range('rollup', base, base + 3600, resolution='1m')
+    assert resolution == '1m'
+    assert len(points) == 1
+    point = points[0]
+    assert (point['open'], point['high'], point['low'], point['close']) == (100.0, 110.0, 95.0, 95.0)
+    assert point['samples'] == 4
+
+    _, raw = equity_snapshot_service.query_range('rollup', base, base + 3600, resolution='raw')
+    assert [p['close'] for p in raw] == [100.0, 105.0, 110.0, 95.0]
+    assert equity_snapshot_service.get_latest_snapshot('rollup')['equity'] == 95.0
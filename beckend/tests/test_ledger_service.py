@@ -0,0 +1,59 @@
+import json
+
+from app.services import ledger_service as ledger_module
+from app.services.ledger_service import LedgerService, ledger_rows_dropped
+
+
+def _trade_row(signal_id: str, session_id):
+    return (signal_id, session_id, 'paper', 'BTC-USDT', 'LONG', 'open', 'BUY', 'LONG', 1.0, 'success',
+            None, None, None, 1.0, 1.0, None, None, None, None, None, None, None, None, 0)
+
+
+def test_bad_row_is_dropped_alone_after_batch_retries(monkeypatch):
+    monkeypatch.setattr(ledger_module, 'LEDGER_RETRY_BACKOFF_SECONDS', 0)
+    service = LedgerService()
+    attempts = []
+    write_items = service._write_items
+
+    def counting_write(batch):
+        attempts.append(len(batch))
+        return write_items(batch)
+
+    monkeypatch.setattr(service, '_write_items', counting_write)
+    dropped = ledger_rows_dropped.value(kind='trades')
+    signal = ('ledger-partial', 1.0, 'BTC-USDT', 'PREMIUM', 'LONG', '{}')
+    # session_id가 NULL인 행은 NOT NULL 제약 위반
+    trades = [_trade_row('ledger-partial', 'good-a'), _trade_row('ledger-partial', None),
+              _trade_row('ledger-partial', 'good-b')]
+    service._write_batch([('signal', signal), ('trades', trades)])
+
+    assert attempts[:ledger_module.LEDGER_WRITE_ATTEMPTS] == [2] * ledger_module.LEDGER_WRITE_ATTEMPTS
+    assert ledger_rows_dropped.value(kind='trades') == dropped + 1
+    stored = service.get_signal('ledger-partial')
+    assert [trade['session_id'] for trade in stored['trades']] == ['good-a', 'good-b']
+
+
+def test_batch_is_retried_after_a_transient_failure(monkeypatch):
+    monkeypatch.setattr(ledger_module, 'LEDGER_RETRY_BACKOFF_SECONDS', 0)
+    service = LedgerService()
+    write_items = service._write_items
+    failures = [RuntimeError('database is locked')]
+
+    def flaky_write(batch):
+        if failures:
+            raise failures.pop()
+        return write_items(batch)
+
+    monkeypatch.setattr(service, '_write_items', flaky_write)
+    service._write_batch([('signal', ('ledger-retry', 1.0, 'BTC-USDT', 'PREMIUM', 'LONG', '{}'))])
+    assert service.get_signal('ledger-retry')['symbol'] == 'BTC-USDT'
+
+
+def test_signal_payload_secrets_are_redacted_before_storage():
+    service = LedgerService()
+    service.record_signal({'signal_id': 'ledger-redact', 'received_at': 1.0}, 'BTC-USDT', 'PREMIUM', 'LONG',
+                          {'action': 'LONG', 'passphrase': 'hunter2', 'strategy': 'PREMIUM'})
+    service.flush()
+    stored = service.get_signal('ledger-redact')['raw_payload']
+    assert stored == {'action': 'LONG', 'passphrase': '***', 'strategy': 'PREMIUM'}
+    assert 'hunter2' not in json.dumps(stored)
@@ -0,0 +1,34 @@
+import logging
+
+from app.core.config import get_settings
+from app.core.logging_pipeline import SamplingFilter, _parse_mapping, redact, redact_fields
+
+settings = get_settings()
+
+
+def _record(name: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, 'message', None, None)
+
+
+def test_trade_lines_are_never_sampled():
+    sampler = SamplingFilter({'app.api.webhook': 0.0})
+    assert all(sampler.filter(_record('app.api.webhook.trade')) for _ in range(100))
+    assert not sampler.filter(_record('app.api.webhook.session'))
+
+
+def test_warnings_bypass_sampling():
+    sampler = SamplingFilter({'app.services.bingx.payload': 0.0})
+    assert sampler.filter(_record('app.services.bingx.payload', logging.WARNING))
+
+
+def test_default_rates_only_sample_debug_detail_loggers():
+    categories = _parse_mapping(settings.log_sample_rates)
+    assert categories
+    assert all(name.endswith(('.payload', '.detail')) for name in categories)
+
+
+def test_secrets_are_redacted_in_messages_and_fields():
+    assert redact("요청 apiKey=abc123&signature=deadbeef") == "요청 apiKey=***&signature=***"
+    assert redact_fields({'secret_key': 'x', 'nested': [{'token': 'y', 'symbol': 'BTC-USDT'}]}) == {
+        'secret_key': '***', 'nested': [{'token': '***', 'symbol': 'BTC-USDT'}]
+    }
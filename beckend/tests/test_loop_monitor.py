@@ -0,0 +1,24 @@
+import asyncio
+import time
+
+from app.services.loop_monitor import LoopLagMonitor
+
+
+def test_block_reports_real_stall_duration():
+    monitor = LoopLagMonitor()
+    monitor.interval_seconds = 0.01
+    monitor.threshold_ms = 50.0
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        time.sleep(0.4)
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+    event = monitor.events[-1]
+    assert not event['ongoing']
+    # 임계값(50ms) 시점이 아니라 실제로 멈춘 시간(약 400ms)을 기록
+    assert 350 <= event['stalled_ms'] < 1000
+    assert 'test_loop_monitor.py' in event['site']
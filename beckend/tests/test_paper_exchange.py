@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import get_settings
+from app.services.paper_exchange import ERROR_INSUFFICIENT_MARGIN, PaperExchange, PriceFeed
+
+settings = get_settings()
+
+ORDER = '/openApi/swap/v2/trade/order'
+POSITIONS = '/openApi/swap/v2/user/positions'
+
+
+@pytest.fixture
+def exchange(monkeypatch):
+    # 지연/오류/슬리피지 없이 수수료 0.1%로 계산
+    monkeypatch.setattr(settings, 'paper_latency_ms', 0.0)
+    monkeypatch.setattr(settings, 'paper_latency_jitter_ms', 0.0)
+    monkeypatch.setattr(settings, 'paper_error_rate', 0.0)
+    monkeypatch.setattr(settings, 'paper_slippage_bps', 0.0)
+    monkeypatch.setattr(settings, 'paper_taker_fee_rate', 0.001)
+    monkeypatch.setattr(settings, 'paper_initial_balance', 10000.0)
+    paper = PaperExchange(PriceFeed(volatility_per_second=0.0, seed=1))
+    paper.feed.set_price('BTC-USDT', 100.0)
+    return paper
+
+
+def _request(exchange, method, path, **params):
+    return asyncio.run(exchange.request('key', method, path, params))
+
+
+def _order(exchange, side, position_side, quantity, **extra):
+    return _request(exchange, 'POST', ORDER, symbol='BTC-USDT', side=side, positionSide=position_side,
+                    quantity=str(quantity), type='MARKET', **extra)
+
+
+def test_open_and_partial_close_accounting(exchange):
+    assert _order(exchange, 'BUY', 'LONG', 2)['code'] == 0
+    exchange.feed.set_price('BTC-USDT', 110.0)
+    close = _order(exchange, 'SELL', 'LONG', 1)['data']['order']
+    assert close['avgPrice'] == '110.00000000'
+
+    account = exchange.accounts['key']
+    # 진입 수수료 100 * 2 * 0.001, 청산 손익 (110 - 100) * 1, 청산 수수료 110 * 1 * 0.001
+    assert account.wallet == pytest.approx(10000 - 0.2 + 10 - 0.11)
+    position = account.positions[('BTC-USDT', 'LONG')]
+    assert (position.amount, position.entry_price) == (1.0, 100.0)
+    assert position.realised == pytest.approx(-0.2 + 10 - 0.11)
+
+
+@pytest.mark.parametrize('position_side, open_side, trigger, price, order_type, pnl', [
+    # 롱 익절: 100 -> 111, 손익 +11
+    ('LONG', 'BUY', 'takeProfit', 111.0, 'TAKE_PROFIT_MARKET', 11.0),
+    # 롱 손절: 100 -> 94, 손익 -6
+    ('LONG', 'BUY', 'stopLoss', 94.0, 'STOP_MARKET', -6.0),
+    # 숏 익절: 100 -> 89, 손익 +11
+    ('SHORT', 'SELL', 'takeProfit', 89.0, 'TAKE_PROFIT_MARKET', 11.0),
+    # 숏 손절: 100 -> 106, 손익 -6
+    ('SHORT', 'SELL', 'stopLoss', 106.0, 'STOP_MARKET', -6.0),
+])
+def test_take_profit_and_stop_loss_trigger(exchange, position_side, open_side, trigger, price, order_type, pnl):
+    levels = {'LONG': {'takeProfit': 110.0, 'stopLoss': 95.0}, 'SHORT': {'takeProfit': 90.0, 'stopLoss': 105.0}}
+    stop_price = levels[position_side][trigger]
+    _order(exchange, open_side, position_side, 1, **{trigger: json.dumps({'stopPrice': stop_price})})
+
+    # 가격이 발동 가격에 닿지 않으면 유지
+    exchange.feed.set_price('BTC-USDT', (100.0 + stop_price) / 2)
+    assert len(_request(exchange, 'GET', POSITIONS)['data']) == 1
+
+    exchange.feed.set_price('BTC-USDT', price)
+    assert _request(exchange, 'GET', POSITIONS)['data'] == []
+    account = exchange.accounts['key']
+    fill = account.fills[-1]
+    assert (fill['type'], fill['positionSide'], fill['price']) == (order_type, position_side, price)
+    assert account.wallet == pytest.approx(10000 - 0.1 + pnl - price * 0.001)
+
+
+def test_open_rejected_without_margin(exchange):
+    response = _order(exchange, 'BUY', 'LONG', 1000)
+    assert response['code'] == ERROR_INSUFFICIENT_MARGIN
+    assert not exchange.accounts['key'].positions
+
+
+def test_order_history_is_bounded_and_indexed(exchange, monkeypatch):
+    monkeypatch.setattr(settings, 'paper_max_fills_per_account', 3)
+    order_ids = []
+    for _ in range(3):
+        order_ids.append(_order(exchange, 'BUY', 'LONG', 1)['data']['order']['orderId'])
+        order_ids.append(_order(exchange, 'SELL', 'LONG', 1)['data']['order']['orderId'])
+
+    account = exchange.accounts['key']
+    assert len(account.fills) == 3
+    assert list(account.orders) == [str(order_id) for order_id in order_ids[-3:]]
+    latest = _request(exchange, 'GET', ORDER, orderId=order_ids[-1])
+    assert latest['data']['order']['orderId'] == order_ids[-1]
+    assert _request(exchange, 'GET', ORDER, orderId=order_ids[0])['code'] != 0
@@ -0,0 +1,79 @@
+import time
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import profiler_service as profiler_module
+from app.services.profiler_service import ProfilerService, profiler_service
+
+ADMIN_HEADERS = {'X-Admin-Token': 'test-admin-token'}
+
+
+def test_request_profile_cancelled_before_any_request_can_restart():
+    async def scenario():
+        profiler = ProfilerService()
+        first = profiler.start_requests(5)['active']['id']
+        profiler.cancel()
+        assert profiler.status()['active'] is None
+        content, _, _ = profiler.get_artifact(first)
+        assert content
+        # 이전 세션이 남아 있으면 ProfilerBusyError
+        profiler.start_requests(5)
+        profiler.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_request_profile_timeout_before_any_request_clears_session():
+    async def scenario():
+        profiler = ProfilerService()
+        profiler.max_seconds = 0.05
+        profiler.start_requests(5)
+        await asyncio.sleep(0.2)
+        assert profiler.status()['active'] is None
+        assert profiler.status()['artifacts'][0]['formats'] == ['text']
+
+    asyncio.run(scenario())
+
+
+def test_request_profile_collects_pstats():
+    async def scenario():
+        profiler = ProfilerService()
+        profile_id = profiler.start_requests(1)['active']['id']
+        profile = profiler.begin_request()
+        sum(range(1000))
+        profiler.end_request(profile)
+        assert profiler.status()['active'] is None
+        assert profiler.get_artifact(profile_id, 'pstats')[0]
+        assert profiler.get_artifact(profile_id, 'text')[0]
+
+    asyncio.run(scenario())
+
+
+def test_sampler_failure_releases_session(monkeypatch):
+    def broken_label(frame):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(profiler_module, '_frame_label', broken_label)
+    profiler = ProfilerService()
+    profiler.start_sampling(1.0, 1)
+    profiler._sampler.join(timeout=2)
+    assert profiler.status()['active'] is None
+    profiler.start_sampling(0.1, 1)
+    profiler._sampler.join(timeout=2)
+
+
+def test_sample_wait_returns_error_when_sampler_dies(monkeypatch):
+    def broken_label(frame):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(profiler_module, '_frame_label', broken_label)
+    with TestClient(app) as client:
+        started = time.monotonic()
+        response = client.post('/api/diagnostics/profile/sample?seconds=30&interval_ms=1&wait=true',
+                               headers=ADMIN_HEADERS)
+        assert response.status_code == 500
+        assert response.json()['detail'] == "샘플링 결과를 만들지 못했습니다."
+        assert time.monotonic() - started < 5
+        assert profiler_service.status()['active'] is None
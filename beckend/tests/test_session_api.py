@@ -0,0 +1,61 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import session as session_api
+from app.main import app
+from app.services.sqlite_session_service import sqlite_session_service
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_list_returns_a_default_page_without_total_count(client, session_row, monkeypatch):
+    monkeypatch.setattr(session_api, 'DEFAULT_SESSION_PAGE_SIZE', 2)
+    for index in range(3):
+        sqlite_session_service.save_session(session_row(f'list-{index}'))
+    body = client.get('/api/sessions').json()
+    assert body['limit'] == 2
+    assert body['count'] == len(body['sessions']) == 2
+    assert body['next_cursor'] is not None
+    assert body['total_count'] is None
+    assert 'api_key' not in body['sessions'][0]
+
+
+def test_limit_zero_and_all_return_every_session(client, session_row, monkeypatch):
+    monkeypatch.setattr(session_api, 'DEFAULT_SESSION_PAGE_SIZE', 2)
+    for index in range(3):
+        sqlite_session_service.save_session(session_row(f'all-{index}'))
+    for params in ({'limit': 0, 'with_total': 1}, {'all': 'true', 'with_total': 1}):
+        body = client.get('/api/sessions', params=params).json()
+        assert body['limit'] is None and body['next_cursor'] is None
+        assert body['total_count'] == body['count'] == len(body['sessions']) >= 3
+        assert {'all-0', 'all-1', 'all-2'} <= {session['session_id'] for session in body['sessions']}
+
+
+def test_paginated_list_with_total_count(client, session_row):
+    for index in range(3):
+        sqlite_session_service.save_session(session_row(f'page-{index}'))
+    total = client.get('/api/sessions', params={'all': 'true', 'with_total': 'true'}).json()['total_count']
+
+    seen = []
+    cursor = None
+    while True:
+        params = {'limit': 2, 'with_total': 'true', **({'cursor': cursor} if cursor else {})}
+        body = client.get('/api/sessions', params=params).json()
+        assert body['total_count'] == total
+        assert body['limit'] == 2
+        seen.extend(session['session_id'] for session in body['sessions'])
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == total
+
+
+def test_active_sessions_default_to_all_columns(session_row):
+    sqlite_session_service.save_session(session_row('columns-all'))
+    session = next(s for s in sqlite_session_service.get_active_sessions() if s['session_id'] == 'columns-all')
+    assert session['api_key'] == 'key-columns-all'
+    assert 'initial_balance' in session
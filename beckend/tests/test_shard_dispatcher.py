@@ -0,0 +1,86 @@
+import asyncio
+
+from app.core.config import get_settings
+from app.services.shard_dispatcher import ShardDispatcher, ShardWorker
+
+settings = get_settings()
+
+
+def _user_settings(secret: str) -> dict:
+    return {'apiKey': 'key-shard', 'secretKey': secret, 'exchangeType': 'paper'}
+
+
+def _job(session_id: str) -> dict:
+    return {'session_id': session_id, 'account_key': f'account-{session_id}',
+            'user_settings': _user_settings('secret'), 'fanout_position': 0}
+
+
+class SlowWorker(ShardWorker):
+    """거래소 대신 지정한 시간만큼 걸리는 작업을 실행하는 워커"""
+
+    def __init__(self, socket_path: str, job_seconds: float):
+        super().__init__(0, socket_path)
+        self.job_seconds = job_seconds
+        self.finished = []
+
+    async def _run_job(self, symbol, action, job, signal=None):
+        await asyncio.sleep(self.job_seconds)
+        self.finished.append(job['session_id'])
+        return {'session_id': job['session_id'], 'result': {'success': True}}
+
+
+async def _start(worker: SlowWorker) -> tuple:
+    dispatcher = ShardDispatcher(1)
+    dispatcher.socket_paths = [worker.socket_path]
+    serving = asyncio.create_task(worker.serve())
+    while not serving.done():
+        try:
+            _, writer = await asyncio.open_unix_connection(worker.socket_path)
+            writer.close()
+            break
+        except OSError:
+            await asyncio.sleep(0.01)
+    return dispatcher, serving
+
+
+def test_client_is_rebuilt_when_secret_rotates(tmp_path):
+    worker = ShardWorker(0, str(tmp_path / 'shard.sock'))
+    first = worker._get_client('account', _user_settings('old-secret'))
+    assert worker._get_client('account', _user_settings('old-secret')) is first
+    rotated = worker._get_client('account', _user_settings('new-secret'))
+    assert rotated is not first
+    assert rotated.secret_key == 'new-secret'
+
+
+def test_timeout_reports_pending_instead_of_failure(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'shard_request_timeout_seconds', 0.1)
+    worker = SlowWorker(str(tmp_path / 'shard.sock'), job_seconds=0.5)
+
+    async def scenario():
+        dispatcher, serving = await _start(worker)
+        results = await dispatcher.dispatch('BTC-USDT', 'LONG', [_job('slow')])
+        await dispatcher.stop()
+        await serving
+        return results
+
+    results = asyncio.run(scenario())
+    assert results[0]['result']['pending'] is True
+    assert results[0]['result']['reason'] == 'shard_result_unknown'
+    # 응답은 늦었지만 워커의 작업은 종료 전에 끝까지 실행됨
+    assert worker.finished == ['slow']
+
+
+def test_stop_drains_in_flight_jobs(tmp_path):
+    worker = SlowWorker(str(tmp_path / 'shard.sock'), job_seconds=0.3)
+
+    async def scenario():
+        dispatcher, serving = await _start(worker)
+        dispatch = asyncio.create_task(dispatcher.dispatch('BTC-USDT', 'LONG', [_job('a'), _job('b')]))
+        await asyncio.sleep(0.05)
+        await dispatcher.stop()
+        await serving
+        return await dispatch
+
+    results = asyncio.run(scenario())
+    assert sorted(worker.finished) == ['a', 'b']
+    assert [item['result'] for item in results] == [{'success': True}, {'success': True}]
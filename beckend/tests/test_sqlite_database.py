@@ -0,0 +1,62 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from app.core import sqlite_database
+from app.core.sqlite_database import SQLiteDatabase, _is_busy_error
+
+
+def _error(code: int) -> sqlite3.OperationalError:
+    error = sqlite3.OperationalError('database is locked')
+    error.sqlite_errorcode = code
+    return error
+
+
+@pytest.mark.parametrize('code', [5, 6, 261, 262, 517])
+def test_extended_busy_and_locked_codes_are_busy_errors(code):
+    assert _is_busy_error(_error(code))
+
+
+def test_other_errors_are_not_busy_errors():
+    assert not _is_busy_error(_error(1))
+    assert not _is_busy_error(_error(8))
+
+
+def test_write_waits_for_lock_holder(tmp_path):
+    db = SQLiteDatabase(str(tmp_path / 'busy.db'))
+    holder = sqlite3.connect(db.db_path, isolation_level=None, check_same_thread=False)
+    holder.execute('BEGIN IMMEDIATE')
+    releaser = threading.Timer(0.2, holder.execute, ('COMMIT',))
+    releaser.start()
+    started = time.perf_counter()
+    with db.get_connection() as conn:
+        conn.execute("INSERT INTO table_versions (name, version) VALUES ('busy_test', 0)")
+        conn.commit()
+    releaser.join()
+    holder.close()
+    assert time.perf_counter() - started >= 0.15
+
+
+def test_executemany_retry_reuses_generator_rows(tmp_path, monkeypatch):
+    db = SQLiteDatabase(str(tmp_path / 'retry.db'))
+    original = sqlite_database._run_instrumented
+
+    def fail_first_attempt(shape, operation, rowcount=lambda: 0):
+        if shape.startswith('INSERT'):
+            # 첫 시도가 잠금 오류로 롤백된 뒤 재시도하는 경우
+            conn.execute('SAVEPOINT attempt')
+            operation()
+            conn.execute('ROLLBACK TO attempt')
+        return original(shape, operation, rowcount)
+
+    with db.get_connection() as conn:
+        monkeypatch.setattr(sqlite_database, '_run_instrumented', fail_first_attempt)
+        conn.executemany(
+            "INSERT INTO table_versions (name, version) VALUES (?, 0)", ((f'retry-{i}',) for i in range(3))
+        )
+        monkeypatch.setattr(sqlite_database, '_run_instrumented', original)
+        conn.commit()
+        count = conn.execute("SELECT COUNT(*) FROM table_versions WHERE name LIKE 'retry-%'").fetchone()[0]
+    assert count == 3
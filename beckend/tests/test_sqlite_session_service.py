@@ -0,0 +1,61 @@
+import pytest
+
+from app.core.metrics import cache_requests
+from app.services.coordination_service import coordination_service
+from app.services.sqlite_session_service import sqlite_session_service
+
+
+def _hits() -> float:
+    return cache_requests.value(cache='sessions', result='hit')
+
+
+def test_all_sessions_cache_survives_unrelated_writes(session_row):
+    sqlite_session_service.save_session(session_row('cache-1'))
+    first = sqlite_session_service.get_all_sessions()
+
+    # 웹훅마다 일어나는 다른 테이블 쓰기 (신호 선점, 계정 리스)
+    for index in range(5):
+        assert coordination_service.claim_signal(f"cache-test-{index}")
+    token = coordination_service.acquire_lease("cache-test-account")
+    assert token
+    coordination_service.release_lease("cache-test-account", token)
+
+    hits = _hits()
+    for _ in range(5):
+        assert sqlite_session_service.get_all_sessions() is first
+    assert _hits() == hits + 5
+
+
+def test_all_sessions_cache_invalidated_by_session_writes(session_row):
+    sqlite_session_service.save_session(session_row('cache-2'))
+    before = sqlite_session_service.get_all_sessions()
+
+    sqlite_session_service.update_session_status('cache-2', True, 'BTC-USDT')
+    after = sqlite_session_service.get_all_sessions()
+    assert after is not before
+    assert next(s for s in after if s['session_id'] == 'cache-2')['current_symbol'] == 'BTC-USDT'
+
+    sqlite_session_service.delete_session('cache-2')
+    assert all(s['session_id'] != 'cache-2' for s in sqlite_session_service.get_all_sessions())
+
+
+def test_upsert_keeps_owner_and_created_at(session_row):
+    sqlite_session_service.save_session(session_row('upsert', user_email='owner@example.com'))
+    created_at = sqlite_session_service.get_session('upsert')['created_at']
+    sqlite_session_service.save_session(session_row('upsert', user_email='other@example.com', leverage=7))
+    session = sqlite_session_service.get_session('upsert')
+    assert session['user_email'] == 'owner@example.com'
+    assert session['created_at'] == created_at
+    assert session['leverage'] == 7
+
+
+def test_bulk_update_reports_rows_and_rejects_unknown_columns(session_row):
+    sqlite_session_service.save_session(session_row('bulk-a', indicator='BULK'))
+    sqlite_session_service.save_session(session_row('bulk-b', indicator='BULK'))
+    results = sqlite_session_service.bulk_update_sessions({'leverage': 3}, session_ids=['bulk-a', 'bulk-missing'])
+    assert results == [{'session_id': 'bulk-a', 'status': 'updated'},
+                       {'session_id': 'bulk-missing', 'status': 'not_found'}]
+    by_indicator = sqlite_session_service.bulk_update_sessions({'is_auto_trading_enabled': False}, indicator='BULK')
+    assert {row['session_id'] for row in by_indicator} == {'bulk-a', 'bulk-b'}
+    with pytest.raises(ValueError):
+        sqlite_session_service.bulk_update_sessions({'api_key': 'x'}, session_ids=['bulk-a'])
@@ -0,0 +1,26 @@
+from app.core.tracing import OTHER_SYMBOL, LatencyTracer, SymbolLabels
+
+
+def _symbols(tracer: LatencyTracer) -> set:
+    return {symbol for (_, _, symbol), _ in tracer.histograms()}
+
+
+def test_allowed_symbols_keep_their_label_and_the_rest_is_other():
+    labels = SymbolLabels(['BTC-USDT', 'ETH-USDT'])
+    assert labels.label('BTC-USDT') == 'BTC-USDT'
+    assert labels.label('BTCUSDT') == 'BTC-USDT'
+    assert labels.label('DOGE-USDT') == OTHER_SYMBOL
+
+
+def test_without_allow_list_label_count_is_capped():
+    tracer = LatencyTracer(SymbolLabels(max_symbols=2))
+    for index in range(50):
+        tracer.observe('execute', 'paper', f'RANDOM{index}-USDT', 1.0)
+    assert _symbols(tracer) == {'RANDOM0-USDT', 'RANDOM1-USDT', OTHER_SYMBOL}
+
+
+def test_recorded_traces_use_normalized_labels():
+    tracer = LatencyTracer(SymbolLabels(['BTC-USDT']))
+    tracer.record({'exchange_type': 'paper', 'symbol': 'X' * 200,
+                   'spans': [{'stage': 'execute', 'duration_ms': 1.0}]})
+    assert _symbols(tracer) == {OTHER_SYMBOL}
@@ -0,0 +1,28 @@
+import asyncio
+
+from app.services.bingx import BingXClient
+from app.services.trading import TradingService
+
+
+def _paper_client(api_key: str) -> BingXClient:
+    client = BingXClient()
+    client.set_credentials(api_key, 'secret', 'paper')
+    return client
+
+
+def _open(service: TradingService) -> None:
+    asyncio.run(service.execute_trade(symbol='BTC-USDT', side='LONG', quantity=0.01, leverage=5))
+
+
+def test_session_instance_records_orders():
+    service = TradingService(_paper_client('key-orders-session'), record_orders=True)
+    _open(service)
+    assert [order['kind'] for order in service.orders] == ['open']
+    assert service.orders[0]['response']['code'] == 0
+
+
+def test_shared_instance_does_not_accumulate_orders():
+    service = TradingService(_paper_client('key-orders-shared'))
+    for _ in range(3):
+        _open(service)
+    assert service.orders == []
@@ -0,0 +1,72 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from app.services.traffic_recorder import TrafficRecorder, account_ref, read_trace
+from app.services.traffic_replay import MISSING_RESPONSE, ReplayExchange
+from bench.replay import load_trace
+
+API_KEY = 'live-api-key-123'
+PASSPHRASE = 'hook-passphrase-456'
+SIGNATURE = 'deadbeefsignature789'
+
+
+def _record(path: str) -> None:
+    recorder = TrafficRecorder(str(path))
+    recorder.record_sessions([{
+        'session_id': 'session-1', 'api_key': API_KEY, 'secret_key': 'secret-000',
+        'exchange_type': 'paper', 'investment': 100, 'leverage': 5,
+    }])
+    recorder.record_signal(1000.0, {'passphrase': PASSPHRASE, 'action': 'long', 'symbol': 'BTC-USDT'})
+    recorder.record_exchange(API_KEY, 'paper', 'GET', '/balance', {'apiKey': API_KEY, 'signature': SIGNATURE,
+                                                                   'timestamp': 1},
+                             1000.1, 12.5, http_status=200, result={'code': 0, 'data': {'balance': 1}})
+    recorder.record_exchange(API_KEY, 'paper', 'GET', '/balance', {}, 1000.2, 8.0,
+                             http_status=200, result={'code': 0, 'data': {'balance': 2}})
+    recorder.record_exchange(API_KEY, 'paper', 'POST', '/order', {}, 1000.3, 3.0, error='connection reset')
+    recorder.flush()
+
+
+def test_recorded_trace_has_no_secrets(tmp_path):
+    path = tmp_path / 'trace.jsonl'
+    _record(path)
+
+    text = path.read_text(encoding='utf-8')
+    for secret in (API_KEY, PASSPHRASE, SIGNATURE, 'secret-000', 'session-1'):
+        assert secret not in text
+
+    entries = list(read_trace(str(path)))
+    assert [entry['k'] for entry in entries] == ['meta', 'sessions', 'signal', 'x', 'x', 'x']
+    assert entries[2]['body']['passphrase'] == '***'
+    assert 'timestamp' not in entries[3]['q']
+
+
+def test_replay_returns_recorded_responses_in_order(tmp_path):
+    path = tmp_path / 'trace.jsonl'
+    _record(path)
+    exchange = ReplayExchange(str(path), speed=0)
+    account = account_ref(API_KEY, 'paper')
+
+    async def replay():
+        return [await exchange.request(account, 'GET', '/balance') for _ in range(3)]
+
+    first, second, reused = asyncio.run(replay())
+    assert first == (200, {'code': 0, 'data': {'balance': 1}})
+    assert second == (200, {'code': 0, 'data': {'balance': 2}})
+    # 기록이 바닥나면 마지막 응답 재사용
+    assert reused == second
+
+    assert asyncio.run(exchange.request('unknown', 'GET', '/balance')) == (404, MISSING_RESPONSE)
+    with pytest.raises(aiohttp.ClientError):
+        asyncio.run(exchange.request(account, 'POST', '/order'))
+
+
+def test_load_trace_uses_recorded_sessions_and_signals(tmp_path):
+    path = tmp_path / 'trace.jsonl'
+    _record(path)
+
+    trace = load_trace(str(path))
+    assert trace['signals'] == [(1000.0, {'passphrase': '***', 'action': 'long', 'symbol': 'BTC-USDT'})]
+    assert trace['sessions'][0]['acct'] == account_ref(API_KEY, 'paper')
+    assert trace['recorded']['exchange_calls'] == 3
@@ -0,0 +1,168 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.main import app
+from app.services.coordination_service import CoordinationService, coordination_service
+from app.services.ledger_service import ledger_service
+from app.services.paper_exchange import paper_exchange
+from app.services.sqlite_session_service import sqlite_session_service
+
+settings = get_settings()
+
+ADMIN_HEADERS = {'X-Admin-Token': 'test-admin-token'}
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _results(response) -> dict:
+    body = response.json()
+    assert body['success'], body
+    return {item['session_id']: item['result'] for item in body['data']['processed_sessions']}
+
+
+def _traded(result: dict) -> bool:
+    """진입 주문이 체결됐는지 (성공 시 결과는 거래소 주문 응답)"""
+    return result.get('code') == 0 and result['data']['order']['status'] == 'FILLED'
+
+
+def _account_key(session_id: str) -> str:
+    return coordination_service.make_account_key(f'key-{session_id}', 'paper')
+
+
+def test_busy_account_waits_for_lease_then_trades(client, session_row):
+    sqlite_session_service.save_session(session_row('lease-free', indicator='LEASE_WAIT'))
+    sqlite_session_service.save_session(session_row('lease-busy', indicator='LEASE_WAIT'))
+    other = CoordinationService()
+    assert other.acquire_lease(_account_key('lease-busy'), ttl_seconds=0.5)
+
+    results = _results(client.post('/api/webhook', json={
+        'action': 'LONG', 'strategy': 'LEASE_WAIT', 'symbol': 'BTCUSDT.P'
+    }))
+    assert _traded(results['lease-free'])
+    assert _traded(results['lease-busy'])
+
+
+def test_busy_account_skipped_after_lease_ttl(client, session_row, monkeypatch):
+    monkeypatch.setattr(settings, 'execution_lease_ttl_seconds', 0.3)
+    sqlite_session_service.save_session(session_row('lease-held', indicator='LEASE_HELD'))
+    other = CoordinationService()
+    token = other.acquire_lease(_account_key('lease-held'), ttl_seconds=30)
+    assert token
+
+    results = _results(client.post('/api/webhook', json={
+        'action': 'LONG', 'strategy': 'LEASE_HELD', 'symbol': 'BTCUSDT.P'
+    }))
+    assert results['lease-held']['reason'] == 'account_busy'
+    other.release_lease(_account_key('lease-held'), token)
+
+
+def _open_sides(session_id: str) -> set:
+    account = paper_exchange.accounts[f'key-{session_id}']
+    return {side for (_, side), position in account.positions.items() if position.amount > 0}
+
+
+def test_repriced_reversal_closes_opposite_and_skips_entry(client, session_row, monkeypatch):
+    sqlite_session_service.save_session(session_row('guard-drift', indicator='GUARD_DRIFT'))
+    assert _traded(_results(client.post('/api/webhook', json={
+        'action': 'SHORT', 'strategy': 'GUARD_DRIFT', 'symbol': 'BTCUSDT.P'
+    }))['guard-drift'])
+    assert _open_sides('guard-drift') == {'SHORT'}
+
+    monkeypatch.setattr(settings, 'signal_max_price_drift_bps', 50.0)
+    results = _results(client.post('/api/webhook', json={
+        'action': 'LONG', 'strategy': 'GUARD_DRIFT', 'symbol': 'BTCUSDT.P', 'price': 1.0
+    }))
+    assert results['guard-drift']['reason'] == 'price_drift'
+    assert _open_sides('guard-drift') == set()
+
+
+def test_stale_reversal_is_fanned_out_and_closes_opposite(client, session_row, monkeypatch):
+    sqlite_session_service.save_session(session_row('guard-stale', indicator='GUARD_STALE'))
+    assert _traded(_results(client.post('/api/webhook', json={
+        'action': 'SHORT', 'strategy': 'GUARD_STALE', 'symbol': 'BTCUSDT.P'
+    }))['guard-stale'])
+
+    monkeypatch.setattr(settings, 'signal_latency_budget_ms', 1000.0)
+    response = client.post('/api/webhook', json={
+        'action': 'LONG', 'strategy': 'GUARD_STALE', 'symbol': 'BTCUSDT.P', 'alert_time': time.time() - 60
+    })
+    assert response.json()['data']['stale'] is True
+    assert _results(response)['guard-stale']['reason'] == 'latency_budget_exceeded'
+    assert _open_sides('guard-stale') == set()
+
+
+def test_signal_guard_is_off_by_default(client, session_row):
+    assert settings.signal_latency_budget_ms == 0
+    assert settings.signal_max_price_drift_bps == 0
+    sqlite_session_service.save_session(session_row('guard-off', indicator='GUARD_OFF'))
+    results = _results(client.post('/api/webhook', json={
+        'action': 'LONG', 'strategy': 'GUARD_OFF', 'symbol': 'BTCUSDT.P',
+        'price': 1.0, 'alert_time': time.time() - 60
+    }))
+    assert _traded(results['guard-off'])
+
+
+def test_repeated_alert_on_next_bar_is_not_a_duplicate(client, session_row):
+    sqlite_session_service.save_session(session_row('dedup-a', indicator='DEDUP'))
+    alert = {'action': 'CLOSE', 'strategy': 'DEDUP', 'symbol': 'BTCUSDT.P', 'time': '2024-01-01T00:00:00Z'}
+    assert 'duplicate' not in (client.post('/api/webhook', json=alert).json()['data'] or {})
+    assert client.post('/api/webhook', json=alert).json()['data'] == {'duplicate': True}
+    next_bar = client.post('/api/webhook', json=dict(alert, time='2024-01-01T00:01:00Z')).json()
+    assert next_bar['success'] and 'duplicate' not in next_bar['data']
+
+
+def test_signal_and_orders_are_recorded_in_the_ledger(client, session_row):
+    sqlite_session_service.save_session(session_row('ledger-a', indicator='LEDGER'))
+    body = client.post('/api/webhook', json={
+        'action': 'LONG', 'strategy': 'LEDGER', 'symbol': 'BTCUSDT.P', 'price': 100.0, 'passphrase': 'hunter2'
+    }).json()
+    ledger_service.flush()
+
+    signal = client.get(f"/api/signals/{body['data']['signal_id']}", headers=ADMIN_HEADERS).json()['signal']
+    assert signal['strategy'] == 'LEDGER' and signal['session_count'] == 1
+    assert signal['raw_payload']['passphrase'] == '***'
+    trade = signal['trades'][0]
+    assert (trade['session_id'], trade['order_kind'], trade['status']) == ('ledger-a', 'open', 'success')
+    assert trade['signal_price'] == 100.0
+    assert trade['fill_price'] is not None
+    assert trade['fanout_position'] == 0
+
+
+def test_ledger_routes_require_admin(client):
+    for path in ('/api/signals', '/api/signals/unknown', '/api/trades'):
+        assert client.get(path).status_code == 401
+    assert client.get('/api/trades', headers=ADMIN_HEADERS).status_code == 200
+
+
+def test_plan_mode_returns_orders_without_trading(client, session_row):
+    sqlite_session_service.save_session(session_row('plan-a', indicator='PLAN'))
+    body = client.post('/api/webhook/plan', json={
+        'action': 'SHORT', 'strategy': 'PLAN', 'symbol': 'BTCUSDT.P', 'price': 100.0
+    }).json()
+    plan = next(plan for plan in body['data']['plans'] if plan['session_id'] == 'plan-a')
+    assert [order['kind'] for order in plan['orders']] == ['open']
+    assert plan['orders'][0]['positionSide'] == 'SHORT'
+    assert 'key-plan-a' not in paper_exchange.accounts or not paper_exchange.accounts['key-plan-a'].positions
+
+
+@pytest.mark.parametrize('price', ['abc', -1, 0])
+def test_plan_mode_rejects_invalid_price(client, price):
+    response = client.post('/api/webhook/plan', json={
+        'action': 'LONG', 'strategy': 'PLAN', 'symbol': 'BTCUSDT.P', 'price': price
+    })
+    assert response.status_code == 400
+
+
+def test_metrics_expose_stage_latency(client, session_row):
+    sqlite_session_service.save_session(session_row('metrics-a', indicator='METRICS'))
+    client.post('/api/webhook', json={'action': 'LONG', 'strategy': 'METRICS', 'symbol': 'BTCUSDT.P'})
+    text = client.get('/metrics').text
+    assert 'webhook_stage_latency_ms_bucket{' in text
+    assert 'webhook_signals_total{outcome="processed"}' in text
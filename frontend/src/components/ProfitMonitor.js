@@ -14,12 +14,47 @@ export default function ProfitMonitor({ sessionId, isAutoTradingEnabled }) {
   });
 
   useEffect(() => {
-    if (isAutoTradingEnabled) {
-      fetchBalanceInfo();  // 자동매매 시작 시 즉시 자산 정보 조회
-      // 5초마다 자산 정보 업데이트
-      const interval = setInterval(fetchBalanceInfo, 5000);
+    if (!isAutoTradingEnabled) return;
+
+    // 서버 푸시(SSE)로 잔고/포지션 변경을 수신하고, 실패하면 5초 폴링으로 대체
+    const userEmail = localStorage.getItem('userEmail');
+    const exchangeType = localStorage.getItem('exchangeType') || 'demo';
+    const streamSessionId = `${userEmail}_${exchangeType}`;
+
+    let interval = null;
+    const startPolling = () => {
+      if (interval) return;
+      fetchBalanceInfo();
+      interval = setInterval(fetchBalanceInfo, 5000);
+    };
+
+    if (typeof EventSource === 'undefined') {
+      startPolling();
       return () => clearInterval(interval);
     }
+
+    const source = new EventSource(`/api/stream/${streamSessionId}`);
+    source.addEventListener('snapshot', (event) => {
+      const data = JSON.parse(event.data);
+      const position = data.positions[0];
+      setTradingInfo((prev) => ({
+        initialBalance: prev.initialBalance || data.balance.total_balance,
+        currentBalance: data.balance.total_balance,
+        hasPosition: data.positions.length > 0,
+        positionSide: position ? position.side : '',
+        positionSize: position ? position.size : 0,
+        entryPrice: position ? position.entry_price : 0
+      }));
+    });
+    source.onerror = () => {
+      source.close();
+      startPolling();
+    };
+
+    return () => {
+      source.close();
+      clearInterval(interval);
+    };
   }, [isAutoTradingEnabled]);
 
   const fetchBalanceInfo = async () => {
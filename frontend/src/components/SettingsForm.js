@@ -9,7 +9,7 @@ import Dropdown from './common/Dropdown';
 const DEFAULT_SETTINGS = {
   apiKey: '',
   secretKey: '',
-  exchangeType: 'demo', // 'demo' or 'live'
+  exchangeType: 'demo', // 'demo', 'live' or 'paper'
   investment: 1000,
   leverage: 10,
   takeProfit: 2,
@@ -25,9 +25,16 @@ const INDICATOR_OPTIONS = [
 
 const EXCHANGE_OPTIONS = [
   { value: 'demo', label: '데모 거래소 (VST)' },
-  { value: 'live', label: '실제 거래소 (USDT)' }
+  { value: 'live', label: '실제 거래소 (USDT)' },
+  { value: 'paper', label: '모의 거래소 (페이퍼 트레이딩)' }
 ];
 
+const EXCHANGE_TITLES = {
+  demo: '📊 데모 거래소',
+  live: '💰 실제 거래소',
+  paper: '🧪 모의 거래소'
+};
+
 export default function SettingsForm({ onSettingsChange, onAutoTradingChange }) {
   const [isRunning, setIsRunning] = useState(false);
   const [settings, setSettings] = useState(DEFAULT_SETTINGS);
@@ -283,12 +290,12 @@ export default function SettingsForm({ onSettingsChange, onAutoTradingChange })
         {/* 거래 설정 */}
         <div className="border border-gray-600 rounded-lg p-4">
           <h3 className="text-lg font-semibold text-white mb-4">
-            {settings.exchangeType === 'demo' ? '📊 데모 거래소' : '💰 실제 거래소'} 거래 설정
+            {EXCHANGE_TITLES[settings.exchangeType] || EXCHANGE_TITLES.demo} 거래 설정
           </h3>
           <div className="grid grid-cols-2 gap-4">
             <Input
               type="number"
-              label={`투자금액 (${settings.exchangeType === 'demo' ? 'VST' : 'USDT'})`}
+              label={`투자금액 (${settings.exchangeType === 'live' ? 'USDT' : 'VST'})`}
               value={settings.investment}
               onChange={(value) => setSettings({...settings, investment: Number(value)})}
               placeholder="1000"